@@ -0,0 +1,81 @@
+import logging
+import random
+import time
+from typing import Iterable, Optional
+import tracing
+
+# Header values never written to the access log
+REDACTED_HEADERS = {'authorization', 'cookie', 'proxy-authorization'}
+
+logger = logging.getLogger('access')
+
+class AccessLogMiddleware:
+    """
+    Write one key=value access log line per HTTP request, with its status,
+    response size and latency. Paths in `skip_paths` are never logged, and
+    of the rest only a `sample_rate` share of successful requests are;
+    errors are always logged. `headers` names request headers to include,
+    with credentials redacted.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, skip_paths: Iterable[str] = ('/',),
+                 headers: Iterable[str] = ('user-agent',)):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.skip_paths = frozenset(skip_paths)
+        self.headers = tuple(header.lower().encode() for header in headers)
+
+    @classmethod
+    def options_from_config(cls, config) -> dict:
+        """Middleware options from the access_* keys of the [logging] section"""
+        def names(key: str, fallback: str):
+            return [name.strip() for name in config.get('logging', key, fallback=fallback).split(',') if name.strip()]
+
+        return {
+            'sample_rate': config.getfloat('logging', 'access_sample_rate', fallback=1.0),
+            'skip_paths': names('access_skip', '/'),
+            'headers': names('access_headers', 'user-agent'),
+        }
+
+    def _header_fields(self, scope) -> str:
+        if not self.headers:
+            return ''
+        values = dict(scope.get('headers', []))
+        fields = []
+        for name in self.headers:
+            value = values.get(name)
+            if value is None:
+                continue
+            text = '[redacted]' if name.decode() in REDACTED_HEADERS else value.decode('latin-1').replace('"', '\\"')
+            fields.append(f' {name.decode()}="{text}"')
+        return ''.join(fields)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status: Optional[int] = None
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            if (status or 500) >= 400 or self.sample_rate >= 1 or random.random() < self.sample_rate:
+                client = scope.get('client')
+                logger.info('method=%s path=%s status=%s bytes=%d duration_ms=%.1f client=%s trace=%s%s',
+                            scope['method'], scope['path'], status, size, (time.perf_counter() - started) * 1000,
+                            client[0] if client else '-', tracing.current_trace_id() or '-',
+                            self._header_fields(scope))
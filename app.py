@@ -1,44 +1,145 @@
+import time
+# Taken before anything else is imported, so startup logs can say how long importing took
+IMPORT_STARTED = time.perf_counter()
+
 from drawing import ImageEncoder
-import asyncio
 import image_generator
-from fastapi import FastAPI, HTTPException, Depends, Security, status, Reques
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Security, status, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from starlette.middleware.base import BaseHTTPMiddleware
-from localconfig import get_config
-from logconfig import configure_logging
-from io import BytesIO
-from repository import Repository
+from singleflight import SingleFlight
+from artifacts import ArtifactCache
+from frame_notifier import FrameNotifier
+from refresh_hint import RefreshAdvisor
+import metrics
+from tracing import Tracer, TracingMiddleware
+from access_log import AccessLogMiddleware
+import asyncio
+import json
+import logging
 from reminder import Reminder
+from configparser import ConfigParser
+from contextlib import asynccontextmanager
 from dataclasses import asdict
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import datetime, tzinfo
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from export import StaticExporter
+    from frame_history import FrameHistory
+    from repository import Repository
+    from shared_frames import SharedFrameCache
+
+logger = logging.getLogger()
+
+# Everything below that depends on the config is created by init(), when
+# the app first starts handling requests, so importing this module stays
+# cheap. A spawned render worker re-imports it when the app is started
+# with `python app.py`.
+config: ConfigParser
+AUTH_TOKEN: str
+repo: 'Repository'
+# Records where the time went in slow requests
+tracer: Tracer
+# Concurrent requests for the same frame share one render
+coalescer: SingleFlight
+# Framebuffer layouts for devices that are not 1bpp landscape panels
+panel_formats: Dict[str, Any]
+# Each frame is encoded at most once per format
+artifacts: ArtifactCache
+# Ring of recently served packed frames, for lookups by time and replay
+history: Optional['FrameHistory'] = None
+# Version of the frame last added to the history
+recorded_version: Optional[str] = None
+# Suggests how long devices can sleep before their next poll
+advisor: RefreshAdvisor
+# Lets one worker render each frame for all of them
+shared_frames: Optional['SharedFrameCache'] = None
+# Wakes long-poll and event stream clients when the frame content changes
+notifier: FrameNotifier
+# Writes each frame as static files for a web server to hand to devices directly
+exporter: Optional['StaticExporter'] = None
+export_task: Optional[asyncio.Task] = None
+local_zone: tzinfo
+
+# Renders a first frame at startup so the first device poll isn't a cold render
+warmup_task: Optional[asyncio.Task] = None
+ready = False
+_initialized = False
+
+def init():
+    """Create the app's services from the config, once"""
+    global _initialized, config, AUTH_TOKEN, repo, tracer, coalescer, panel_formats, artifacts, history
+    global advisor, shared_frames, notifier, exporter, local_zone
+    if _initialized:
+        return
+    from devices import load_panel_formats
+    from drawing import fonts
+    from export import StaticExporter
+    from frame_history import FrameHistory
+    from shared_frames import SharedFrameCache
+    from tzlocal import get_localzone
+
+    # Loaded and set up once, by the image generator
+    config = image_generator.config
+    AUTH_TOKEN = config.get("security", "auth_token", fallback="your-secret-token")
+    repo = image_generator.repository
+    tracer = Tracer.from_config(config)
+    coalescer = SingleFlight(grace=config.getfloat("render", "coalesce_grace", fallback=1.0))
+    panel_formats = load_panel_formats(config)
+    artifacts = ArtifactCache(max_frames=config.getint("render", "artifact_frames", fallback=4),
+                              panel_formats=panel_formats)
+    history = FrameHistory.from_config(config)
+    advisor = RefreshAdvisor.from_config(config)
+    shared_frames = SharedFrameCache.from_config(config)
+    notifier = FrameNotifier(render_statusboard, interval=config.getfloat("push", "interval", fallback=30.0))
+    exporter = StaticExporter.from_config(config, render_statusboard, artifacts, advisor)
+    local_zone = get_localzone()
 
-config = get_config()
-logger = configure_logging(config)
+    def coalescer_counts():
+        stats = coalescer.stats().values()
+        return sum(s["coalesced"] for s in stats), sum(s["executions"] for s in stats)
 
-app = FastAPI()
+    metrics.register_cache("artifacts", lambda: (artifacts.hits, artifacts.misses))
+    metrics.register_cache("coalescer", coalescer_counts)
+    if shared_frames is not None:
+        metrics.register_cache("shared_frames", lambda: (shared_frames.hits, shared_frames.misses))
 
-# Add logging middleware
-class LoggingMiddleware(BaseHTTPMiddleware):
-    def redact(self, headers: dict) -> dict:
-        return {k: v for k, v in headers.items() if k != "Authorization"}
+    metrics.register_cache_size("fonts", fonts.cached_fonts)
+    metrics.register_cache_size("artifacts", lambda: len(artifacts), artifacts.size)
+    if history is not None:
+        metrics.register_cache_size("frame_history", lambda: len(history), lambda: len(history) * history.frame_size)
+    if image_generator.reminder_cache is not None:
+        metrics.register_cache_size("reminders", lambda: len(image_generator.reminder_cache))
+        image_generator.reminder_cache.add_listener(lambda: asyncio.ensure_future(reminders_changed()))
+    _initialized = True
 
-    async def dispatch(self, request: Request, call_next):
-        logger.info(f"Incoming request: {request.method} {request.url}")
-        logger.info(f"Headers: {self.redact(dict(request.headers))}")
-        response = await call_next(request)
-        logger.info(f"Response status: {response.status_code}")
-        return response
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
 
-app.add_middleware(LoggingMiddleware)
+app = FastAPI(lifespan=lifespan)
+
+# Middleware is built when the app first handles a request or its startup,
+# so the factories below are where the config is first read
+
+def access_log_middleware(app):
+    init()
+    return AccessLogMiddleware(app, **AccessLogMiddleware.options_from_config(config))
+
+def tracing_middleware(app):
+    init()
+    return TracingMiddleware(app, tracer=tracer)
+
+# One access log line per request, inside the trace so it can name the trace ID
+app.add_middleware(access_log_middleware)
+app.add_middleware(tracing_middleware)
 
 # Make HTTPBearer optional for debugging
 security = HTTPBearer(auto_error=False)
 
-# Get auth token from config or use a default (you should set this in your config file)
-AUTH_TOKEN = config.get("security", "auth_token", fallback="your-secret-token")
-
 def verify_token(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Security(security)):
 
     if credentials is None:
@@ -58,34 +159,190 @@ def verify_token(request: Request, credentials: Optional[HTTPAuthorizationCreden
         )
     return credentials.credentials
 
-repo = Repository(config)
+async def get_frame():
+    if shared_frames is None:
+        return await image_generator.get_statusboard_image()
+    return await shared_frames.get(image_generator.get_statusboard_image)
+
+async def render_statusboard():
+    img = await coalescer.do("statusboard", get_frame)
+    await notifier.publish(img)
+    advisor.observe(img.info.get("panel_versions", {}), datetime.now(local_zone))
+    return img
+
+def frame_headers(img) -> Dict[str, str]:
+    """Version and next-poll hint headers sent with every frame"""
+    # Workers that don't render have no fetched reminders, but may have cached ones
+    cache = image_generator.reminder_cache
+    reminders = cache.reminders() if cache is not None else None
+    if reminders is None:
+        reminders = map(Reminder.from_json, image_generator.fetch_guard.last_good("reminders") or [])
+    reminder_times = [
+        reminder.time for reminder in reminders
+        if reminder.time and reminder.completed != "Yes"
+    ]
+    return {
+        "X-Frame-Version": FrameNotifier.version_of(img),
+        "X-Refresh-After": str(advisor.hint(datetime.now(local_zone), reminder_times))
+    }
+
+async def stream_packed(img, rows_per_band: int):
+    """Send packed rows as soon as each band is encoded"""
+    bands = []
+    for band in ImageEncoder.iter_packed_rows(img, rows_per_band):
+        bands.append(band)
+        yield band
+    packed = b''.join(bands)
+    # Later requests for this frame, streamed or not, get the packed bytes from the cache
+    artifacts.put(img, "packed", packed)
+    await record_frame(img, packed)
+
+async def record_frame(img, packed: bytes):
+    """Add a served frame to the history, once per frame version"""
+    global recorded_version
+    version = FrameNotifier.version_of(img)
+    if history is None or version == recorded_version:
+        return
+    recorded_version = version
+    # Hashing the frame and waiting for the file lock held by another worker
+    # must not block the event loop
+    await asyncio.to_thread(history.append, packed)
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header gives gzip, x-gzip or * a quality above zero"""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    # An explicitly listed coding takes precedence over the * wildcard
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+async def frame_response(request: Request, img, fmt: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serve an encoded frame from the artifact cache, gzipped if the client accepts it"""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoded_fmt = fmt
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        encoded_fmt = f"{fmt}.gz"
+        headers["Content-Encoding"] = "gzip"
+
+    content = await artifacts.get(img, encoded_fmt)
+    return Response(content, media_type=ArtifactCache.media_type(fmt), headers=headers)
+
+async def reminders_changed():
+    """Show reminder changes to waiting clients without waiting for their next refresh"""
+    coalescer.forget("statusboard")
+    if shared_frames is not None:
+        await shared_frames.invalidate()
+    notifier.refresh_now()
+
+async def warm_up():
+    """Render and pack a frame, loading fonts and starting render workers, then report ready"""
+    global ready
+    started = time.perf_counter()
+    try:
+        img = await render_statusboard()
+        await artifacts.get(img, "packed")
+        logger.info(f"Warm-up render took {(time.perf_counter() - started) * 1000:.0f}ms")
+    except Exception as e:
+        logger.error(f"Warm-up render failed: {e}")
+    ready = True
+
+async def startup():
+    global export_task, warmup_task, ready
+    started = time.perf_counter()
+    init()
+    await image_generator.startup()
+    if exporter is not None:
+        export_task = asyncio.ensure_future(exporter.run())
+    logger.info(f"Imported app in {IMPORT_SECONDS * 1000:.0f}ms, started in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    if config.getboolean("render", "warmup", fallback=False):
+        warmup_task = asyncio.ensure_future(warm_up())
+    else:
+        ready = True
+
+async def shutdown():
+    for task in (warmup_task, export_task):
+        if task is not None:
+            task.cancel()
+    if history is not None:
+        history.flush()
+    if shared_frames is not None:
+        await shared_frames.close()
+    await image_generator.shutdown()
 
 @app.get("/")
 async def index():
-    logger.info('Health check endpoint accessed')
     return {"status": "healthy"}
 
-@app.post("/reminders", dependencies=[Depends(verify_token)])
-async def create_reminder(reminder_data: Dict[str, Any]):
-    logger.info('Creating a new reminder')
-    required = ['id', 'message', 'time', 'list', 'location', 'completed']
-    logger.info(f'Received data: {reminder_data}')
-    if not all(key in reminder_data for key in required):
-        logger.warning('Invalid data for creating reminder')
-        raise HTTPException(status_code=400, detail="Invalid data")
+@app.get("/ready")
+async def readiness():
+    """Healthy once startup, and the warm-up render if enabled, have finished"""
+    if not ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready"}
+
+REMINDER_FIELDS = ['id', 'message', 'time', 'list', 'location', 'completed']
 
-    reminder = Reminder(
+def parse_reminder(reminder_data: Dict[str, Any]) -> Optional[Reminder]:
+    """Build a Reminder from request data, or None if the data is invalid"""
+    if not isinstance(reminder_data, dict) or not all(key in reminder_data for key in REMINDER_FIELDS):
+        return None
+    try:
+        time = datetime.fromisoformat(reminder_data['time']) if reminder_data['time'] != '' else None
+    except (TypeError, ValueError):
+        return None
+    return Reminder(
         id=reminder_data['id'],
         message=reminder_data['message'],
-        time=datetime.fromisoformat(reminder_data['time']) if reminder_data['time'] != '' else None,
+        time=time,
         list=reminder_data['list'],
         location=reminder_data['location'],
         completed=reminder_data['completed']
     )
+
+@app.post("/reminders", dependencies=[Depends(verify_token)])
+async def create_reminder(reminder_data: Dict[str, Any]):
+    logger.info('Creating a new reminder')
+    logger.debug('Received data: %s', reminder_data)
+    reminder = parse_reminder(reminder_data)
+    if reminder is None:
+        logger.warning('Invalid data for creating reminder')
+        raise HTTPException(status_code=400, detail="Invalid data")
+
     repo.save_reminder(reminder)
     logger.info('Reminder created successfully')
     return {"message": "Reminder created successfully"}
 
+@app.post("/reminders/sync", dependencies=[Depends(verify_token)])
+async def sync_reminders(reminders_data: List[Dict[str, Any]]):
+    """Replace the stored reminders with the full set sent by the client"""
+    reminders = [parse_reminder(reminder_data) for reminder_data in reminders_data]
+    if any(reminder is None for reminder in reminders):
+        logger.warning('Invalid data for syncing reminders')
+        raise HTTPException(status_code=400, detail="Invalid data")
+    if len({reminder.id for reminder in reminders}) != len(reminders):
+        logger.warning('Duplicate reminder IDs in sync request')
+        raise HTTPException(status_code=400, detail="Duplicate reminder IDs")
+
+    logger.info(f'Syncing {len(reminders)} reminders')
+    counts = await asyncio.to_thread(repo.sync_reminders, reminders)
+    return counts
+
 @app.get("/reminders/{reminder_id}", dependencies=[Depends(verify_token)])
 async def get_reminder(reminder_id: str):
     logger.info(f'Fetching reminder with ID: {reminder_id}')
@@ -97,57 +354,224 @@ async def get_reminder(reminder_id: str):
     return asdict(reminder)
 
 @app.get("/reminders", dependencies=[Depends(verify_token)])
-async def get_all_reminders():
+async def get_all_reminders(list_name: Optional[str] = Query(None, alias="list"), completed: Optional[bool] = None,
+                            start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            limit: Optional[int] = Query(None, ge=1), cursor: Optional[str] = None):
     logger.info('Fetching all reminders')
-    reminders = repo.get_all_reminders()
-    reminders_list = [
-        asdict(reminder)
-        for reminder in reminders
-    ]
-    return reminders_list
+    try:
+        reminders, next_cursor = await asyncio.to_thread(
+            repo.query_reminders, list_name, completed, start, end, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Reminders are stored as JSON already, so the list is assembled without re-encoding them
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content="[" + ",".join(reminders) + "]", media_type="application/json", headers=headers)
 
 @app.get("/statusboard")
-async def statusboard():
+async def statusboard(request: Request, format: str = "bmp"):
     logger.info('Generating statusboard image')
+    if format not in ("bmp", "png"):
+        raise HTTPException(status_code=400, detail="Unsupported format")
 
-    combined_img = await image_generator.get_statusboard_image()
+    img = await render_statusboard()
+    return await frame_response(request, img, format, frame_headers(img))
 
-    # Run image conversion in a thread
-    img_io = BytesIO()
-    await asyncio.to_thread(lambda: combined_img.save(img_io, 'BMP'))
-    img_io.seek(0)
+async def packed_response(request: Request, img, stream: bool = False, device: Optional[str] = None) -> Response:
+    """Serve a frame packed for the device, or in the default 1bpp layout"""
+    headers = frame_headers(img)
+    headers["Content-Disposition"] = "attachment; filename=statusboard.bin"
 
-    # Return image as response
-    return StreamingResponse(img_io, media_type="image/bmp")
+    # Stream row bands unless this frame has already been packed
+    if stream and device is None and artifacts.cached(img, "packed") is None:
+        headers["Content-Length"] = str(ImageEncoder.packed_size(img.width, img.height))
+        rows_per_band = config.getint("render", "stream_rows", fallback=16)
+        return StreamingResponse(stream_packed(img, rows_per_band),
+                                 media_type="application/octet-stream", headers=headers)
+
+    if history is not None:
+        await record_frame(img, await artifacts.get(img, "packed"))
+
+    # Devices with their own panel format get bytes already in their framebuffer layout
+    fmt = "packed" if device is None else f"packed:{device}"
+    return await frame_response(request, img, fmt, headers)
+
+def check_device(device: Optional[str]):
+    if device is not None and device not in panel_formats:
+        raise HTTPException(status_code=404, detail="Unknown device")
 
 @app.get("/statusboard_bytes", dependencies=[Depends(verify_token)])
-async def statusboard_bytes():
+async def statusboard_bytes(request: Request, stream: bool = False, device: Optional[str] = None):
     logger.info('Generating statusboard image bytes')
+    check_device(device)
+
+    img = await render_statusboard()
+    return await packed_response(request, img, stream, device)
 
-    combined_img = await image_generator.get_statusboard_image()
+@app.get("/statusboard_bytes/wait", dependencies=[Depends(verify_token)])
+async def statusboard_bytes_wait(request: Request, since: Optional[str] = None, timeout: Optional[float] = None,
+                                 stream: bool = False, device: Optional[str] = None):
+    """
+    Long-poll for a new frame: returns as soon as the frame version differs
+    from `since`, or 304 Not Modified once the timeout passes without a change.
+    """
+    check_device(device)
+    max_timeout = config.getfloat("push", "long_poll_timeout", fallback=55.0)
+    timeout = min(timeout if timeout is not None else max_timeout, max_timeout)
 
-    # Run byte packing in a thread
-    byte_array = await asyncio.to_thread(ImageEncoder.to_packed_bytes, combined_img)
-    byte_io = BytesIO(byte_array)
+    if not await notifier.wait_for_change(since, timeout):
+        return Response(status_code=304, headers={"X-Frame-Version": notifier.version or ""})
 
-    # Create a response with the byte array
-    headers = {"Content-Disposition": "attachment; filename=statusboard.bin"}
-    return StreamingResponse(byte_io, media_type="application/octet-stream", headers=headers)
+    img = await render_statusboard()
+    return await packed_response(request, img, stream, device)
+
+@app.get("/events", dependencies=[Depends(verify_token)])
+async def frame_events():
+    """Server-Sent Events stream announcing each new frame version"""
+    keepalive = config.getfloat("push", "keepalive", fallback=15.0)
+
+    async def events():
+        async for version in notifier.subscribe(keepalive):
+            if version is None:
+                yield ": keepalive\n\n"
+            else:
+                data = json.dumps({"version": version, "changed_at": notifier.changed_at})
+                yield f"event: frame\ndata: {data}\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
 
 @app.get('/test_image', dependencies=[Depends(verify_token)])
-async def test_image_route():
+async def test_image_route(request: Request):
     logger.info('Generating test image with all icons and battery gauges')
 
-    # Generate the test image
-    img = await image_generator.get_test_image()
+    # Generate the test image, sharing it with any concurrent requests
+    img = await coalescer.do("test_image", image_generator.get_test_image)
+    return await frame_response(request, img, "bmp")
+
+@app.get('/history', dependencies=[Depends(verify_token)])
+async def frame_history():
+    """List the frames stored in the frame history, oldest first"""
+    if history is None:
+        raise HTTPException(status_code=404, detail="Frame history is disabled")
+    return [
+        {"seq": record.seq, "timestamp": datetime.fromtimestamp(record.timestamp).isoformat(), "hash": record.hash}
+        for record in history.records()
+    ]
+
+@app.get('/history/frame', dependencies=[Depends(verify_token)])
+async def history_frame(seq: Optional[int] = None, at: Optional[str] = None):
+    """Serve a past packed frame by sequence number, or the one shown at a time (ISO 8601 or unix seconds)"""
+    if history is None:
+        raise HTTPException(status_code=404, detail="Frame history is disabled")
+
+    if seq is not None:
+        record = history.get(seq)
+    elif at is not None:
+        try:
+            timestamp = float(at)
+        except ValueError:
+            try:
+                timestamp = datetime.fromisoformat(at).timestamp()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid time")
+        record = history.at(timestamp)
+    else:
+        record = history.latest()
+
+    if record is None:
+        raise HTTPException(status_code=404, detail="Frame not found")
+
+    headers = {
+        "Content-Disposition": f"attachment; filename=statusboard-{record.seq}.bin",
+        "ETag": f'"{record.hash}"',
+        "X-Frame-Timestamp": datetime.fromtimestamp(record.timestamp).isoformat()
+    }
+    return Response(history.frame(record), media_type="application/octet-stream", headers=headers)
+
+@app.get('/debug/coalescing', dependencies=[Depends(verify_token)])
+async def coalescing_stats():
+    """How many requests shared a render or encode with another request"""
+    return coalescer.stats()
+
+@app.get('/debug/traces', dependencies=[Depends(verify_token)])
+async def slow_traces():
+    """Recent slow requests, each as a waterfall of its spans"""
+    return tracer.slow_traces()
+
+@app.get('/debug/profile', dependencies=[Depends(verify_token)])
+async def profile(format: str = "stats", stubs: bool = False, fixture: Optional[str] = None,
+                  sort: str = "cumulative", limit: int = Query(40, ge=1)):
+    """
+    Profile one full render and encode. format=stats gives a cProfile
+    summary and format=collapsed gives sampled stacks for flamegraphs;
+    stubs=true replaces upstream services with canned data, and fixture=NAME
+    with the responses recorded in that fixture.
+    """
+    # Only needed here, so not loaded with the app
+    import profiling
+    from fixtures import Fixture, fixture_path
+
+    recorded = None
+    if fixture is not None:
+        # Only fixtures in the fixtures directory, never arbitrary paths
+        if "/" in fixture or "\\" in fixture or fixture.startswith("."):
+            raise HTTPException(status_code=400, detail="Invalid fixture name")
+        try:
+            recorded = await asyncio.to_thread(Fixture.load, fixture_path(config, fixture))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Fixture not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # Its own thread and event loop, so the profile covers only this frame
+        result = await asyncio.to_thread(profiling.profile_frame, format, stubs, sort, limit, panel_formats,
+                                         recorded)
+    except profiling.ProfilerBusyError:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(result, media_type="text/plain")
+
+@app.get('/debug/memory', dependencies=[Depends(verify_token)])
+async def memory_stats(limit: int = Query(20, ge=1), group: str = "lineno", compare: Optional[str] = None):
+    """
+    Process memory, cache sizes, memory retained by recent renders, and with
+    allocation tracing on, the top allocation sites. compare=previous or
+    compare=baseline lists the sites that grew most since the previous
+    render or since tracing started.
+    """
+    tracker = image_generator.memory_tracker
+    try:
+        top = await asyncio.to_thread(tracker.top_allocations, limit, group, compare)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "memory": {kind: value for (kind,), value in tracker.gauges().items()},
+        "tracing": tracker.tracing,
+        "caches": metrics.cache_sizes(),
+        "renders": tracker.renders(),
+        "top": top,
+    }
+
+@app.post('/debug/memory/trace', dependencies=[Depends(verify_token)])
+async def start_memory_trace(frames: int = Query(10, ge=1)):
+    """Start tracing allocations, keeping `frames` stack frames for each"""
+    await asyncio.to_thread(image_generator.memory_tracker.start, frames)
+    return {"tracing": True}
+
+@app.delete('/debug/memory/trace', dependencies=[Depends(verify_token)])
+async def stop_memory_trace():
+    """Stop tracing allocations"""
+    image_generator.memory_tracker.stop()
+    return {"tracing": False}
 
-    # Convert image to byte stream in a thread
-    img_io = BytesIO()
-    await asyncio.to_thread(lambda: img.save(img_io, 'BMP'))
-    img_io.seek(0)
+@app.get('/metrics', dependencies=[Depends(verify_token)])
+async def metrics_endpoint():
+    """Latency, error and cache metrics in the Prometheus text format"""
+    return Response(metrics.expose(), media_type=metrics.CONTENT_TYPE)
 
-    # Return image as response
-    return StreamingResponse(img_io, media_type="image/bmp")
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 if __name__ == '__main__':
     import uvicorn
@@ -0,0 +1,120 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from PIL import Image
+from drawing import ImageEncoder, PanelFormat
+import metrics
+import tracing
+
+MEDIA_TYPES = {
+    'bmp': 'image/bmp',
+    'png': 'image/png',
+    'packed': 'application/octet-stream',
+}
+
+def frame_hash(image: Image.Image) -> str:
+    """Content hash of a frame, computed once and kept in the image's info"""
+    if 'frame_hash' not in image.info:
+        image.info['frame_hash'] = hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest()
+    return image.info['frame_hash']
+
+def _save(image: Image.Image, fmt: str) -> bytes:
+    img_io = BytesIO()
+    image.save(img_io, fmt)
+    return img_io.getvalue()
+
+class ArtifactCache:
+    """
+    Encoded outputs of recent frames, keyed by frame hash and format. Each
+    format is produced at most once per frame, however many requests ask
+    for it at the same time. Formats ending in .gz are gzip-compressed
+    variants of the base format, and packed:<device> formats are encoded
+    with that device's panel format.
+    """
+
+    def __init__(self, max_frames: int = 4, panel_formats: Optional[Dict[str, PanelFormat]] = None):
+        self.max_frames = max_frames
+        self.panel_formats = panel_formats if panel_formats is not None else {}
+        self._frames: 'OrderedDict[str, Dict[str, bytes]]' = OrderedDict()
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, image: Image.Image, fmt: str) -> bytes:
+        """Encode a frame in a base format right away, without caching it"""
+        if fmt == 'bmp':
+            return _save(image, 'BMP')
+        if fmt == 'png':
+            return _save(image, 'PNG')
+        if fmt == 'packed':
+            return bytes(ImageEncoder.to_packed_bytes(image))
+        if fmt.startswith('packed:') and fmt[len('packed:'):] in self.panel_formats:
+            return ImageEncoder.encode(image, self.panel_formats[fmt[len('packed:'):]])
+        raise ValueError(f"Unknown artifact format: {fmt}")
+
+    async def _produce(self, image: Image.Image, fmt: str) -> bytes:
+        if fmt.endswith('.gz'):
+            data = await self.get(image, fmt[:-len('.gz')])
+            with metrics.Timer(metrics.ENCODE_SECONDS, metrics.ENCODE_ERRORS, f'encode {fmt}', format=fmt):
+                # mtime=0 keeps the output identical for identical frames
+                return await asyncio.to_thread(gzip.compress, data, 9, mtime=0)
+        with metrics.Timer(metrics.ENCODE_SECONDS, metrics.ENCODE_ERRORS, f'encode {fmt}', format=fmt):
+            # Encode in a thread to keep the event loop free
+            return await asyncio.to_thread(self.encode, image, fmt)
+
+    def cached(self, image: Image.Image, fmt: str) -> Optional[bytes]:
+        """Return a frame's encoded output if it has already been produced"""
+        return self._frames.get(frame_hash(image), {}).get(fmt)
+
+    async def get(self, image: Image.Image, fmt: str) -> bytes:
+        """Return a frame encoded in the given format, encoding it if needed"""
+        key = frame_hash(image)
+        artifacts = self._frames.get(key)
+        if artifacts is not None and fmt in artifacts:
+            self.hits += 1
+            self._frames.move_to_end(key)
+            return artifacts[fmt]
+
+        task = self._pending.get((key, fmt))
+        if task is None:
+            self.misses += 1
+            logging.debug("Encoding frame %s as %s", key, fmt)
+            task = tracing.detached(self._produce(image, fmt))
+            self._pending[(key, fmt)] = task
+            task.add_done_callback(lambda t: self._store(key, fmt, t))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def put(self, image: Image.Image, fmt: str, data: bytes):
+        """Keep output encoded elsewhere, such as a frame packed while streaming it"""
+        self._add(frame_hash(image), fmt, data)
+
+    def _store(self, key: str, fmt: str, task: asyncio.Task):
+        del self._pending[(key, fmt)]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._add(key, fmt, task.result())
+
+    def _add(self, key: str, fmt: str, data: bytes):
+        self._frames.setdefault(key, {})[fmt] = data
+        self._frames.move_to_end(key)
+        while len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+
+    @staticmethod
+    def media_type(fmt: str) -> str:
+        base = fmt[:-len('.gz')] if fmt.endswith('.gz') else fmt
+        return MEDIA_TYPES[base.split(':')[0]]
+
+    def __len__(self) -> int:
+        """Number of frames with cached artifacts"""
+        return len(self._frames)
+
+    def size(self) -> int:
+        """Total bytes held by cached artifacts"""
+        return sum(len(data) for artifacts in self._frames.values() for data in artifacts.values())
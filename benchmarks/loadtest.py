@@ -0,0 +1,129 @@
+"""
+Simulate a fleet of devices polling /statusboard_bytes and report
+throughput and latency percentiles.
+
+Each device wakes at a random point in the first interval, then polls
+every interval with some jitter on a fresh connection, as an ESP32
+waking from deep sleep would. With --follow-hint devices sleep for the
+X-Refresh-After the app suggests instead. Run from the repository root
+against a running app, ideally backed by benchmarks/upstreams.py:
+
+    python benchmarks/loadtest.py --devices 50 --interval 30 --duration 300
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+def percentile(values: List[float], p: float) -> float:
+    """The p-th percentile of `values`, interpolating between ranks"""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+class LoadResults:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.bytes = 0
+
+    def report(self, elapsed: float) -> str:
+        requests = sum(self.statuses.values()) + sum(self.errors.values())
+        lines = [
+            f'{requests} requests in {elapsed:.1f}s, {requests / elapsed:.2f} req/s, '
+            f'{self.bytes / elapsed / 1024:.1f} KiB/s',
+            'statuses: ' + (', '.join(f'{status}: {count}' for status, count in sorted(self.statuses.items())) or 'none'),
+        ]
+        if self.errors:
+            lines.append('errors: ' + ', '.join(f'{error}: {count}' for error, count in self.errors.most_common()))
+        if self.latencies:
+            lines.append('latency ms: ' + '  '.join(
+                f'{label} {value * 1000:.1f}' for label, value in (
+                    ('min', min(self.latencies)),
+                    ('mean', statistics.mean(self.latencies)),
+                    ('p50', percentile(self.latencies, 50)),
+                    ('p95', percentile(self.latencies, 95)),
+                    ('p99', percentile(self.latencies, 99)),
+                    ('max', max(self.latencies)))))
+        return '\n'.join(lines)
+
+async def poll(url: str, headers: Dict[str, str], timeout: aiohttp.ClientTimeout,
+               results: LoadResults) -> Optional[float]:
+    """Fetch one frame on a new connection; returns the refresh hint, if any"""
+    started = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True),
+                                         timeout=timeout) as session:
+            async with session.get(url, headers=headers) as response:
+                body = await response.read()
+                results.latencies.append(time.perf_counter() - started)
+                results.statuses[response.status] += 1
+                results.bytes += len(body)
+                hint = response.headers.get('X-Refresh-After')
+                return float(hint) if hint else None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        results.errors[type(e).__name__] += 1
+        return None
+
+async def device(url: str, headers: Dict[str, str], interval: float, jitter: float, follow_hint: bool,
+                 deadline: float, timeout: aiohttp.ClientTimeout, results: LoadResults):
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.monotonic() < deadline:
+        hint = await poll(url, headers, timeout, results)
+        wait = hint if follow_hint and hint is not None else interval
+        await asyncio.sleep(max(wait + random.uniform(-jitter, jitter), 0))
+
+async def run(args) -> LoadResults:
+    url = f"{args.url.rstrip('/')}{args.path}"
+    headers = {'Authorization': f'Bearer {args.token}'}
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    results = LoadResults()
+    deadline = time.monotonic() + args.duration
+
+    devices = [
+        asyncio.ensure_future(device(url, headers, args.interval, args.jitter, args.follow_hint,
+                                     deadline, timeout, results))
+        for _ in range(args.devices)
+    ]
+    try:
+        # Devices stop polling at the deadline; a request still in flight may finish after it
+        await asyncio.wait_for(asyncio.gather(*devices), args.duration + args.timeout + args.interval)
+    except asyncio.TimeoutError:
+        pass
+    return results
+
+def default_token() -> str:
+    from localconfig import get_config
+    return get_config().get('security', 'auth_token', fallback='your-secret-token')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Base URL of the app')
+    parser.add_argument('--path', default='/statusboard_bytes', help='Path each device polls')
+    parser.add_argument('--token', help='Bearer token (default: [security] auth_token)')
+    parser.add_argument('--devices', type=int, default=30)
+    parser.add_argument('--interval', type=float, default=60, help='Seconds between polls (default: 60)')
+    parser.add_argument('--jitter', type=float, default=5, help='Polls drift by up to this many seconds')
+    parser.add_argument('--follow-hint', action='store_true', help='Sleep for X-Refresh-After instead of --interval')
+    parser.add_argument('--duration', type=float, default=300, help='Seconds to run (default: 300)')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    args = parser.parse_args()
+    if args.token is None:
+        args.token = default_token()
+
+    print(f'{args.devices} devices polling {args.url}{args.path} every {args.interval:g}s for {args.duration:g}s')
+    started = time.monotonic()
+    results = asyncio.run(run(args))
+    print(results.report(time.monotonic() - started))
@@ -0,0 +1,76 @@
+"""
+Compare time to first byte of the packed frame endpoint when the whole
+buffer is packed up front against streaming it in row bands.
+
+Rendering is replaced with a fixed noise frame so only packing and
+response handling are timed. Run from the repository root:
+
+    python benchmarks/packed_stream.py --runs 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+import app
+import image_generator
+
+async def time_request(path: str) -> tuple:
+    """Return (time to first body byte, time to last body byte) in seconds"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path.split('?')[0],
+        'raw_path': path.split('?')[0].encode(), 'root_path': '',
+        'query_string': path.partition('?')[2].encode(),
+        'headers': [(b'authorization', f'Bearer {app.AUTH_TOKEN}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 5000),
+    }
+    first_byte = None
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Never disconnect; the server cancels this wait once it is done
+            await asyncio.Event().wait()
+        requested = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal first_byte
+        if message['type'] == 'http.response.body' and message.get('body') and first_byte is None:
+            first_byte = time.perf_counter()
+
+    started = time.perf_counter()
+    await app.app(scope, receive, send)
+    return first_byte - started, time.perf_counter() - started
+
+async def run(runs: int):
+    # A new frame for every request, so nothing is served from the artifact cache
+    frames = [Image.effect_noise((800, 480), 64).convert('1') for _ in range(runs * 2)]
+
+    async def next_frame():
+        return frames.pop()
+
+    # Requests are sent straight to the ASGI app, without its startup
+    app.init()
+    image_generator.get_statusboard_image = next_frame
+    app.coalescer.grace = 0
+    app.history = None
+
+    for label, path in (('full buffer', '/statusboard_bytes'), ('streamed', '/statusboard_bytes?stream=true')):
+        ttfb, total = zip(*[await time_request(path) for _ in range(runs)])
+        print(f'{label:12s} ttfb median {statistics.median(ttfb) * 1000:7.3f}ms '
+              f'p95 {sorted(ttfb)[int(runs * 0.95) - 1] * 1000:7.3f}ms  '
+              f'total median {statistics.median(total) * 1000:7.3f}ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs))
@@ -0,0 +1,238 @@
+"""
+Benchmark encoding, panel and component rendering, whole-frame renders
+and Redis repository operations, with stub data sources in place of the
+upstream services.
+
+Results can be saved as a JSON baseline and later runs compared with it.
+Repository benchmarks run against fakeredis (pip install 'fakeredis[lua]')
+and are skipped when it is not installed. Run from the repository root:
+
+    python benchmarks/suite.py run --save benchmarks/baseline.json
+    python benchmarks/suite.py run --baseline benchmarks/baseline.json --threshold 10
+    python benchmarks/suite.py compare benchmarks/baseline.json current.json
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+import image_generator
+from drawing import ChargingMeter, ImageEncoder, LabelValue, RenderExecutor
+from reminder import Reminder
+from repository import PRUNE_INDEX_SCRIPT, Repository
+
+# Each sample runs a benchmark enough times to take at least this long
+MIN_SAMPLE_SECONDS = 0.05
+
+def sample_frame() -> Image.Image:
+    """A dashboard-like frame: mostly white, with some text-like noise"""
+    image = Image.new('1', (800, 480), 1)
+    noise = Image.effect_noise((800, 120), 96).convert('1')
+    for y in (20, 180, 340):
+        image.paste(noise, (0, y))
+    return image
+
+def time_benchmark(func: Callable[[], None], samples: int) -> Dict[str, float]:
+    """Per-call times in seconds, over `samples` samples of calibrated length"""
+    func()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_SAMPLE_SECONDS:
+            break
+        number *= 2
+
+    times = [elapsed / number]
+    for _ in range(samples - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - started) / number)
+    return {
+        'median': statistics.median(times),
+        'min': min(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'calls': number * samples,
+    }
+
+def encoder_benchmarks() -> Dict[str, Callable[[], None]]:
+    frame = sample_frame()
+    packed = ImageEncoder.to_packed_bytes(frame)
+    return {
+        'encoder.to_packed_bytes': lambda: ImageEncoder.to_packed_bytes(frame),
+        'encoder.from_packed_bytes': lambda: ImageEncoder.from_packed_bytes(packed, 800, 480),
+    }
+
+def component_benchmarks() -> Dict[str, Callable[[], None]]:
+    def charging_meter():
+        meter = ChargingMeter(width=380, height=30)
+        meter.update(current_percentage=64, target_percentage=80, charging=True, plugged_in=True,
+                     label_text='iX Battery:')
+        meter.render()
+
+    def label_value():
+        label = LabelValue(width=380, height=25)
+        label.update(label='Indoor', value='22.1°C  39%')
+        label.render()
+
+    return {
+        'component.charging_meter': charging_meter,
+        'component.label_value': label_value,
+    }
+
+def panel_benchmarks(loop: asyncio.AbstractEventLoop) -> Dict[str, Callable[[], None]]:
+    # Fetch stub data once, then time only drawing
+    dashboard = image_generator.create_dashboard(stubs=True)
+    benchmarks = {}
+    for panel, _, _ in dashboard.panels:
+        loop.run_until_complete(panel.fetch_data())
+        benchmarks[f'panel.{panel.name}'] = panel.render
+    return benchmarks
+
+def dashboard_benchmarks(loop: asyncio.AbstractEventLoop) -> Dict[str, Callable[[], None]]:
+    executor = RenderExecutor('inline')
+
+    def render():
+        dashboard = image_generator.create_dashboard(stubs=True)
+        dashboard.executor = executor
+        loop.run_until_complete(dashboard.render())
+
+    return {'dashboard.render': render}
+
+def stub_reminders(count: int) -> List[Reminder]:
+    start = datetime.now().replace(microsecond=0)
+    return [
+        Reminder(f'bench-{i}', f'Reminder {i}', start + timedelta(hours=i) if i % 4 else None,
+                 'Home' if i % 2 else 'Personal', '', i % 5 == 0)
+        for i in range(count)
+    ]
+
+def repository_benchmarks() -> Dict[str, Callable[[], None]]:
+    try:
+        import fakeredis
+    except ImportError:
+        print('fakeredis is not installed, skipping repository benchmarks', file=sys.stderr)
+        return {}
+
+    repository = Repository(image_generator.config)
+    repository.client = fakeredis.FakeStrictRedis(decode_responses=True)
+    repository._prune_index = repository.client.register_script(PRUNE_INDEX_SCRIPT)
+    reminders = stub_reminders(200)
+    repository.sync_reminders(reminders)
+
+    return {
+        'repository.save_reminder': lambda: repository.save_reminder(reminders[0]),
+        'repository.get_reminder': lambda: repository.get_reminder(reminders[0].id),
+        'repository.get_all_reminders': repository.get_all_reminders,
+        'repository.sync_reminders_unchanged': lambda: repository.sync_reminders(reminders),
+        'repository.query_reminders': lambda: repository.query_reminders(list_name='Home', completed=False,
+                                                                           limit=50),
+    }
+
+def matches(name: str, patterns: List[str]) -> bool:
+    return not patterns or any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+def run(patterns: List[str], samples: int) -> Dict[str, Dict[str, float]]:
+    loop = asyncio.new_event_loop()
+    benchmarks = {}
+    for group in (encoder_benchmarks(), component_benchmarks(), panel_benchmarks(loop),
+                  dashboard_benchmarks(loop), repository_benchmarks()):
+        benchmarks.update(group)
+
+    results = {}
+    try:
+        for name, func in benchmarks.items():
+            if not matches(name, patterns):
+                continue
+            results[name] = time_benchmark(func, samples)
+            print(f"{name:40s} median {results[name]['median'] * 1000:9.3f}ms  "
+                  f"min {results[name]['min'] * 1000:9.3f}ms  stdev {results[name]['stdev'] * 1000:8.3f}ms")
+    finally:
+        loop.close()
+    return results
+
+def compare(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Print each benchmark's change in median time; returns those slower by more than `threshold` percent"""
+    regressions = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current or name not in baseline:
+            print(f"{name:40s} {'only in baseline' if name in baseline else 'new'}")
+            continue
+        before, after = baseline[name]['median'], current[name]['median']
+        change = (after - before) / before * 100
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:40s} {before * 1000:9.3f}ms -> {after * 1000:9.3f}ms  {change:+6.1f}%{flag}")
+    return regressions
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)['results']
+
+def save_results(path: str, results: Dict[str, Dict[str, float]]):
+    data = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f'Saved results to {path}')
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('patterns', nargs='*', help='Only run benchmarks matching these globs, e.g. "panel.*"')
+    run_parser.add_argument('--samples', type=int, default=7)
+    run_parser.add_argument('--save', metavar='FILE', help='Write the results to FILE as JSON')
+    run_parser.add_argument('--baseline', metavar='FILE', help='Compare the results with a saved baseline')
+    run_parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percent slowdown in median time that counts as a regression (default: 10)')
+
+    compare_parser = commands.add_parser('compare', help='Compare two saved result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        # Per-panel render logging would swamp the results
+        logging.disable(logging.INFO)
+        current = run(args.patterns, args.samples)
+        if args.save:
+            save_results(args.save, current)
+        if not args.baseline:
+            return 0
+        baseline = {name: result for name, result in load_results(args.baseline).items()
+                    if matches(name, args.patterns)}
+    else:
+        baseline, current = load_results(args.baseline), load_results(args.current)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Local stand-ins for the upstream services: Home Assistant /api/states,
+OpenWeather, tar1090 aircraft.json and the adsb.lol route API, each with
+configurable latency, jitter and error rate, and any number of aircraft.
+
+Point the app at it with the config snippet it prints, then load it with
+benchmarks/loadtest.py. Run from the repository root:
+
+    python benchmarks/upstreams.py --aircraft 500 --latency 80 --jitter 40 --error-rate 0.02
+    python benchmarks/upstreams.py --set route_api:latency=400,error_rate=0.1
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from stubs import STUB_STATES, STUB_WEATHER
+
+SERVICES = ('home_assistant', 'openweather', 'tar1090', 'route_api')
+
+AIRLINES = ('ACA', 'WJA', 'POE', 'TSC', 'UAL', 'DAL', 'AAL', 'JZA', 'FLE', 'BAW')
+TYPES = ('B38M', 'B737', 'A320', 'A321', 'DH8D', 'E75L', 'B789', 'A333', 'CRJ9', 'C172')
+CITIES = ('Toronto', 'Vancouver', 'Calgary', 'Montreal', 'Ottawa', 'Halifax', 'Winnipeg',
+          'New York', 'Chicago', 'London', 'Boston', 'Orlando', 'Edmonton', 'Quebec City')
+
+class Behaviour:
+    """How one simulated service responds"""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    async def respond(self):
+        """Wait out the simulated latency, then raise if this request should fail"""
+        delay = max(self.latency + random.uniform(-self.jitter, self.jitter), 0)
+        await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable(text='Simulated upstream error')
+
+def generate_aircraft(count: int, lat: float, lon: float) -> List[Dict]:
+    """`count` aircraft scattered within about 50 nautical miles of lat, lon"""
+    aircraft = []
+    for i in range(count):
+        r_dst = random.uniform(0.5, 50)
+        bearing = random.uniform(0, 2 * math.pi)
+        aircraft.append({
+            'hex': f'{0xc00000 + i:06x}',
+            'flight': f'{random.choice(AIRLINES)}{random.randint(1, 9999)}'.ljust(8),
+            't': random.choice(TYPES),
+            'alt_baro': random.randrange(1000, 41000, 100),
+            'gs': round(random.uniform(120, 520), 1),
+            'track': round(random.uniform(0, 360), 1),
+            'lat': lat + r_dst / 60 * math.cos(bearing),
+            'lon': lon + r_dst / 60 * math.sin(bearing) / math.cos(math.radians(lat)),
+            'r_dst': round(r_dst, 1),
+            'r_dir': round(math.degrees(bearing), 1),
+            'messages': random.randint(100, 50000),
+            'seen': round(random.uniform(0, 5), 1),
+            'rssi': round(random.uniform(-30, -3), 1),
+        })
+    return aircraft
+
+def route_for(callsign: str) -> List[Dict[str, str]]:
+    """A stable made-up route for a callsign"""
+    digest = hashlib.blake2b(callsign.encode(), digest_size=2).digest()
+    origin = CITIES[digest[0] % len(CITIES)]
+    destination = CITIES[(digest[0] + 1 + digest[1] % (len(CITIES) - 1)) % len(CITIES)]
+    return [{'location': origin}, {'location': destination}]
+
+def create_app(behaviours: Dict[str, Behaviour], aircraft: int = 50,
+               lat: float = 43.7, lon: float = -79.4) -> web.Application:
+    fleet = generate_aircraft(aircraft, lat, lon)
+    started = time.time()
+
+    async def states(request: web.Request) -> web.Response:
+        await behaviours['home_assistant'].respond()
+        entity_id = request.match_info['entity_id']
+        return web.json_response({
+            'entity_id': entity_id,
+            'state': STUB_STATES.get(entity_id, 'unknown'),
+            'attributes': {'friendly_name': entity_id.split('.')[-1].replace('_', ' ')},
+            'last_updated': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime()),
+        })
+
+    async def weather(request: web.Request) -> web.Response:
+        await behaviours['openweather'].respond()
+        return web.json_response(dict(STUB_WEATHER, dt=int(time.time()), name='Simulated'))
+
+    async def aircraft_json(request: web.Request) -> web.Response:
+        await behaviours['tar1090'].respond()
+        # Drift positions a little so frames change between polls
+        elapsed = time.time() - started
+        for plane in fleet:
+            plane['seen'] = round(random.uniform(0, 5), 1)
+            plane['alt_baro'] = max(plane['alt_baro'] + random.choice((-100, 0, 100)), 100)
+        return web.json_response({'now': time.time(), 'messages': int(elapsed * 1000), 'aircraft': fleet})
+
+    async def routeset(request: web.Request) -> web.Response:
+        await behaviours['route_api'].respond()
+        planes = (await request.json()).get('planes', [])
+        return web.json_response([
+            {'callsign': plane['callsign'], '_airports': route_for(plane['callsign'])}
+            for plane in planes
+        ])
+
+    app = web.Application()
+    app.router.add_get('/api/states/{entity_id}', states)
+    app.router.add_get('/data/2.5/weather', weather)
+    app.router.add_get('/data/aircraft.json', aircraft_json)
+    app.router.add_post('/api/0/routeset', routeset)
+    return app
+
+def parse_overrides(overrides: List[str], behaviours: Dict[str, Behaviour]):
+    """Apply --set service:key=value,... options"""
+    for override in overrides:
+        service, _, settings = override.partition(':')
+        if service not in behaviours:
+            raise ValueError(f"Unknown service {service}, expected one of {', '.join(SERVICES)}")
+        for setting in settings.split(','):
+            key, _, value = setting.partition('=')
+            if key not in ('latency', 'jitter', 'error_rate'):
+                raise ValueError(f"Unknown setting {key}, expected latency, jitter or error_rate")
+            # Times are given in milliseconds like the command line options
+            setattr(behaviours[service], key, float(value) / 1000 if key != 'error_rate' else float(value))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=50, help='Mean response time in ms (default: 50)')
+    parser.add_argument('--jitter', type=float, default=20, help='Response times vary by up to this many ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 503')
+    parser.add_argument('--aircraft', type=int, default=50, help='Aircraft in aircraft.json (default: 50)')
+    parser.add_argument('--set', action='append', default=[], metavar='SERVICE:KEY=VALUE,...',
+                        help=f"Override latency, jitter or error_rate for one of {', '.join(SERVICES)}")
+    parser.add_argument('--seed', type=int, help='Seed for repeatable aircraft and errors')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    behaviours = {service: Behaviour(args.latency / 1000, args.jitter / 1000, args.error_rate)
+                  for service in SERVICES}
+    try:
+        parse_overrides(args.set, behaviours)
+    except ValueError as e:
+        parser.error(str(e))
+
+    base = f'http://{args.host}:{args.port}'
+    print('Point config.ini at the simulators with:\n')
+    print(f'[home_assistant]\nurl={base}\n')
+    print(f'[weather]\nurl={base}/data/2.5/weather\n')
+    print(f'[tar1090]\nurl={base}/data/aircraft.json\nroute_url={base}/api/0/routeset\n')
+    web.run_app(create_app(behaviours, args.aircraft), host=args.host, port=args.port)
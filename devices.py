@@ -0,0 +1,25 @@
+import logging
+from typing import Dict
+from drawing.image_encoder import PanelFormat
+
+def load_panel_formats(config) -> Dict[str, PanelFormat]:
+    """
+    Read per-device framebuffer layouts from [device:<name>] config sections.
+    Options are bpp (1, 2 or 4), rotate (0, 90, 180 or 270 clockwise),
+    mirror (horizontal or vertical) and bit_order (msb or lsb).
+    """
+    formats = {}
+    for section in config.sections():
+        if not section.startswith('device:'):
+            continue
+        name = section[len('device:'):]
+        try:
+            formats[name] = PanelFormat(
+                bpp=config.getint(section, 'bpp', fallback=1),
+                rotate=config.getint(section, 'rotate', fallback=0),
+                mirror=config.get(section, 'mirror', fallback=None) or None,
+                bit_order=config.get(section, 'bit_order', fallback='msb'))
+        except ValueError as e:
+            logging.error(f"Invalid panel format for device {name}: {e}")
+    logging.info(f"Loaded panel formats for {len(formats)} devices")
+    return formats
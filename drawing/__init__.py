@@ -5,12 +5,15 @@ from drawing.weather_panel import WeatherPanel
 from drawing.planes_panel import PlanesPanel
 from drawing.sensors_panel import SensorsPanel
 from drawing.dashboard import Dashboard, QuadrantDashboard
-from drawing.image_encoder import ImageEncoder
+from drawing.image_encoder import ImageEncoder, PanelFormat
+from drawing.render_executor import RenderExecutor, RenderTiming
+from drawing.fetch_guard import FetchGuard
 from drawing.base import Panel, DataSource
 from drawing import fonts
 
 __all__ = [
     'LabelValue', 'ChargingMeter', 'RemindersPanel', 'WeatherPanel',
     'PlanesPanel', 'SensorsPanel', 'Dashboard', 'QuadrantDashboard',
-    'ImageEncoder', 'Panel', 'DataSource', 'fonts'
+    'ImageEncoder', 'PanelFormat', 'RenderExecutor', 'RenderTiming', 'FetchGuard',
+    'Panel', 'DataSource', 'fonts'
 ]
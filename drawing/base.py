@@ -3,12 +3,24 @@ from PIL import Image, ImageDraw
 from . import fonts
 import logging
 
+class SourceError(Exception):
+    """Raised when a data source answers with an error instead of data"""
+
 class Panel(ABC):
     """Base class for all dashboard panels"""
 
+    # Identifies the panel's data source in config and logs
+    name = 'panel'
+
+    # Attributes holding service clients or drawing contexts. They are cleared
+    # when a panel is pickled for a render worker process.
+    transient_attributes = ('draw',)
+
     def __init__(self, width: int = 400, height: int = 240):
         self.width = width
-        self.height = heigh
+        self.height = height
+        # When set, the panel is showing data last fetched at this time
+        self.stale_since = None
         self.logger = logging.getLogger(self.__class__.__name__)
 
     @abstractmethod
@@ -16,11 +28,41 @@ class Panel(ABC):
         """Fetch data from external sources"""
         pass
 
+    @abstractmethod
+    def snapshot(self):
+        """Return the fetched data as plain JSON-compatible values"""
+        pass
+
+    @abstractmethod
+    def restore(self, snapshot):
+        """Load data previously returned by snapshot()"""
+        pass
+
     @abstractmethod
     def render(self) -> Image.Image:
         """Render the panel to an image"""
         pass
 
+    def fetcher(self) -> 'Panel':
+        """
+        A shallow copy sharing this panel's services, to fetch into while
+        this panel is being rendered. Pickling would drop the services.
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self.transient_attributes:
+            state[name] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if getattr(self, 'image', None) is not None:
+            self.draw = ImageDraw.Draw(self.image)
+
     def create_error_image(self, message: str) -> Image.Image:
         """Create an error image with the given message"""
         self.logger.info(f'Creating error image with message: {message}')
@@ -105,7 +105,7 @@ class ChargingMeter:
 
     def render(self) -> Image.Image:
         """Render the charging meter and return the image"""
-        logging.info(f'Creating charging meter image for {self.current_percentage}% and {self.target_percentage}%')
+        logging.debug('Creating charging meter image for %d%% and %d%%', self.current_percentage, self.target_percentage)
 
         # Clear the image (in case it's being reused)
         self.draw.rectangle([0, 0, self.width, self.height], fill=1)
@@ -116,7 +116,7 @@ class ChargingMeter:
         self.meter_width = self.width - self.padding * 2 - self.right_padding
 
         if self.label_text:
-            logging.info(f'Adding label: {self.label_text}')
+            logging.debug('Adding label: %s', self.label_text)
             # Add a label
             label_font = fonts.bold(18)
             label_bbox = self.draw.textbbox((self.padding, self.padding), self.label_text, font=label_font)
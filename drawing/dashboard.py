@@ -2,18 +2,27 @@ from PIL import Image, ImageDraw
 from datetime import datetime
 from tzlocal import get_localzone
 import asyncio
+import hashlib
+import time
 from typing import List, Tuple, Optional
 from .base import Panel
+from .render_executor import RenderExecutor, RenderTiming
+from .fetch_guard import FetchGuard
 from . import fonts
 import logging
+import metrics
+import tracing
 
 class Dashboard:
     """Manages the overall dashboard layout and composition"""
 
     def __init__(self, width: int = 800, height: int = 480):
         self.width = width
-        self.height = heigh
+        self.height = height
         self.panels: List[Tuple[Panel, int, int]] = []
+        self.executor: Optional[RenderExecutor] = None
+        self.fetch_guard: Optional[FetchGuard] = None
+        self.render_timings: List[RenderTiming] = []
         self.logger = logging.getLogger(__name__)
 
     def add_panel(self, panel: Panel, x: int, y: int):
@@ -22,33 +31,84 @@ class Dashboard:
 
     async def render(self) -> Image.Image:
         """Render all panels to create the final dashboard"""
-        self.logger.info("Creating dashboard image")
+        with tracing.span('render frame'):
+            return await self._render()
+
+    async def _render(self) -> Image.Image:
+        self.logger.debug("Creating dashboard image")
+        started_at = time.perf_counter()
 
         # Fetch all panel data in parallel
-        await asyncio.gather(*[panel.fetch_data() for panel, _, _ in self.panels])
+        panels = [panel for panel, _, _ in self.panels]
+        if self.fetch_guard is not None:
+            fetch_errors = await self.fetch_guard.fetch_all(panels)
+        else:
+            fetch_errors = await asyncio.gather(
+                *[panel.fetch_data() for panel in panels], return_exceptions=True)
 
         # Create base image
         image = Image.new('1', (self.width, self.height), 1)
 
-        # Render and place each panel
-        for panel, x, y in self.panels:
-            try:
-                panel_img = panel.render()
-                image.paste(panel_img, (x, y))
-            except Exception as e:
-                self.logger.error(f"Error rendering panel {panel.__class__.__name__}: {e}")
-                error_img = panel.create_error_image(f"Error: {str(e)}")
+        # Render the panels that have data concurrently, then place each one
+        async def render_or_raise(panel: Panel, fetch_error: Optional[Exception]):
+            if isinstance(fetch_error, Exception):
+                raise fetch_error
+            return await self._render_panel(panel)
+
+        results = await asyncio.gather(
+            *[render_or_raise(panel, error) for panel, error in zip(panels, fetch_errors)],
+            return_exceptions=True)
+
+        self.render_timings = []
+        panel_versions = {}
+        for (panel, x, y), result in zip(self.panels, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error rendering panel {panel.__class__.__name__}: {result}")
+                metrics.RENDER_ERRORS.inc(panel=panel.__class__.__name__)
+                error_img = panel.create_error_image(f"Error: {str(result)}")
                 image.paste(error_img, (x, y))
+                panel_versions[panel.name] = 'error'
+                continue
+
+            panel_img, timing = result
+            self.render_timings.append(timing)
+            metrics.RENDER_SECONDS.observe(timing.elapsed, panel=timing.panel)
+            metrics.RENDER_QUEUE_SECONDS.observe(timing.queued, panel=timing.panel)
+            panel_versions[panel.name] = hashlib.blake2b(panel_img.tobytes(), digest_size=8).hexdigest()
+            self.logger.debug("Rendered %s in %.1fms after waiting %.1fms",
+                              timing.panel, timing.elapsed * 1000, timing.queued * 1000)
+            image.paste(panel_img, (x, y))
+            if panel.stale_since is not None:
+                self._mark_stale(image, panel, x, y)
 
         # Draw grid lines
         self._draw_grid(image)
 
+        # Version the content before the clock is drawn, so a frame whose
+        # only change is the timestamp counts as unchanged
+        image.info['version'] = hashlib.blake2b(image.tobytes(), digest_size=8).hexdigest()
+        image.info['panel_versions'] = panel_versions
+
         # Add timestamp
         self._add_timestamp(image)
 
+        metrics.FRAME_SECONDS.observe(time.perf_counter() - started_at)
         self.logger.info("Dashboard image created successfully")
         return image
 
+    async def _render_panel(self, panel: Panel) -> Tuple[Image.Image, RenderTiming]:
+        """Render a panel through the executor, or on the event loop if there is none"""
+        with tracing.span(f'render {panel.__class__.__name__}') as span:
+            if self.executor is None:
+                started_at = time.time()
+                panel_img = panel.render()
+                result = panel_img, RenderTiming(panel.__class__.__name__, 0.0, time.time() - started_at)
+            else:
+                result = await self.executor.render(panel)
+            if span is not None:
+                span.attributes['queued_ms'] = round(result[1].queued * 1000, 3)
+            return result
+
     def _draw_grid(self, image: Image.Image):
         """Draw dividing lines between panels"""
         draw = ImageDraw.Draw(image)
@@ -61,6 +121,20 @@ class Dashboard:
         # Horizontal line between top and bottom
         draw.line([(0, quarter_height), (self.width, quarter_height)], fill=0)
 
+    def _mark_stale(self, image: Image.Image, panel: Panel, x: int, y: int):
+        """Tag the top-right corner of a panel that is showing old data"""
+        draw = ImageDraw.Draw(image)
+        font = fonts.regular(11)
+        text = f'Stale since {panel.stale_since.strftime("%I:%M %p")}'
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+
+        right = x + panel.width - 1
+        left = right - text_width - 6
+        draw.rectangle([(left, y), (right, y + text_height + 5)], fill=0)
+        draw.text((left + 3, y + 1), text, font=font, fill=1)
+
     def _add_timestamp(self, image: Image.Image):
         """Add last-updated timestamp to bottom right"""
         draw = ImageDraw.Draw(image)
@@ -94,7 +168,7 @@ class QuadrantDashboard(Dashboard):
             x, y = positions[quadrant]
             # Ensure panel fits in quadran
             panel.width = quarter_width
-            panel.height = quarter_heigh
+            panel.height = quarter_height
             self.add_panel(panel, x, y)
         else:
             raise ValueError(f"Invalid quadrant: {quadrant}")
\ No newline at end of file
@@ -0,0 +1,145 @@
+from datetime import datetime
+from tzlocal import get_localzone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .base import Panel
+import asyncio
+import logging
+import metrics
+import tracing
+
+class FetchTimeoutError(Exception):
+    """Raised when a panel has no data before the render deadline"""
+
+class FetchGuard:
+    """
+    Bounds panel data fetches by a per-source latency budget and an overall
+    render deadline. A source that misses its budget or fails falls back to
+    its last good data, marked stale, while its refresh finishes in the
+    background for the next render. If a snapshot store is set, last good
+    data is also persisted so it survives restarts.
+    """
+
+    def __init__(self, budget: float = 3.0, deadline: float = 5.0,
+                 budgets: Optional[Dict[str, float]] = None, store=None):
+        self.budget = budget
+        self.deadline = deadline
+        self.budgets = budgets or {}
+        self.store = store
+        self.logger = logging.getLogger(__name__)
+
+        # Last good snapshot and when it was taken, by panel name
+        self._last_good: Dict[str, Tuple[Any, datetime]] = {}
+        # Sources whose last good data was loaded from the store and that
+        # have not been fetched live since
+        self._warm: Set[str] = set()
+        # Fetches still running, by panel name
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_config(cls, config, store=None) -> 'FetchGuard':
+        """Create a guard from the [fetch] section of the config"""
+        budgets = {}
+        if config.has_section('fetch'):
+            for option in config.options('fetch'):
+                if option.endswith('_budget'):
+                    budgets[option[:-len('_budget')]] = config.getfloat('fetch', option)
+        return cls(
+            budget=config.getfloat('fetch', 'budget', fallback=3.0),
+            deadline=config.getfloat('fetch', 'deadline', fallback=5.0),
+            budgets=budgets,
+            store=store)
+
+    def budget_for(self, name: str) -> float:
+        if name in self._warm:
+            # Render restored data straight away rather than wait on the network
+            return 0.0
+        return self.budgets.get(name, self.budget)
+
+    def last_good(self, name: str) -> Optional[Any]:
+        """The last good snapshot for a source, if there is one"""
+        return self._last_good.get(name, (None,))[0]
+
+    def load_snapshots(self):
+        """Load persisted last good data so the first render needs no network I/O"""
+        if self.store is None:
+            return
+        try:
+            snapshots = self.store.load_all()
+        except Exception as e:
+            self.logger.error(f"Could not load data snapshots: {e}")
+            return
+        for name, (snapshot, fetched_at) in snapshots.items():
+            if name not in self._last_good:
+                self._last_good[name] = (snapshot, fetched_at)
+                self._warm.add(name)
+        self.logger.info(f"Loaded {len(snapshots)} data snapshots")
+
+    async def fetch_all(self, panels: List[Panel]) -> List[Optional[Exception]]:
+        """
+        Fetch data for all panels, waiting no longer than the render deadline.
+        Returns the error for each panel that has no data to render, or None.
+        """
+        deadline_at = asyncio.get_running_loop().time() + self.deadline
+        return await asyncio.gather(*[self._fetch(panel, deadline_at) for panel in panels])
+
+    async def _fetch(self, panel: Panel, deadline_at: float) -> Optional[Exception]:
+        loop = asyncio.get_running_loop()
+        name = panel.name
+        panel.stale_since = None
+
+        if name in self._refreshing:
+            # A refresh from an earlier render is still running; join it
+            task = self._refreshing[name]
+        else:
+            # Fetched into a copy, so a refresh that outlives its budget can't
+            # change the panel while it renders with stale data
+            task = tracing.detached(self._refresh(panel.fetcher()))
+            self._refreshing[name] = task
+            task.add_done_callback(lambda t: self._refresh_done(name, t))
+
+        # Only give up on the budget when there is something to fall back to
+        timeout = deadline_at - loop.time()
+        if name in self._last_good:
+            timeout = min(timeout, self.budget_for(name))
+
+        try:
+            snapshot = await asyncio.wait_for(asyncio.shield(task), max(timeout, 0))
+            panel.restore(snapshot)
+            return None
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Fetching {name} data missed its {timeout:.1f}s budget")
+            error = FetchTimeoutError(f"Timed out fetching {name} data")
+        except Exception as e:
+            self.logger.error(f"Error fetching {name} data: {e}")
+            error = e
+
+        if name not in self._last_good:
+            return error
+
+        snapshot, fetched_at = self._last_good[name]
+        self.logger.info(f"Using stale {name} data from {fetched_at.isoformat()}")
+        metrics.STALE_FALLBACKS.inc(panel=name)
+        panel.restore(snapshot)
+        panel.stale_since = fetched_at
+        return None
+
+    async def _refresh(self, panel: Panel) -> Any:
+        """Fetch a panel's data and remember it as the last good snapshot"""
+        with metrics.Timer(metrics.FETCH_SECONDS, metrics.FETCH_ERRORS, f'fetch {panel.name}', panel=panel.name):
+            await panel.fetch_data()
+        snapshot = panel.snapshot()
+        fetched_at = datetime.now(get_localzone())
+        self._last_good[panel.name] = (snapshot, fetched_at)
+        self._warm.discard(panel.name)
+
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.save, panel.name, snapshot, fetched_at)
+            except Exception as e:
+                self.logger.error(f"Could not save {panel.name} snapshot: {e}")
+        return snapshot
+
+    def _refresh_done(self, name: str, task: asyncio.Task):
+        self._refreshing.pop(name, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.debug(f"Refresh of {name} data failed: {task.exception()}")
@@ -1,4 +1,6 @@
 from PIL import ImageFont
+from collections import OrderedDict
+import copyreg
 import logging
 import os
 
@@ -7,8 +9,11 @@ LIBERATION_SANS_REGULAR = "LiberationSans-Regular"
 LIBERATION_SANS_BOLD = "LiberationSans-Bold"
 SYMBOLS = "assets/fonts/MaterialSymbolsOutlined.ttf"
 
-# Font cache to avoid reloading the same fonts repeatedly
-_font_cache = {}
+# Most fonts kept loaded at once; each distinct name and size is one entry
+MAX_CACHED_FONTS = 64
+
+# Font cache to avoid reloading the same fonts repeatedly, least recently used first
+_font_cache: 'OrderedDict[str, ImageFont.FreeTypeFont]' = OrderedDict()
 
 def get_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
     """
@@ -26,6 +31,7 @@ def get_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
 
     # Check if font is already in cache
     if cache_key in _font_cache:
+        _font_cache.move_to_end(cache_key)
         return _font_cache[cache_key]
 
     try:
@@ -41,14 +47,33 @@ def get_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
             # Regular fonts can be loaded by name
             font = ImageFont.truetype(font_name, size)
 
-        # Cache the font for future use
-        _font_cache[cache_key] = font
-        return font
-
     except Exception as e:
         logging.error(f"Error loading font {font_name} size {size}: {e}")
-        # Return a default font as fallback
-        return ImageFont.load_default()
+        # Use a default font as fallback, cached too so it isn't rebuilt on every lookup
+        font = ImageFont.load_default()
+
+    # Cache the font for future use
+    font.font_key = (font_name, size)
+    _font_cache[cache_key] = font
+    if len(_font_cache) > MAX_CACHED_FONTS:
+        _font_cache.popitem(last=False)
+    return font
+
+def cached_fonts() -> int:
+    """Number of fonts currently loaded"""
+    return len(_font_cache)
+
+def _reduce_font(font):
+    """
+    Pickle fonts from this module by name and size, so render worker
+    processes look them up in their own cache instead of reloading them.
+    """
+    font_key = getattr(font, 'font_key', None)
+    if font_key is None:
+        return object.__reduce_ex__(font, 2)
+    return get_font, font_key
+
+copyreg.pickle(ImageFont.FreeTypeFont, _reduce_font)
 
 # Convenience functions for common fonts
 def regular(size: int) -> ImageFont.FreeTypeFont:
@@ -1,6 +1,54 @@
 from PIL import Image
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
 import logging
 
+ROTATIONS = {
+    0: None,
+    90: Image.Transpose.ROTATE_270,  # PIL rotates counter-clockwise
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+MIRRORS = {
+    None: None,
+    'horizontal': Image.Transpose.FLIP_LEFT_RIGHT,
+    'vertical': Image.Transpose.FLIP_TOP_BOTTOM,
+}
+
+@dataclass(frozen=True)
+class PanelFormat:
+    """Framebuffer layout expected by a device's e-ink panel"""
+    bpp: int = 1                  # Bits per pixel: 1, 2 or 4
+    rotate: int = 0               # Clockwise rotation in degrees
+    mirror: Optional[str] = None  # 'horizontal', 'vertical' or None
+    bit_order: str = 'msb'        # 'msb' puts the leftmost pixel in the high bits
+
+    def __post_init__(self):
+        if self.bpp not in (1, 2, 4):
+            raise ValueError(f"Unsupported bits per pixel: {self.bpp}")
+        if self.rotate not in ROTATIONS:
+            raise ValueError(f"Unsupported rotation: {self.rotate}")
+        if self.mirror not in MIRRORS:
+            raise ValueError(f"Unsupported mirror: {self.mirror}")
+        if self.bit_order not in ('msb', 'lsb'):
+            raise ValueError(f"Unsupported bit order: {self.bit_order}")
+
+def _reversed_pixels_table(bpp: int) -> bytes:
+    """Byte translation table that reverses the order of the pixels within a byte"""
+    pixels_per_byte = 8 // bpp
+    mask = (1 << bpp) - 1
+    table = bytearray(256)
+    for value in range(256):
+        reversed_value = 0
+        for i in range(pixels_per_byte):
+            pixel = (value >> (i * bpp)) & mask
+            reversed_value |= pixel << ((pixels_per_byte - 1 - i) * bpp)
+        table[value] = reversed_value
+    return bytes(table)
+
+_LSB_TABLES: Dict[int, bytes] = {bpp: _reversed_pixels_table(bpp) for bpp in (1, 2, 4)}
+
 class ImageEncoder:
     """Handles image encoding and format conversion"""
 
@@ -10,40 +58,66 @@ class ImageEncoder:
         Convert image to packed 1-bit-per-pixel byte array.
         Each byte contains 8 pixels, with the leftmost pixel in the MSB.
         """
-        logging.info('Converting image to packed bytes')
+        logging.debug('Converting image to packed bytes')
 
+        # A single band covering the whole image
+        packed_bytes = bytearray().join(ImageEncoder.iter_packed_rows(image, image.height))
+
+        logging.debug('Converted %dx%d image to %d bytes', image.width, image.height, len(packed_bytes))
+        return packed_bytes
+
+    @staticmethod
+    def iter_packed_rows(image: Image.Image, rows_per_band: int = 16) -> Iterator[bytes]:
+        """
+        Yield the packed 1-bit-per-pixel frame in bands of rows, so it can be
+        sent while the rest is still being encoded. The concatenated bands are
+        identical to to_packed_bytes(): white pixels are set bits, the leftmost
+        pixel is the MSB, and each row is padded to a whole byte.
+        """
         # Ensure the image is in '1' mode (1-bit pixels, black and white)
         if image.mode != '1':
             image = image.convert('1')
 
-        # Get image dimensions
         width, height = image.size
+        for top in range(0, height, rows_per_band):
+            # PIL's raw '1' packing already matches the device's byte layout
+            band = image.crop((0, top, width, min(top + rows_per_band, height)))
+            yield band.tobytes()
 
-        # Prepare a byte array
-        packed_bytes = bytearray()
+    @staticmethod
+    def encode(image: Image.Image, panel_format: PanelFormat) -> bytes:
+        """
+        Encode an image straight into a device's framebuffer layout: rotated
+        and mirrored, quantized to 2, 4 or 16 gray levels (0 is black), packed
+        with each row padded to a whole byte, in the device's bit order.
+        """
+        logging.debug('Encoding image as %s', panel_format)
 
-        # Iterate over each row
-        for y in range(height):
-            byte = 0
-            bit_count = 0
-            for x in range(width):
-                # Get the pixel value (0 or 255)
-                pixel = image.getpixel((x, y))
-                # Set the bit if the pixel is white (1 in mode '1')
-                if pixel == 1:
-                    byte |= (1 << (7 - bit_count))
-                bit_count += 1
-                # If we've filled a byte, append it to the array
-                if bit_count == 8:
-                    packed_bytes.append(byte)
-                    byte = 0
-                    bit_count = 0
-            # If there are remaining bits, append the last byte
-            if bit_count > 0:
-                packed_bytes.append(byte)
-
-        logging.info(f'Converted {width}x{height} image to {len(packed_bytes)} bytes')
-        return packed_bytes
+        rotation = ROTATIONS[panel_format.rotate]
+        if rotation is not None:
+            image = image.transpose(rotation)
+        mirror = MIRRORS[panel_format.mirror]
+        if mirror is not None:
+            image = image.transpose(mirror)
+
+        if panel_format.bpp == 1:
+            packed = bytes(ImageEncoder.to_packed_bytes(image))
+        else:
+            # Map 0-255 gray to the nearest of the panel's levels, then let PIL's
+            # palette packer put several pixels in each byte
+            levels = (1 << panel_format.bpp) - 1
+            indexed = image.convert('L').point([(v * levels + 127) // 255 for v in range(256)])
+            indexed = Image.frombuffer('P', indexed.size, indexed.tobytes(), 'raw', 'P', 0, 1)
+            packed = indexed.tobytes('raw', f'P;{panel_format.bpp}')
+
+        if panel_format.bit_order == 'lsb':
+            packed = packed.translate(_LSB_TABLES[panel_format.bpp])
+        return packed
+
+    @staticmethod
+    def packed_size(width: int, height: int) -> int:
+        """Number of bytes in a packed 1-bit-per-pixel frame"""
+        return (width + 7) // 8 * height
 
     @staticmethod
     def from_packed_bytes(packed_bytes: bytearray, width: int, height: int) -> Image.Image:
@@ -51,7 +125,7 @@ class ImageEncoder:
         Convert packed 1-bit-per-pixel byte array back to PIL Image.
         Useful for testing and debugging.
         """
-        logging.info(f'Converting {len(packed_bytes)} bytes to {width}x{height} image')
+        logging.debug('Converting %d bytes to %dx%d image', len(packed_bytes), width, height)
 
         # Create a new 1-bit image
         image = Image.new('1', (width, height), 0)
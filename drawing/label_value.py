@@ -50,7 +50,7 @@ class LabelValue:
 
     def render(self) -> Image.Image:
         """Render the label-value pair and return the image"""
-        logging.info(f'Creating label-value image: {self.label}={self.value}')
+        logging.debug('Creating label-value image: %s=%s', self.label, self.value)
 
         # Clear the image (in case it's being reused)
         self.draw.rectangle([0, 0, self.width, self.height], fill=1)
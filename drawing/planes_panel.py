@@ -4,11 +4,15 @@ from typing import List
 from . import fonts
 from .base import Panel
 from datetime import time
+from dataclasses import asdict
 from flights import Flight
 
 class PlanesPanel(Panel):
     """Class for creating and rendering a panel of overhead flights"""
 
+    name = 'flights'
+    transient_attributes = ('draw', 'flights_service')
+
     PADDING = 2
 
     def __init__(self, width: int = 400, height: int = 240):
@@ -42,18 +46,26 @@ class PlanesPanel(Panel):
             self.logger.warning("No Flights instance configured")
             return
 
-        self.logger.info('Fetching flights data')
+        self.logger.debug('Fetching flights data')
 
         try:
             self.flights = await self.flights_service.get_flights_as_objects()
-            self.logger.info(f'Found {len(self.flights)} flights')
+            self.logger.debug('Found %d flights', len(self.flights))
         except Exception as e:
             self.logger.error(f"Error fetching flights: {e}")
             raise
 
+    def snapshot(self) -> list:
+        """Return the flights as plain dicts, leaving out unset fields"""
+        return [{k: v for k, v in asdict(flight).items() if v is not None} for flight in self.flights]
+
+    def restore(self, snapshot: list):
+        """Load flights returned by snapshot()"""
+        self.flights = [Flight.from_json(data) for data in snapshot]
+
     def render(self) -> Image.Image:
         """Render the flights panel and return the image"""
-        logging.info(f'Creating flights image for {len(self.flights)} flights')
+        logging.debug('Creating flights image for %d flights', len(self.flights))
 
         # Clear the image (in case it's being reused)
         self.draw.rectangle([0, 0, self.width, self.height], fill=1)
@@ -64,7 +76,7 @@ class PlanesPanel(Panel):
 
         # Draw each flight
         for flight in self.flights:
-            logging.info(f'Creating flight image for {flight.hex}')
+            logging.debug('Creating flight image for %s', flight.hex)
             self.draw.text((0, offset), f'- {flight.flight or flight.r}', font=self.font, fill=0)
             offset += (self.font.size + self.PADDING)
             self.draw.text((20, offset), f'{flight.t or "?"} / {flight.alt_baro or "?"}ft / {flight.gs or "?"}kt / {flight.r_dst or "?"}nm', font=self.sub_font, fill=0)
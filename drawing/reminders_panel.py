@@ -1,7 +1,7 @@
 from PIL import Image, ImageDraw, ImageFont
 import logging
 from typing import List
-from reminder import Reminder
+from reminder import Reminder, sort_reminders
 from . import fonts
 from .base import Panel
 from datetime import time, datetime
@@ -9,11 +9,15 @@ from datetime import time, datetime
 class RemindersPanel(Panel):
     """Class for creating and rendering a panel of reminders"""
 
+    name = 'reminders'
+    transient_attributes = ('draw', 'repository', 'reminder_cache')
+
     PADDING = 2
 
     def __init__(self, width: int = 400, height: int = 240):
         super().__init__(width, height)
         self.repository = None  # Repository instance
+        self.reminder_cache = None  # ReminderCache instance, read instead of Redis while live
         self.image = Image.new('1', (self.width, self.height), 1)
         self.draw = ImageDraw.Draw(self.image)
 
@@ -37,33 +41,42 @@ class RemindersPanel(Panel):
         return self
 
     async def fetch_data(self):
-        """Fetch reminders from the repository"""
+        """Fetch reminders from the cache, or the repository if the cache is not live"""
+        cached = self.reminder_cache.reminders() if self.reminder_cache else None
+        if cached is not None:
+            self.reminders = cached
+            self.logger.debug('Using %d cached reminders', len(cached))
+            return
+
         if not self.repository:
             self.logger.warning("No Repository instance configured")
             return
 
-        self.logger.info('Fetching reminders')
+        self.logger.debug('Fetching reminders')
 
         try:
             reminders = self.repository.get_all_reminders()
 
-            # Separate and sort reminders
-            undated_reminders = [r for r in reminders if r.time is None or not isinstance(r.time, datetime)]
-            dated_reminders = [r for r in reminders if r.time is not None and isinstance(r.time, datetime)]
-            dated_reminders = sorted(dated_reminders, key=lambda x: x.time)
+            # Undated reminders first
+            self.reminders = sort_reminders(reminders)
 
-            # Combine with undated first
-            self.reminders = undated_reminders + dated_reminders
-
-            self.logger.info(f'Found {len(undated_reminders)} undated and {len(dated_reminders)} dated reminders')
+            self.logger.debug('Found %d reminders', len(self.reminders))
 
         except Exception as e:
             self.logger.error(f"Error fetching reminders: {e}")
             raise
 
+    def snapshot(self) -> list:
+        """Return the sorted reminders as plain dicts"""
+        return [reminder.to_json() for reminder in self.reminders]
+
+    def restore(self, snapshot: list):
+        """Load reminders returned by snapshot()"""
+        self.reminders = [Reminder.from_json(data) for data in snapshot]
+
     def render(self) -> Image.Image:
         """Render the reminders panel and return the image"""
-        logging.info(f'Creating reminders image for {len(self.reminders)} reminders')
+        logging.debug('Creating reminders image for %d reminders', len(self.reminders))
 
         # Clear the image (in case it's being reused)
         self.draw.rectangle([0, 0, self.width, self.height], fill=1)
@@ -74,7 +87,7 @@ class RemindersPanel(Panel):
 
         # Draw each reminder that's not completed
         for reminder in [x for x in self.reminders if not x.completed == "Yes"]:
-            logging.info(f'Creating reminder image for {reminder.message}')
+            logging.debug('Creating reminder image for %s', reminder.message)
             self.draw.text((0, offset), f'- {reminder.message}', font=self.font, fill=0)
             offset += (self.font.size + self.PADDING)
 
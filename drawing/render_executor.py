@@ -0,0 +1,81 @@
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from PIL import Image
+import multiprocessing
+import asyncio
+import logging
+import time
+
+EXECUTOR_MODES = ('inline', 'thread', 'process')
+
+@dataclass
+class RenderTiming:
+    """How long a panel waited for a worker and how long it took to render"""
+    panel: str
+    queued: float
+    elapsed: float
+
+def _render_panel(panel, submitted_at: float) -> Tuple[Image.Image, float, float]:
+    """
+    Render a panel and report when rendering started and finished.
+    Runs in a worker thread or process, so it must stay at module level
+    and only take and return picklable values.
+    """
+    started_at = time.time()
+    image = panel.render()
+    return image, started_at, time.time()
+
+class RenderExecutor:
+    """Renders panels off the event loop in a thread or process pool"""
+
+    def __init__(self, mode: str = 'thread', max_workers: Optional[int] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Invalid render executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, config) -> 'RenderExecutor':
+        """Create an executor from the [render] section of the config"""
+        mode = config.get('render', 'executor', fallback='thread')
+        max_workers = config.getint('render', 'workers', fallback=4)
+        return cls(mode, max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == 'process':
+                # Spawn rather than fork: the server process has live threads
+                # and sockets that must not be duplicated into workers
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='render')
+            self.logger.info(f"Started {self.mode} render pool with {self.max_workers} workers")
+        return self._executor
+
+    async def render(self, panel) -> Tuple[Image.Image, RenderTiming]:
+        """Render a panel and return its image along with queue and run times"""
+        submitted_at = time.time()
+        if self.mode == 'inline':
+            image, started_at, finished_at = _render_panel(panel, submitted_at)
+        else:
+            loop = asyncio.get_running_loop()
+            image, started_at, finished_at = await loop.run_in_executor(
+                self._get_executor(), _render_panel, panel, submitted_at)
+
+        timing = RenderTiming(
+            panel=panel.__class__.__name__,
+            queued=max(started_at - submitted_at, 0.0),
+            elapsed=finished_at - started_at)
+        return image, timing
+
+    def shutdown(self):
+        """Stop the worker pool, if one was started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
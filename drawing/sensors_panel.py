@@ -1,5 +1,5 @@
 from PIL import Image, ImageDraw
-from .base import Panel
+from .base import Panel, SourceError
 from . import fonts
 from .label_value import LabelValue
 from .charging_meter import ChargingMeter
@@ -10,6 +10,9 @@ from typing import Optional
 class SensorsPanel(Panel):
     """Panel displaying all sensor data"""
 
+    name = 'sensors'
+    transient_attributes = ('ha',)
+
     def __init__(self, width: int = 400, height: int = 240):
         super().__init__(width, height)
         self.ha = None  # HomeAssistant instance
@@ -21,7 +24,7 @@ class SensorsPanel(Panel):
             self.logger.warning("No HomeAssistant instance configured")
             return
 
-        self.logger.info('Fetching all sensor data')
+        self.logger.debug('Fetching all sensor data')
 
         # Define all sensors to fetch
         sensors = {
@@ -43,13 +46,31 @@ class SensorsPanel(Panel):
         tasks = {key: self.ha.get_value(sensor) for key, sensor in sensors.items()}
         results = await asyncio.gather(*tasks.values(), return_exceptions=True)
 
-        # Store results
+        # Home Assistant reports failures as an error payload. A failed sensor
+        # keeps its last good state, which sensor_data holds from the last
+        # restore, or shows its own error if it has none; only when every
+        # sensor fails does the fetch fail
+        sensor_data, failed = {}, []
         for (key, _), result in zip(tasks.items(), results):
-            if isinstance(result, Exception):
-                self.logger.error(f"Error fetching {key}: {result}")
-                self.sensor_data[key] = {'error': str(result)}
+            if isinstance(result, Exception) or 'error' in result:
+                error = result if isinstance(result, Exception) else result['error']
+                self.logger.error(f"Error fetching {key}: {error}")
+                failed.append(key)
+                previous = self.sensor_data.get(key)
+                sensor_data[key] = previous if previous and 'error' not in previous else {'error': str(error)}
             else:
-                self.sensor_data[key] = resul
+                sensor_data[key] = result
+        if len(failed) == len(sensors):
+            raise SourceError(f"Could not fetch any of {', '.join(failed)}")
+        self.sensor_data = sensor_data
+
+    def snapshot(self) -> dict:
+        """Return the raw sensor states"""
+        return dict(self.sensor_data)
+
+    def restore(self, snapshot: dict):
+        """Load sensor states returned by snapshot()"""
+        self.sensor_data = dict(snapshot)
 
     def render(self) -> Image.Image:
         """Render all sensors in a vertical layout"""
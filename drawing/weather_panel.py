@@ -2,12 +2,14 @@ from PIL import Image, ImageDraw, ImageFont
 import logging
 from titlecase import titlecase
 from . import fonts
-from .base import Panel
-import asyncio
+from .base import Panel, SourceError
 
 class WeatherPanel(Panel):
     """Class for creating and rendering a weather information panel"""
 
+    name = 'weather'
+    transient_attributes = ('draw', 'weather')
+
     def __init__(self, width: int = 400, height: int = 240):
         super().__init__(width, height)
         self.weather = None  # Weather instance
@@ -117,33 +119,47 @@ class WeatherPanel(Panel):
             self.logger.warning("No Weather instance configured")
             return
 
-        self.logger.info('Fetching weather data')
+        self.logger.debug('Fetching weather data')
 
         try:
-            # Fetch all weather data in parallel
-            temperature, humidity, conditions, wind_speed, high_temp, low_temp = await asyncio.gather(
-                self.weather.get_temperature(),
-                self.weather.get_humidity(),
-                self.weather.get_conditions(),
-                self.weather.get_wind_speed(),
-                self.weather.get_high_temperature(),
-                self.weather.get_low_temperature()
-            )
-
-            self.temperature = temperature
-            self.humidity = humidity
-            self.conditions_id, self.conditions_text = conditions
-            self.wind_speed = wind_speed
-            self.high_temp = high_temp
-            self.low_temp = low_temp
+            # One request for everything; the service reports failures as an
+            # error payload, which must not replace the last good data
+            weather = await self.weather.get_weather()
+            if "error" in weather:
+                raise SourceError(weather["error"])
+
+            self.temperature = weather['main']['temp']
+            self.humidity = weather['main']['humidity']
+            self.conditions_id = weather['weather'][0]['id']
+            self.conditions_text = weather['weather'][0]['description']
+            self.wind_speed = weather['wind']['speed']
+            self.high_temp = weather['main']['temp_max']
+            self.low_temp = weather['main']['temp_min']
 
         except Exception as e:
             self.logger.error(f"Error fetching weather data: {e}")
             raise
 
+    def snapshot(self) -> dict:
+        """Return the current weather values"""
+        return {
+            'temperature': self.temperature,
+            'high_temp': self.high_temp,
+            'low_temp': self.low_temp,
+            'humidity': self.humidity,
+            'conditions_id': self.conditions_id,
+            'conditions_text': self.conditions_text,
+            'wind_speed': self.wind_speed
+        }
+
+    def restore(self, snapshot: dict):
+        """Load weather values returned by snapshot()"""
+        for key, value in snapshot.items():
+            setattr(self, key, value)
+
     def get_weather_icon(self) -> str:
         """Get an icon character based on the weather condition ID"""
-        logging.info(f'Getting weather icon for condition ID: {self.conditions_id}')
+        logging.debug('Getting weather icon for condition ID: %s', self.conditions_id)
         try:
             match(self.conditions_id):
                 case x if x in range(200, 233): #thunderstorm
@@ -171,9 +187,9 @@ class WeatherPanel(Panel):
 
     def render(self) -> Image.Image:
         """Render the weather panel and return the image"""
-        logging.info(f'Creating weather image with temperature: {self.temperature}, humidity: {self.humidity}, '
-                     f'conditions: {self.conditions_text}, wind speed: {self.wind_speed}, '
-                     f'high temp: {self.high_temp}, low temp: {self.low_temp}')
+        logging.debug('Creating weather image with temperature: %s, humidity: %s, conditions: %s, '
+                      'wind speed: %s, high temp: %s, low temp: %s', self.temperature, self.humidity,
+                      self.conditions_text, self.wind_speed, self.high_temp, self.low_temp)
 
         # Clear the image (in case it's being reused)
         self.draw.rectangle([0, 0, self.width, self.height], fill=1)
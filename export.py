@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+from PIL import Image
+from tzlocal import get_localzone
+from artifacts import ArtifactCache
+from refresh_hint import RefreshAdvisor
+
+# Output file name for each artifact format; device formats are added per device
+FILE_NAMES = {
+    'packed': 'statusboard.bin',
+    'bmp': 'statusboard.bmp',
+    'png': 'statusboard.png',
+}
+
+def write_atomic(path: str, data: bytes):
+    """Write a file so readers only ever see the old or the new content"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates files only the owner can read
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class StaticExporter:
+    """
+    Writes each new frame into a directory as static files, so a plain web
+    server can serve devices without going through the app. Every format
+    is written with a gzipped copy alongside it (for nginx gzip_static),
+    and version.json is replaced last, once the frame files it describes
+    are all in place.
+    """
+
+    def __init__(self, directory: str, render: Callable[[], Awaitable[Image.Image]],
+                 interval: float = 60.0, artifacts: Optional[ArtifactCache] = None,
+                 advisor: Optional[RefreshAdvisor] = None):
+        self.directory = directory
+        self.render = render
+        self.interval = interval
+        self.artifacts = artifacts if artifacts is not None else ArtifactCache()
+        self.advisor = advisor
+        self.version: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config, render: Callable[[], Awaitable[Image.Image]],
+                    artifacts: Optional[ArtifactCache] = None,
+                    advisor: Optional[RefreshAdvisor] = None) -> Optional['StaticExporter']:
+        """Create an exporter from the [export] section, or None if no directory is set"""
+        directory = config.get('export', 'directory', fallback='')
+        if not directory:
+            return None
+        return cls(directory, render, config.getfloat('export', 'interval', fallback=60.0),
+                   artifacts, advisor)
+
+    def file_names(self) -> Dict[str, str]:
+        names = dict(FILE_NAMES)
+        for device in self.artifacts.panel_formats:
+            names[f'packed:{device}'] = f'statusboard-{device}.bin'
+        return names
+
+    async def export(self, image: Image.Image) -> bool:
+        """Write a frame's files unless it is the frame already exported; True if written"""
+        version = image.info.get('version') or image.info.get('frame_hash')
+        if version is not None and version == self.version:
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        files = {}
+        for fmt, name in self.file_names().items():
+            for suffix in ('', '.gz'):
+                data = await self.artifacts.get(image, fmt + suffix)
+                await asyncio.to_thread(write_atomic, os.path.join(self.directory, name + suffix), data)
+                files[name + suffix] = len(data)
+
+        now = datetime.now(get_localzone())
+        info = {
+            'version': version,
+            'rendered_at': now.isoformat(),
+            'files': files,
+        }
+        if self.advisor is not None:
+            self.advisor.observe(image.info.get('panel_versions', {}), now)
+            info['refresh_after'] = self.advisor.hint(now)
+        await asyncio.to_thread(write_atomic, os.path.join(self.directory, 'version.json'),
+                                json.dumps(info, indent=2).encode())
+
+        self.version = version
+        logging.info(f"Exported frame {version} to {self.directory}")
+        return True
+
+    async def export_once(self) -> bool:
+        return await self.export(await self.render())
+
+    async def run(self):
+        """Render and export a frame every `interval` seconds until cancelled"""
+        while True:
+            started = time.monotonic()
+            try:
+                await self.export_once()
+            except Exception as e:
+                logging.error(f"Error exporting frame: {e}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+if __name__ == '__main__':
+    import argparse
+    import image_generator
+    from devices import load_panel_formats
+
+    parser = argparse.ArgumentParser(description='Render statusboard frames into a directory of static files')
+    parser.add_argument('directory', nargs='?', help='Output directory (default: [export] directory)')
+    parser.add_argument('--interval', type=float, help='Seconds between renders (default: [export] interval)')
+    parser.add_argument('--once', action='store_true', help='Export a single frame and exit')
+    args = parser.parse_args()
+
+    config = image_generator.config
+    directory = args.directory or config.get('export', 'directory', fallback='')
+    if not directory:
+        parser.error('no output directory given and none set in [export]')
+    interval = args.interval if args.interval is not None else config.getfloat('export', 'interval', fallback=60.0)
+    exporter = StaticExporter(directory, image_generator.get_statusboard_image, interval,
+                              ArtifactCache(panel_formats=load_panel_formats(config)),
+                              RefreshAdvisor.from_config(config))
+
+    async def main():
+        await image_generator.startup()
+        try:
+            if args.once:
+                await exporter.export_once()
+            else:
+                await exporter.run()
+        finally:
+            await image_generator.shutdown()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
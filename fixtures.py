@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from export import write_atomic
+from flights import Flights
+from homeassistant import HomeAssistant
+from reminder import Reminder, sort_reminders
+from weather import Weather
+
+# Bumped whenever the layout of fixture files changes
+FIXTURE_VERSION = 1
+
+# Upstream sources a fixture holds, each a dict of payloads by key
+SOURCES = ('home_assistant', 'openweather', 'tar1090', 'route_api', 'reminders')
+
+class Fixture:
+    """
+    Upstream responses captured while rendering, so the same frame can be
+    rendered again offline. Home Assistant states are keyed by entity,
+    routes by callsign and reminders by id; the weather and aircraft
+    payloads are kept whole.
+    """
+
+    def __init__(self, sources: Optional[Dict[str, Dict[str, Any]]] = None,
+                 recorded_at: Optional[str] = None):
+        self.sources = sources if sources is not None else {source: {} for source in SOURCES}
+        self.recorded_at = recorded_at
+
+    @classmethod
+    def load(cls, path: str) -> 'Fixture':
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != FIXTURE_VERSION:
+            raise ValueError(f"{path} is a version {data.get('version')} fixture, "
+                             f"expected version {FIXTURE_VERSION}; record it again")
+        return cls({source: data['sources'].get(source, {}) for source in SOURCES}, data.get('recorded_at'))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = {
+            'version': FIXTURE_VERSION,
+            'recorded_at': self.recorded_at or datetime.now().isoformat(timespec='seconds'),
+            'sources': self.sources,
+        }
+        write_atomic(path, json.dumps(data, indent=1, ensure_ascii=False).encode())
+
+    def record(self, source: str, key: str, payload: Any):
+        self.sources[source][key] = payload
+
+    def get(self, source: str, key: str, default: Any = None) -> Any:
+        return self.sources[source].get(key, default)
+
+def fixture_path(config, name: str) -> str:
+    """Where the named fixture lives in the [fixtures] directory"""
+    return os.path.join(config.get('fixtures', 'directory', fallback='fixtures'), f'{name}.json')
+
+class RecordingHomeAssistant(HomeAssistant):
+    def __init__(self, config, fixture: Fixture):
+        super().__init__(config)
+        self.fixture = fixture
+
+    async def get_value(self, entity_id: str) -> dict:
+        value = await super().get_value(entity_id)
+        self.fixture.record('home_assistant', entity_id, value)
+        return value
+
+class RecordingWeather(Weather):
+    def __init__(self, config, fixture: Fixture):
+        super().__init__(config)
+        self.fixture = fixture
+
+    async def get_weather(self):
+        weather = await super().get_weather()
+        self.fixture.record('openweather', 'current', weather)
+        return weather
+
+class RecordingFlights(Flights):
+    def __init__(self, config, fixture: Fixture):
+        super().__init__(config)
+        self.fixture = fixture
+
+    async def get_flights(self):
+        data = await super().get_flights()
+        self.fixture.record('tar1090', 'aircraft', data)
+        return data
+
+    async def fetch_routes(self, planes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        route_data = await super().fetch_routes(planes)
+        for route_info in route_data:
+            self.fixture.record('route_api', route_info.get('callsign'), route_info)
+        return route_data
+
+class RecordingRepository:
+    """Records the reminders read through a repository"""
+
+    def __init__(self, repository, fixture: Fixture):
+        self.repository = repository
+        self.fixture = fixture
+
+    def get_all_reminders(self) -> List[Reminder]:
+        reminders = self.repository.get_all_reminders()
+        for reminder in reminders:
+            self.fixture.record('reminders', reminder.id, reminder.to_json())
+        return reminders
+
+class ReplayHomeAssistant:
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+
+    async def get_value(self, entity_id: str) -> dict:
+        return self.fixture.get('home_assistant', entity_id, {'error': f"{entity_id} was not recorded"})
+
+class ReplayWeather(Weather):
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+
+    async def get_weather(self):
+        return self.fixture.get('openweather', 'current', {'error': 'Weather was not recorded'})
+
+class ReplayFlights(Flights):
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+
+    async def get_flights(self):
+        # A copy, since flights are built from and modify the payload
+        return json.loads(json.dumps(self.fixture.get('tar1090', 'aircraft', {'aircraft': []})))
+
+    async def fetch_routes(self, planes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        routes = (self.fixture.get('route_api', plane['callsign']) for plane in planes)
+        return [route for route in routes if route is not None]
+
+class ReplayRepository:
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+
+    def get_all_reminders(self) -> List[Reminder]:
+        return sort_reminders(Reminder.from_json(data) for data in self.fixture.sources['reminders'].values())
+
+if __name__ == '__main__':
+    import argparse
+    import asyncio
+    import statistics
+    import time
+    import image_generator
+    from drawing import RenderExecutor
+
+    parser = argparse.ArgumentParser(description='Record upstream responses to a fixture, or render frames from one')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help='Render a frame from the live services and save what they returned')
+    record_parser.add_argument('name', nargs='?', help='Fixture name or path (default: the current time)')
+    replay_parser = commands.add_parser('replay', help='Render frames from a fixture and time them')
+    replay_parser.add_argument('name', help='Fixture name or path')
+    replay_parser.add_argument('--frames', type=int, default=10)
+    replay_parser.add_argument('--save', metavar='FILE', help='Also write the last frame as a PNG')
+    args = parser.parse_args()
+
+    config = image_generator.config
+
+    def resolve(name: str) -> str:
+        # Names are looked up in the fixtures directory, paths are used as given
+        return name if os.sep in name or name.endswith('.json') else fixture_path(config, name)
+
+    async def record():
+        fixture = Fixture()
+        dashboard = image_generator.create_dashboard(fixture=fixture, record=True)
+        dashboard.executor = RenderExecutor('inline')
+        try:
+            image = await dashboard.render()
+        finally:
+            await image_generator.shutdown()
+        path = resolve(args.name or datetime.now().strftime('%Y%m%d-%H%M%S'))
+        fixture.save(path)
+        counts = ', '.join(f'{len(fixture.sources[source])} {source}' for source in SOURCES)
+        print(f"Recorded frame {image.info.get('version')} to {path}: {counts}")
+
+    async def replay():
+        fixture = Fixture.load(resolve(args.name))
+        executor = RenderExecutor('inline')
+        times, versions = [], set()
+        try:
+            for _ in range(args.frames):
+                dashboard = image_generator.create_dashboard(fixture=fixture)
+                dashboard.executor = executor
+                started = time.perf_counter()
+                image = await dashboard.render()
+                times.append(time.perf_counter() - started)
+                versions.add(image.info.get('version'))
+        finally:
+            await image_generator.shutdown()
+        if args.save:
+            image.save(args.save)
+        print(f"Rendered {args.frames} frames from {fixture.recorded_at}: median {statistics.median(times) * 1000:.1f}ms, "
+              f"min {min(times) * 1000:.1f}ms, max {max(times) * 1000:.1f}ms")
+        print(f"Frame version{'s' if len(versions) > 1 else ''}: {', '.join(sorted(map(str, versions)))}")
+
+    # Per-panel render logging would drown out the summary
+    logging.disable(logging.INFO)
+    asyncio.run(record() if args.command == 'record' else replay())
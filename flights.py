@@ -1,5 +1,6 @@
 import aiohttp
 import logging
+import metrics
 from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
 
@@ -60,46 +61,66 @@ class Flights:
         self.config = config
         self.url = config['tar1090']['url']
         self.route_url = config['tar1090']['route_url']
-        logging.info(f"Flights initialized with URL: {self.url}")
+        self.timeout = aiohttp.ClientTimeout(total=config['tar1090'].getfloat('timeout', fallback=5))
+        self.route_timeout = aiohttp.ClientTimeout(
+            total=config['tar1090'].getfloat('route_timeout', fallback=self.timeout.total))
+        logging.debug("Flights initialized with URL: %s", self.url)
 
     async def get_flights(self):
-        logging.debug(f"Fetching all flights from {self.url}")
+        logging.debug("Fetching all flights from %s", self.url)
         async with aiohttp.ClientSession() as session:
             try:
-                async with session.get(self.url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        aircraft_count = len(data.get('aircraft', []))
-                        logging.info(f"Successfully fetched {aircraft_count} aircraft")
-                        return data
-                    else:
-                        logging.error(f"Failed to fetch flights: HTTP {response.status}")
-                        return {"aircraft": []}
+                with metrics.track_source('tar1090'):
+                    async with session.get(self.url, timeout=self.timeout) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            aircraft_count = len(data.get('aircraft', []))
+                            logging.debug("Successfully fetched %d aircraft", aircraft_count)
+                            return data
+                        else:
+                            metrics.SOURCE_ERRORS.inc(source='tar1090')
+                            logging.error(f"Failed to fetch flights: HTTP {response.status}")
+                            return {"aircraft": []}
             except Exception as e:
                 logging.error(f"Error fetching flights: {str(e)}")
                 raise
 
     async def get_flight(self, id):
-        logging.debug(f"Looking for flight with hex ID: {id}")
+        logging.debug("Looking for flight with hex ID: %s", id)
         async with aiohttp.ClientSession() as session:
             try:
-                async with session.get(self.url) as response:
-                    if response.status != 200:
-                        logging.error(f"Failed to fetch flight data: HTTP {response.status}")
-                        return None
+                with metrics.track_source('tar1090'):
+                    async with session.get(self.url, timeout=self.timeout) as response:
+                        if response.status != 200:
+                            metrics.SOURCE_ERRORS.inc(source='tar1090')
+                            logging.error(f"Failed to fetch flight data: HTTP {response.status}")
+                            return None
 
-                    data = await response.json()
-                    for aircraft in data.get('aircraft', []):
-                        if aircraft.get('hex') == id:
-                            logging.info(f"Found flight {id}: {aircraft.get('flight', '').strip()}")
-                            return Flight.from_json(aircraft)
+                        data = await response.json()
+                        for aircraft in data.get('aircraft', []):
+                            if aircraft.get('hex') == id:
+                                logging.info(f"Found flight {id}: {aircraft.get('flight', '').strip()}")
+                                return Flight.from_json(aircraft)
 
-                    logging.warning(f"Flight with hex ID {id} not found")
-                    return None
+                        logging.warning(f"Flight with hex ID {id} not found")
+                        return None
             except Exception as e:
                 logging.error(f"Error fetching flight {id}: {str(e)}")
                 raise
 
+    async def fetch_routes(self, planes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Look up routes for planes given as callsign, lat and lng; empty if the API refuses"""
+        with metrics.track_source('route_api'):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.route_url, json={'planes': planes}, timeout=self.route_timeout) as response:
+                    if response.status != 200:
+                        metrics.SOURCE_ERRORS.inc(source='route_api')
+                        logging.error(f"Failed to fetch route data: HTTP {response.status}")
+                        return []
+                    route_data = await response.json()
+                    logging.debug("Received route data for %d flights", len(route_data))
+                    return route_data
+
     async def enrich_flights_with_routes(self, flights: List[Flight]) -> List[Flight]:
         logging.debug("Enriching flights with routes")
         request_dict = {'planes': []}
@@ -115,34 +136,28 @@ class Flights:
             logging.warning("No valid flights to enrich with routes")
             return flights
 
-        logging.info(f"Requesting routes for {len(request_dict['planes'])} flights")
+        logging.debug("Requesting routes for %d flights", len(request_dict['planes']))
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.route_url, json=request_dict) as response:
-                    if response.status == 200:
-                        route_data = await response.json()
-                        logging.info(f"Received route data for {len(route_data)} flights")
-
-                        for route_info in route_data:
-                            callsign = route_info.get('callsign')
-                            airports = route_info.get('_airports', [])
-
-                            # Find matching flight
-                            matching_flight = next((f for f in flights if f.flight and f.flight.strip() == callsign), None)
-                            if matching_flight is not None:
-                                # Build route string from location names
-                                locations = []
-                                for airport in airports:
-                                    location = airport.get('location')
-                                    if location:
-                                        locations.append(location)
-
-                                if locations:
-                                    route_string = " → ".join(locations)
-                                    matching_flight.route = route_string
-                                    logging.debug(f"Added route '{route_string}' to flight {callsign}")
-                    else:
-                        logging.error(f"Failed to fetch route data: HTTP {response.status}")
+            route_data = await self.fetch_routes(request_dict['planes'])
+
+            for route_info in route_data:
+                callsign = route_info.get('callsign')
+                airports = route_info.get('_airports', [])
+
+                # Find matching flight
+                matching_flight = next((f for f in flights if f.flight and f.flight.strip() == callsign), None)
+                if matching_flight is not None:
+                    # Build route string from location names
+                    locations = []
+                    for airport in airports:
+                        location = airport.get('location')
+                        if location:
+                            locations.append(location)
+
+                    if locations:
+                        route_string = " → ".join(locations)
+                        matching_flight.route = route_string
+                        logging.debug("Added route '%s' to flight %s", route_string, callsign)
         except Exception as e:
             logging.error(f"Error enriching flights with routes: {str(e)}")
 
@@ -153,7 +168,7 @@ class Flights:
         try:
             data = await self.get_flights()
             flights = [Flight.from_json(aircraft) for aircraft in data.get('aircraft', [])]
-            logging.info(f"Converted {len(flights)} flights to Flight objects")
+            logging.debug("Converted %d flights to Flight objects", len(flights))
 
             # Sort flights by distance (r_dst), with None values at the end
             flights.sort(key=lambda flight: flight.r_dst if flight.r_dst is not None else 9999999)
@@ -0,0 +1,208 @@
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks on Windows, where only a single worker is supported
+    fcntl = None
+
+# Packed size of one 800x480 1-bit-per-pixel frame
+FRAME_SIZE = 800 * 480 // 8
+
+MAGIC = b'SBFRAME1'
+# magic, slot count, slot size, next sequence number
+HEADER = struct.Struct('<8sIIQ')
+# sequence number, unix timestamp, frame length, content hash
+INDEX_ENTRY = struct.Struct('<QdI16s4x')
+
+@dataclass
+class FrameRecord:
+    seq: int
+    timestamp: float
+    length: int
+    digest: bytes
+
+    @property
+    def hash(self) -> str:
+        return self.digest.hex()
+
+class FrameHistory:
+    """
+    A fixed-size ring of the last N packed frames in a memory-mapped file.
+    A small index holds each frame's timestamp and content hash, so past
+    frames can be looked up by time and served as memoryview slices of the
+    mapping without copying or decoding them. Several processes can share
+    one file; writes are serialised with an exclusive file lock.
+    """
+
+    def __init__(self, path: str, slots: int = 1440, frame_size: int = FRAME_SIZE):
+        self.path = path
+        self.slots = slots
+        self.frame_size = frame_size
+        self._index_offset = HEADER.size
+        self._frames_offset = self._index_offset + INDEX_ENTRY.size * slots
+        self._open()
+
+    @classmethod
+    def from_config(cls, config) -> Optional['FrameHistory']:
+        """Create a history from the [history] section, or None if it is disabled"""
+        slots = config.getint('history', 'frames', fallback=1440)
+        if slots <= 0:
+            return None
+        return cls(config.get('history', 'path', fallback='frames.ring'), slots)
+
+    @classmethod
+    def open_existing(cls, path: str) -> 'FrameHistory':
+        """Open a history file using the layout recorded in its header"""
+        with open(path, 'rb') as f:
+            magic, slots, frame_size, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame history file")
+        return cls(path, slots, frame_size)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the file lock, so other workers sharing the file wait"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _open(self):
+        size = self._frames_offset + self.frame_size * self.slots
+        # Kept open for the lock; the mapping doesn't need it
+        self._file = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        with self._locked():
+            # Checked under the lock so workers starting together don't both reset the file
+            reset = True
+            if os.fstat(self._file.fileno()).st_size == size:
+                magic, slots, frame_size, _ = HEADER.unpack(self._file.read(HEADER.size))
+                reset = (magic, slots, frame_size) != (MAGIC, self.slots, self.frame_size)
+                if reset:
+                    logging.warning(f"Frame history {self.path} has a different layout, recreating it")
+
+            if reset:
+                # Sparse until written, so the file costs nothing up front
+                self._file.truncate(0)
+                self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+            if reset:
+                HEADER.pack_into(self._mmap, 0, MAGIC, self.slots, self.frame_size, 0)
+        logging.info(f"Opened frame history {self.path} with {self.slots} slots")
+
+    @property
+    def _next_seq(self) -> int:
+        return HEADER.unpack_from(self._mmap, 0)[3]
+
+    def _record(self, slot: int) -> FrameRecord:
+        return FrameRecord(*INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + slot * INDEX_ENTRY.size))
+
+    def append(self, frame: bytes, timestamp: Optional[float] = None) -> Optional[FrameRecord]:
+        """
+        Store a packed frame, overwriting the oldest one once the ring is full.
+        Frames identical to the latest one are skipped, since the board still
+        shows the same thing.
+        """
+        if len(frame) > self.frame_size:
+            raise ValueError(f"Frame of {len(frame)} bytes does not fit in {self.frame_size} byte slots")
+
+        digest = hashlib.blake2b(frame, digest_size=16).digest()
+        # Another worker may append between reading the sequence number and
+        # publishing the next one
+        with self._locked():
+            latest = self.latest()
+            if latest is not None and latest.digest == digest:
+                return None
+
+            seq = self._next_seq
+            slot = seq % self.slots
+            record = FrameRecord(seq, timestamp if timestamp is not None else time.time(), len(frame), digest)
+
+            offset = self._frames_offset + slot * self.frame_size
+            self._mmap[offset:offset + len(frame)] = frame
+            # Publish the index entry and sequence number only after the frame is written
+            INDEX_ENTRY.pack_into(self._mmap, self._index_offset + slot * INDEX_ENTRY.size,
+                                  record.seq, record.timestamp, record.length, record.digest)
+            HEADER.pack_into(self._mmap, 0, MAGIC, self.slots, self.frame_size, seq + 1)
+        return record
+
+    def __len__(self) -> int:
+        """Number of frames stored"""
+        return min(self._next_seq, self.slots)
+
+    def records(self) -> List[FrameRecord]:
+        """Index entries for every stored frame, oldest first"""
+        next_seq = self._next_seq
+        first = max(next_seq - self.slots, 0)
+        return [self._record(seq % self.slots) for seq in range(first, next_seq)]
+
+    def latest(self) -> Optional[FrameRecord]:
+        next_seq = self._next_seq
+        if next_seq == 0:
+            return None
+        return self._record((next_seq - 1) % self.slots)
+
+    def get(self, seq: int) -> Optional[FrameRecord]:
+        """Index entry for a sequence number, if that frame is still in the ring"""
+        next_seq = self._next_seq
+        if seq < max(next_seq - self.slots, 0) or seq >= next_seq:
+            return None
+        return self._record(seq % self.slots)
+
+    def at(self, timestamp: float) -> Optional[FrameRecord]:
+        """The frame that was current at a unix timestamp"""
+        found = None
+        for record in self.records():
+            if record.timestamp > timestamp:
+                break
+            found = record
+        return found
+
+    def frame(self, record: FrameRecord) -> memoryview:
+        """
+        Zero-copy view of a stored frame. The view is only valid until the
+        ring wraps around and reuses the frame's slot.
+        """
+        offset = self._frames_offset + (record.seq % self.slots) * self.frame_size
+        return memoryview(self._mmap)[offset:offset + record.length]
+
+    def replay(self, since: float = 0.0) -> Iterator[tuple]:
+        """Yield (record, frame) pairs from a unix timestamp onwards, oldest first"""
+        for record in self.records():
+            if record.timestamp >= since:
+                yield record, self.frame(record)
+
+    def flush(self):
+        self._mmap.flush()
+
+if __name__ == '__main__':
+    # Debugging helper: list stored frames or export them as BMP files
+    import argparse
+    from datetime import datetime
+    from drawing import ImageEncoder
+
+    parser = argparse.ArgumentParser(description='Inspect the statusboard frame history')
+    parser.add_argument('path', help='Frame history file')
+    parser.add_argument('--export', metavar='DIR', help='Write every stored frame to DIR as BMP')
+    args = parser.parse_args()
+
+    history = FrameHistory.open_existing(args.path)
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+    for record, frame in history.replay():
+        print(f'{record.seq}\t{datetime.fromtimestamp(record.timestamp).isoformat()}\t{record.hash}')
+        if args.export:
+            image = ImageEncoder.from_packed_bytes(bytes(frame), 800, 480)
+            image.save(os.path.join(args.export, f'{record.seq:08d}.bmp'))
@@ -0,0 +1,112 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+from PIL import Image
+from artifacts import frame_hash
+import metrics
+import tracing
+
+class FrameNotifier:
+    """
+    Tracks the version of the latest frame and wakes clients waiting for it
+    to change. While anyone is waiting, frames are re-rendered every
+    `interval` seconds to notice changes; with no waiters nothing runs.
+    """
+
+    def __init__(self, render: Callable[[], Awaitable[Image.Image]], interval: float = 30.0):
+        self.render = render
+        self.interval = interval
+        self.version: Optional[str] = None
+        self.changed_at: Optional[float] = None
+        self._condition = asyncio.Condition()
+        self._subscribers = 0
+        self._task: Optional[asyncio.Task] = None
+        # Monotonic time of the last refresh for waiting clients
+        self._refreshed_at = float('-inf')
+
+    @staticmethod
+    def version_of(image: Image.Image) -> str:
+        return image.info.get('version') or frame_hash(image)
+
+    async def publish(self, image: Image.Image):
+        """Record a newly rendered frame, waking waiters if its content changed"""
+        version = self.version_of(image)
+        if version == self.version:
+            return
+        logging.info(f"Frame version changed from {self.version} to {version}")
+        async with self._condition:
+            self.version = version
+            self.changed_at = time.time()
+            self._condition.notify_all()
+        metrics.FRAME_CHANGES.inc()
+        metrics.FRAME_CHANGED_AT.set(self.changed_at)
+
+    @contextlib.contextmanager
+    def subscribed(self) -> Iterator[None]:
+        """Count a waiting client for as long as the block runs, keeping frames refreshed"""
+        self._subscribers += 1
+        self._ensure_refreshing()
+        try:
+            yield
+        finally:
+            self._subscribers -= 1
+
+    async def wait_for_change(self, since: Optional[str], timeout: float) -> bool:
+        """Wait until the frame version differs from `since`; False on timeout"""
+        with self.subscribed():
+            return await self._wait(since, timeout)
+
+    async def subscribe(self, keepalive: float = 15.0) -> AsyncIterator[Optional[str]]:
+        """
+        Yield each new frame version, or None every `keepalive` seconds
+        without one. The stream counts as one waiting client until it is
+        closed, not just while it waits.
+        """
+        seen = None
+        with self.subscribed():
+            while True:
+                if await self._wait(seen, keepalive):
+                    seen = self.version
+                    yield seen
+                else:
+                    yield None
+
+    async def _wait(self, since: Optional[str], timeout: float) -> bool:
+        try:
+            async with self._condition:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.version is not None and self.version != since),
+                    timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def refresh_now(self):
+        """Render straight away for waiting clients, after a change they should see"""
+        if self._subscribers > 0:
+            tracing.detached(self._refresh_once())
+
+    async def _refresh_once(self):
+        try:
+            await self.render()
+        except Exception as e:
+            logging.error(f"Error refreshing frame for waiting clients: {e}")
+
+    def _ensure_refreshing(self):
+        if self._task is None or self._task.done():
+            # Not part of the trace of whichever waiting request started it
+            self._task = tracing.detached(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while self._subscribers > 0:
+            # A loop restarted by a client arriving just after the last one
+            # left still waits out the interval
+            delay = self._refreshed_at + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self._refreshed_at = time.monotonic()
+            # The render callable publishes the frame it produces
+            await self._refresh_once()
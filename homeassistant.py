@@ -1,6 +1,7 @@
 import aiohttp
 import asyncio
 import logging
+import metrics
 
 class HomeAssistant:
     def __init__(self, config: dict):
@@ -12,14 +13,15 @@ class HomeAssistant:
     async def get_value(self, entity_id: str) -> dict:
         """Asynchronously fetch a value from Home Assistant."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f'{self.ha_url}/api/states/{entity_id}',
-                    headers=self.headers,
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            with metrics.track_source('home_assistant'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(
+                        f'{self.ha_url}/api/states/{entity_id}',
+                        headers=self.headers,
+                        timeout=aiohttp.ClientTimeout(total=5)
+                    ) as response:
+                        response.raise_for_status()
+                        return await response.json()
         except aiohttp.ClientResponseError as http_err:
             logging.error(f'HTTP error occurred: {http_err}')
             return {"error": f"HTTP error occurred: {http_err}"}
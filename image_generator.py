@@ -1,44 +1,141 @@
-from drawing import QuadrantDashboard, WeatherPanel, SensorsPanel, RemindersPanel, PlanesPanel
+from drawing import QuadrantDashboard, WeatherPanel, SensorsPanel, RemindersPanel, PlanesPanel, RenderExecutor, FetchGuard
 from homeassistant import HomeAssistant
 from weather import Weather
-from localconfig import get_config
-from logconfig import configure_logging
-from repository import Repository
 from flights import Flights
 from PIL import Image
+from configparser import ConfigParser
+from typing import Optional, TYPE_CHECKING
 import asyncio
-
-config = get_config()
-logger = configure_logging(config)
-
-async def get_statusboard_image() -> Image.Image:
-    """Generate the complete statusboard image"""
-    logger.info('Generating statusboard image')
-
-    # Create dashboard
+import logging
+
+if TYPE_CHECKING:
+    # Fixtures are only used for profiling and offline renders, so not loaded at startup
+    from fixtures import Fixture
+    from memory import MemoryTracker
+    from reminder_cache import ReminderCache
+    from repository import Repository
+
+logger = logging.getLogger()
+
+# Shared services, created by init() on first use rather than at import, so
+# importing this module sets nothing up. Spawned render workers and the
+# debug tools import it without needing Redis clients or a worker pool.
+config: ConfigParser
+# Shared by every render so the worker pool is only started once
+render_executor: RenderExecutor
+# Keeps each source's last good data and in-flight refreshes between renders
+fetch_guard: FetchGuard
+repository: 'Repository'
+# Keeps reminders in memory so renders don't read them from Redis
+reminder_cache: Optional['ReminderCache']
+# Records the memory each render retains, and allocation sites when tracing is on
+memory_tracker: 'MemoryTracker'
+
+SHARED = ('config', 'render_executor', 'fetch_guard', 'repository', 'reminder_cache', 'memory_tracker')
+_initialized = False
+
+def init():
+    """Load the config, set up logging and create the shared services, once per process"""
+    global _initialized, config, render_executor, fetch_guard, repository, reminder_cache, memory_tracker
+    if _initialized:
+        return
+    from localconfig import get_config
+    from logconfig import configure_logging
+    from memory import MemoryTracker
+    from reminder_cache import ReminderCache
+    from repository import Repository
+    from snapshots import get_snapshot_store
+
+    config = get_config()
+    configure_logging(config)
+    render_executor = RenderExecutor.from_config(config)
+    fetch_guard = FetchGuard.from_config(config, store=get_snapshot_store(config))
+    repository = Repository(config)
+    reminder_cache = ReminderCache.from_config(config, repository)
+    memory_tracker = MemoryTracker.from_config(config)
+    _initialized = True
+
+def __getattr__(name: str):
+    # The first access to any shared service sets them all up
+    if name in SHARED:
+        init()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def create_dashboard(stubs: bool = False, fixture: Optional['Fixture'] = None,
+                     record: bool = False) -> QuadrantDashboard:
+    """
+    Create the dashboard and its panels, with canned data sources if `stubs`
+    is set. With a `fixture`, panels replay the responses it holds, or with
+    `record` also set, fetch live data and record it into the fixture.
+    """
+    init()
     dashboard = QuadrantDashboard(800, 480)
 
     # Create and configure panels
     sensors_panel = SensorsPanel()
-    sensors_panel.ha = HomeAssistant(config)
-
     weather_panel = WeatherPanel()
-    weather_panel.weather = Weather(config)
-
     reminders_panel = RemindersPanel()
-    reminders_panel.repository = Repository(config)
-
     planes_panel = PlanesPanel()
-    planes_panel.flights_service = Flights(config)
+
+    if stubs:
+        from stubs import StubHomeAssistant, StubWeather, StubRepository, StubFlights
+        sensors_panel.ha = StubHomeAssistant()
+        weather_panel.weather = StubWeather()
+        reminders_panel.repository = StubRepository()
+        planes_panel.flights_service = StubFlights()
+    elif fixture is not None and record:
+        from fixtures import RecordingHomeAssistant, RecordingWeather, RecordingRepository, RecordingFlights
+        sensors_panel.ha = RecordingHomeAssistant(config, fixture)
+        weather_panel.weather = RecordingWeather(config, fixture)
+        reminders_panel.repository = RecordingRepository(repository, fixture)
+        planes_panel.flights_service = RecordingFlights(config, fixture)
+    elif fixture is not None:
+        from fixtures import ReplayHomeAssistant, ReplayWeather, ReplayRepository, ReplayFlights
+        sensors_panel.ha = ReplayHomeAssistant(fixture)
+        weather_panel.weather = ReplayWeather(fixture)
+        reminders_panel.repository = ReplayRepository(fixture)
+        planes_panel.flights_service = ReplayFlights(fixture)
+    else:
+        sensors_panel.ha = HomeAssistant(config)
+        weather_panel.weather = Weather(config)
+        reminders_panel.repository = repository
+        reminders_panel.reminder_cache = reminder_cache
+        planes_panel.flights_service = Flights(config)
 
     # Add panels to dashboard quadrants
     dashboard.set_quadrant(sensors_panel, 'top-left')
     dashboard.set_quadrant(weather_panel, 'top-right')
     dashboard.set_quadrant(reminders_panel, 'bottom-left')
     dashboard.set_quadrant(planes_panel, 'bottom-right')
+    return dashboard
+
+async def get_statusboard_image() -> Image.Image:
+    """Generate the complete statusboard image"""
+    init()
+    logger.info('Generating statusboard image')
+
+    dashboard = create_dashboard()
+    dashboard.executor = render_executor
+    dashboard.fetch_guard = fetch_guard
 
     # Render the dashboard
-    return await dashboard.render()
+    return await memory_tracker.measure(dashboard.render())
+
+async def startup():
+    """Restore persisted panel data so the first frame renders without waiting"""
+    init()
+    fetch_guard.load_snapshots()
+    if reminder_cache is not None:
+        await reminder_cache.start()
+
+async def shutdown():
+    """Release resources held by the image generator"""
+    if not _initialized:
+        return
+    if reminder_cache is not None:
+        await reminder_cache.stop()
+    render_executor.shutdown()
 
 async def get_test_image() -> Image.Image:
     """Generate a test image with all components and icons"""
@@ -1,20 +1,18 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+from typing import List, Optional
 
-def configure_logging(config):
-    root = logging.getLogger()
-    print("Configuring logging")
-    # Get log level with proper ConfigParser syntax and fallback
-    try:
-        log_level = config.get("logging", "log_level", fallback="INFO")
-        level = getattr(logging, log_level.upper())
-    except (AttributeError, ValueError):
-        print(f'Logging level {log_level} not valid. Defaulting to INFO')
-        level = logging.INFO
+# Writes queued records to the real handlers on a background thread
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
 
-    root.setLevel(level)
+def _create_handlers(config) -> List[logging.Handler]:
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = []
 
     # Always add console handler for Docker environments
     try:
@@ -25,7 +23,7 @@ def configure_logging(config):
     if stdout_enabled:
         console_handler = logging.StreamHandler(sys.stderr)
         console_handler.setFormatter(formatter)
-        root.addHandler(console_handler)
+        handlers.append(console_handler)
 
     # Add file handler only if log_file is specified
     try:
@@ -33,10 +31,44 @@ def configure_logging(config):
         if log_file:
             file_handler = logging.FileHandler(log_file)
             file_handler.setFormatter(formatter)
-            root.addHandler(file_handler)
+            handlers.append(file_handler)
     except Exception as e:
         print(f"Could not set up file logging: {e}")
 
+    return handlers
+
+def configure_logging(config):
+    """
+    Set up logging once per process; later calls return the root logger
+    unchanged. Records are put on a queue by the logging call and written
+    to the console and log file by a background thread, so a slow disk or
+    terminal never blocks the event loop.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if _listener is not None:
+        return root
+
+    print("Configuring logging")
+    # Get log level with proper ConfigParser syntax and fallback
+    try:
+        log_level = config.get("logging", "log_level", fallback="INFO")
+        level = getattr(logging, log_level.upper())
+    except (AttributeError, ValueError):
+        print(f'Logging level {log_level} not valid. Defaulting to INFO')
+        level = logging.INFO
+
+    root.setLevel(level)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, *_create_handlers(config), respect_handler_level=True)
+    _listener.start()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    # Write out whatever is still queued when the process exits
+    atexit.register(stop_logging)
+
     # Set up requests logging if requested
     try:
         if config.getboolean("logging", "log_requests", fallback=False):
@@ -47,3 +79,11 @@ def configure_logging(config):
         pass
 
     return root
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = _queue_handler = None
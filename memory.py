@@ -0,0 +1,232 @@
+import asyncio
+import gc
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, List, Optional
+from PIL import Image
+import metrics
+
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+# Allocations made by tracemalloc itself and the import machinery are noise
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+def rss_bytes() -> int:
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Without /proc only the peak is available; macOS reports it in bytes, Linux in KiB
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+def _site(stat, group_by: str) -> Any:
+    if group_by == 'traceback':
+        return stat.traceback.format()
+    frame = stat.traceback[0]
+    return frame.filename if group_by == 'filename' else f'{frame.filename}:{frame.lineno}'
+
+def _stat_json(stat, group_by: str) -> Dict[str, Any]:
+    data = {'site': _site(stat, group_by), 'size': stat.size, 'count': stat.count}
+    if hasattr(stat, 'size_diff'):
+        data['size_diff'] = stat.size_diff
+        data['count_diff'] = stat.count_diff
+    return data
+
+class MemoryTracker:
+    """
+    Records how much memory each render leaves behind, and with allocation
+    tracing on, which lines allocated it. Tracing slows every allocation
+    down, so it is off unless started from the config or the debug endpoint.
+    A snapshot is kept after each traced render so the latest one can be
+    compared with the one before it, or with the baseline taken when
+    tracing started.
+    """
+
+    def __init__(self, trace_frames: int = 0, renders: int = 50):
+        self._renders: Deque[Dict[str, Any]] = deque(maxlen=renders)
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._latest: Optional[tracemalloc.Snapshot] = None
+        if trace_frames > 0:
+            self.start(trace_frames)
+        metrics.PROCESS_MEMORY.add_callback(self.gauges)
+
+    @classmethod
+    def from_config(cls, config) -> 'MemoryTracker':
+        """Create a tracker from the [memory] section of the config"""
+        return cls(
+            trace_frames=config.getint('memory', 'trace_frames', fallback=0),
+            renders=config.getint('memory', 'renders', fallback=50))
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        """Start tracing allocations, recording `frames` stack frames for each"""
+        if not self.tracing:
+            tracemalloc.start(frames)
+            logging.info(f"Started allocation tracing with {frames} frames")
+        self._baseline = _snapshot()
+        self._previous = self._latest = None
+
+    def stop(self):
+        if self.tracing:
+            tracemalloc.stop()
+            logging.info("Stopped allocation tracing")
+        self._baseline = self._previous = self._latest = None
+
+    def gauges(self) -> Dict[tuple, float]:
+        values = {('resident',): rss_bytes()}
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            values[('traced',)] = current
+            values[('traced_peak',)] = peak
+        return values
+
+    async def measure(self, render: Awaitable[Image.Image]) -> Image.Image:
+        """Await a render, recording the memory it retained and the peak it reached"""
+        tracing = self.tracing
+        rss_before = rss_bytes()
+        if tracing:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+
+        image = await render
+
+        rss = rss_bytes()
+        record = {
+            'at': time.time(),
+            'seconds': round(time.perf_counter() - started, 4),
+            'rss': rss,
+            'rss_diff': rss - rss_before,
+        }
+        if tracing:
+            traced, peak = tracemalloc.get_traced_memory()
+            record.update(traced=traced, traced_diff=traced - traced_before, traced_peak=peak)
+            # Snapshots walk every live allocation, so take them off the event loop
+            snapshot = await asyncio.to_thread(_snapshot)
+            self._previous, self._latest = self._latest, snapshot
+        self._renders.append(record)
+        return image
+
+    def renders(self) -> List[Dict[str, Any]]:
+        """Memory recorded for recent renders, newest first"""
+        return list(reversed(self._renders))
+
+    def top_allocations(self, limit: int = 20, group_by: str = 'lineno',
+                        compare: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        The sites holding the most memory in the latest snapshot, or with
+        `compare` set to 'previous' or 'baseline', the sites whose memory
+        grew the most since that snapshot
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"Unknown grouping: {group_by}")
+        if compare not in (None, 'previous', 'baseline'):
+            raise ValueError(f"Unknown comparison: {compare}")
+        if not self.tracing:
+            return []
+
+        latest = self._latest or _snapshot()
+        if compare is None:
+            stats = latest.statistics(group_by)
+        else:
+            other = self._previous if compare == 'previous' else self._baseline
+            if other is None:
+                return []
+            stats = latest.compare_to(other, group_by)
+            stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        return [_stat_json(stat, group_by) for stat in stats[:limit]]
+
+async def soak(frames: int, stubs: bool = True, warmup: int = 100, every: int = 100,
+               max_growth: int = 8 * 1024 * 1024, trace_frames: int = 0) -> bool:
+    """
+    Render and encode `frames` frames back to back, and check that resident
+    memory after the last one is within `max_growth` bytes of where it was
+    after `warmup` frames. Returns True if memory stayed flat.
+    """
+    import image_generator
+    from artifacts import ArtifactCache
+    from devices import load_panel_formats
+
+    warmup = max(1, min(warmup, frames))
+    artifacts = ArtifactCache(panel_formats=load_panel_formats(image_generator.config))
+    formats = ['packed', 'bmp', 'png'] + [f'packed:{device}' for device in artifacts.panel_formats]
+    if trace_frames > 0:
+        tracemalloc.start(trace_frames)
+
+    baseline_rss = None
+    baseline_snapshot = None
+    started = time.perf_counter()
+    for i in range(1, frames + 1):
+        dashboard = image_generator.create_dashboard(stubs)
+        dashboard.executor = image_generator.render_executor
+        if not stubs:
+            dashboard.fetch_guard = image_generator.fetch_guard
+        image = await dashboard.render()
+        for fmt in formats:
+            artifacts.encode(image, fmt)
+        del dashboard, image
+
+        if i == warmup:
+            gc.collect()
+            baseline_rss = rss_bytes()
+            if tracemalloc.is_tracing():
+                baseline_snapshot = _snapshot()
+            logging.info(f"Warmed up after {i} frames at {baseline_rss / 2**20:.1f} MiB resident")
+        elif i % every == 0:
+            logging.info(f"Rendered {i}/{frames} frames, {rss_bytes() / 2**20:.1f} MiB resident, "
+                         f"{(time.perf_counter() - started) / i * 1000:.1f}ms per frame")
+
+    gc.collect()
+    growth = rss_bytes() - baseline_rss
+    logging.info(f"Resident memory grew {growth / 2**20:+.2f} MiB over {frames - warmup} frames "
+                 f"(limit {max_growth / 2**20:.1f} MiB)")
+    if baseline_snapshot is not None:
+        stats = _snapshot().compare_to(baseline_snapshot, 'lineno')
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        for stat in stats[:10]:
+            logging.info(f"  {stat}")
+        tracemalloc.stop()
+    return growth <= max_growth
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Soak test: render many frames and check memory stays flat')
+    parser.add_argument('frames', nargs='?', type=int, default=2000, help='Frames to render (default: 2000)')
+    parser.add_argument('--live', action='store_true', help='Fetch from the configured services instead of canned data')
+    parser.add_argument('--warmup', type=int, default=100, help='Frames rendered before the baseline is taken')
+    parser.add_argument('--every', type=int, default=100, help='Log progress every this many frames')
+    parser.add_argument('--max-growth', type=float, default=8.0, help='Allowed growth after warm-up, in MiB')
+    parser.add_argument('--trace', type=int, default=0, metavar='FRAMES',
+                        help='Trace allocations with this many stack frames and list the top growth sites')
+    args = parser.parse_args()
+
+    import image_generator
+
+    async def main():
+        try:
+            return await soak(args.frames, not args.live, args.warmup, args.every,
+                              int(args.max_growth * 2**20), args.trace)
+        finally:
+            await image_generator.shutdown()
+
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,242 @@
+import bisect
+import contextlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import tracing
+
+# Latency buckets in seconds, from a cached lookup up to a slow upstream timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric(ABC):
+    """A metric family with a fixed set of label names"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, not {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """(suffix, label names, label values, value) for every series"""
+        pass
+
+    def expose(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [('', self.labelnames, key, value) for key, value in sorted(self._values.items())]
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: count in each bucket (not cumulative), then sum and count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def samples(self):
+        samples = []
+        names = self.labelnames + ('le',)
+        with self._lock:
+            for key, (counts, (total, count)) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    samples.append(('_bucket', names, key + (_format_value(bound),), cumulative))
+                samples.append(('_sum', self.labelnames, key, total))
+                samples.append(('_count', self.labelnames, key, count))
+        return samples
+
+class CallbackMetric(Metric):
+    """A metric whose values are read from callbacks when it is exposed"""
+
+    def __init__(self, name: str, help: str, type: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self._callbacks: List[Callable[[], Dict[Tuple[str, ...], float]]] = []
+
+    def add_callback(self, callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Add a callback returning {label values: value}"""
+        self._callbacks.append(callback)
+
+    def samples(self):
+        samples = []
+        for callback in self._callbacks:
+            for key, value in sorted(callback().items()):
+                samples.append(('', self.labelnames, key, value))
+        return samples
+
+class Timer(contextlib.ContextDecorator):
+    """
+    Observe how long a block takes, and count it as an error if it raises.
+    The block is also recorded as a span named `span_name` of the current
+    trace, if there is one.
+    """
+
+    def __init__(self, histogram: Histogram, errors: Counter, span_name: Optional[str] = None, **labels):
+        self.histogram = histogram
+        self.errors = errors
+        self.span_name = span_name
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # A fresh timer for each call of a decorated function, so calls can overlap
+        return Timer(self.histogram, self.errors, self.span_name, **self.labels)
+
+    def __enter__(self):
+        self._span = tracing.span(self.span_name) if self.span_name else None
+        if self._span is not None:
+            self._span.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._started, **self.labels)
+        if exc_type is not None:
+            self.errors.inc(**self.labels)
+        if self._span is not None:
+            self._span.__exit__(exc_type, exc, tb)
+        return False
+
+SOURCE_SECONDS = Histogram(
+    'statusboard_source_request_seconds', 'Time spent on requests to each data source', ['source'])
+SOURCE_ERRORS = Counter(
+    'statusboard_source_errors_total', 'Failed requests to each data source', ['source'])
+FETCH_SECONDS = Histogram(
+    'statusboard_panel_fetch_seconds', 'Time taken to fetch each panel\'s data', ['panel'])
+FETCH_ERRORS = Counter(
+    'statusboard_panel_fetch_errors_total', 'Failed panel data fetches', ['panel'])
+STALE_FALLBACKS = Counter(
+    'statusboard_panel_stale_total', 'Renders that fell back to a panel\'s last good data', ['panel'])
+RENDER_SECONDS = Histogram(
+    'statusboard_panel_render_seconds', 'Time taken to render each panel', ['panel'])
+RENDER_QUEUE_SECONDS = Histogram(
+    'statusboard_panel_render_queue_seconds', 'Time each panel waited for a render worker', ['panel'])
+RENDER_ERRORS = Counter(
+    'statusboard_panel_errors_total', 'Panels drawn as an error tile', ['panel'])
+FRAME_SECONDS = Histogram(
+    'statusboard_frame_render_seconds', 'Time taken to fetch data for and render a whole frame')
+FRAME_CHANGES = Counter(
+    'statusboard_frame_changes_total', 'Rendered frames whose content differed from the previous one')
+FRAME_CHANGED_AT = Gauge(
+    'statusboard_frame_last_change_timestamp_seconds', 'Unix time the frame content last changed')
+ENCODE_SECONDS = Histogram(
+    'statusboard_encode_seconds', 'Time taken to encode a frame in each format', ['format'])
+ENCODE_ERRORS = Counter(
+    'statusboard_encode_errors_total', 'Failed frame encodes', ['format'])
+CACHE_REQUESTS = CallbackMetric(
+    'statusboard_cache_requests_total', 'Cache lookups by cache and result', 'counter', ['cache', 'result'])
+CACHE_HIT_RATIO = CallbackMetric(
+    'statusboard_cache_hit_ratio', 'Share of lookups served from each cache', 'gauge', ['cache'])
+CACHE_ENTRIES = CallbackMetric(
+    'statusboard_cache_entries', 'Entries held by each in-process cache', 'gauge', ['cache'])
+CACHE_BYTES = CallbackMetric(
+    'statusboard_cache_bytes', 'Bytes of data held by each in-process cache', 'gauge', ['cache'])
+PROCESS_MEMORY = CallbackMetric(
+    'statusboard_memory_bytes', 'Resident memory, and memory traced by tracemalloc when it is on', 'gauge', ['kind'])
+
+REGISTRY: List[Metric] = [
+    SOURCE_SECONDS, SOURCE_ERRORS, FETCH_SECONDS, FETCH_ERRORS, STALE_FALLBACKS,
+    RENDER_SECONDS, RENDER_QUEUE_SECONDS, RENDER_ERRORS, FRAME_SECONDS, FRAME_CHANGES,
+    FRAME_CHANGED_AT, ENCODE_SECONDS, ENCODE_ERRORS, CACHE_REQUESTS, CACHE_HIT_RATIO,
+    CACHE_ENTRIES, CACHE_BYTES, PROCESS_MEMORY,
+]
+
+# Entry and byte counts of each registered cache, by name
+_cache_sizes: Dict[str, Tuple[Callable[[], int], Optional[Callable[[], int]]]] = {}
+
+def track_source(source: str) -> Timer:
+    """Time a request to a data source such as home_assistant or redis"""
+    return Timer(SOURCE_SECONDS, SOURCE_ERRORS, source, source=source)
+
+def register_cache(name: str, stats: Callable[[], Tuple[int, int]]):
+    """Expose a cache's hit and miss counts, read from `stats` on every scrape"""
+    def requests():
+        hits, misses = stats()
+        return {(name, 'hit'): hits, (name, 'miss'): misses}
+
+    def ratio():
+        hits, misses = stats()
+        return {(name,): hits / (hits + misses) if hits + misses else 0.0}
+
+    CACHE_REQUESTS.add_callback(requests)
+    CACHE_HIT_RATIO.add_callback(ratio)
+
+def register_cache_size(name: str, entries: Callable[[], int], size: Optional[Callable[[], int]] = None):
+    """Expose how many entries a cache holds and, if `size` is given, how many bytes"""
+    _cache_sizes[name] = (entries, size)
+    CACHE_ENTRIES.add_callback(lambda: {(name,): entries()})
+    if size is not None:
+        CACHE_BYTES.add_callback(lambda: {(name,): size()})
+
+def cache_sizes() -> Dict[str, Dict[str, int]]:
+    """Current entry and byte counts of every registered cache"""
+    sizes = {}
+    for name, (entries, size) in _cache_sizes.items():
+        sizes[name] = {'entries': entries()}
+        if size is not None:
+            sizes[name]['bytes'] = size()
+    return sizes
+
+def expose() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return '\n'.join(metric.expose() for metric in REGISTRY) + '\n'
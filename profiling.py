@@ -0,0 +1,113 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+import image_generator
+from artifacts import ArtifactCache
+from drawing import PanelFormat, RenderExecutor
+from fixtures import Fixture
+
+PROFILE_FORMATS = ('stats', 'collapsed')
+
+# Only one profile runs at a time; overlapping profilers would skew each other
+_lock = threading.Lock()
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another is running"""
+
+def render_and_encode(stubs: bool, artifacts: ArtifactCache, formats: Iterable[str],
+                      fixture: Optional[Fixture] = None):
+    """
+    Render one frame and encode it, all in the calling thread: the render
+    runs on a new event loop with an inline executor and the encodes run
+    directly, so a profiler attached to this thread sees all of the work.
+    """
+    async def render():
+        dashboard = image_generator.create_dashboard(stubs, fixture)
+        dashboard.executor = RenderExecutor('inline')
+        return await dashboard.render()
+
+    image = asyncio.run(render())
+    for fmt in formats:
+        artifacts.encode(image, fmt)
+
+def profile_stats(work: Callable[[], None], sort: str = 'cumulative', limit: int = 40) -> str:
+    """Run `work` under cProfile and return the pstats summary"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        work()
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+def profile_collapsed(work: Callable[[], None], interval: float = 0.001) -> str:
+    """
+    Run `work` while sampling its thread's stack every `interval` seconds.
+    Returns one 'outer;...;inner count' line per distinct stack, the input
+    flamegraph.pl and speedscope expect.
+    """
+    target = threading.get_ident()
+    stacks: Counter = Counter()
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                stacks[';'.join(reversed(names))] += 1
+
+    sampler = threading.Thread(target=sample, name='profile-sampler', daemon=True)
+    sampler.start()
+    try:
+        work()
+    finally:
+        done.set()
+        sampler.join()
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+def profile_frame(fmt: str = 'stats', stubs: bool = False, sort: str = 'cumulative', limit: int = 40,
+                  panel_formats: Optional[Dict[str, PanelFormat]] = None,
+                  fixture: Optional[Fixture] = None) -> str:
+    """
+    Profile one full render plus an encode in every format, as a stats
+    summary or collapsed stacks. With `stubs`, panels get canned data
+    instead of calling upstream services, and with a `fixture` they get
+    the responses recorded in it.
+    """
+    if fmt not in PROFILE_FORMATS:
+        raise ValueError(f"Unknown profile format: {fmt}")
+    if sort not in pstats.Stats.sort_arg_dict_default:
+        raise ValueError(f"Unknown sort key: {sort}")
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        artifacts = ArtifactCache(panel_formats=panel_formats)
+        formats = ['packed', 'bmp', 'png'] + [f'packed:{device}' for device in artifacts.panel_formats]
+        started = time.perf_counter()
+        work = lambda: render_and_encode(stubs, artifacts, formats, fixture)
+        if fmt == 'stats':
+            result = profile_stats(work, sort, limit)
+        else:
+            result = profile_collapsed(work)
+        logging.info(f"Profiled a frame in {time.perf_counter() - started:.2f}s")
+        return result
+    finally:
+        _lock.release()
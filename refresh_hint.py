@@ -0,0 +1,111 @@
+import logging
+from collections import deque
+from datetime import datetime, time, timedelta
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+# How often each source's upstream data typically changes, in seconds
+DEFAULT_CADENCES = {
+    'flights': 60,
+    'sensors': 300,
+    'weather': 600,
+    'reminders': 3600,
+}
+
+# Number of recent content changes used to estimate a panel's change rate
+HISTORY_LENGTH = 5
+
+def parse_quiet_hours(value: Optional[str]) -> Optional[Tuple[time, time]]:
+    """Parse a 'HH:MM-HH:MM' window, which may wrap past midnight"""
+    if not value:
+        return None
+    start, end = value.split('-')
+    return time.fromisoformat(start.strip()), time.fromisoformat(end.strip())
+
+class RefreshAdvisor:
+    """
+    Estimates how long a device can sleep before its next poll is worth
+    making, from how often each panel's content has recently changed, the
+    next reminder due time and the configured overnight quiet hours.
+    """
+
+    def __init__(self, min_interval: int = 60, max_interval: int = 3600,
+                 cadences: Optional[Dict[str, int]] = None,
+                 quiet_hours: Optional[Tuple[time, time]] = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cadences = dict(DEFAULT_CADENCES, **(cadences or {}))
+        self.quiet_hours = quiet_hours
+        self._versions: Dict[str, str] = {}
+        self._changes: Dict[str, Deque[datetime]] = {}
+
+    @classmethod
+    def from_config(cls, config) -> 'RefreshAdvisor':
+        """Create an advisor from the [refresh] section of the config"""
+        cadences = {}
+        if config.has_section('refresh'):
+            for option in config.options('refresh'):
+                if option.endswith('_interval') and option not in ('min_interval', 'max_interval'):
+                    cadences[option[:-len('_interval')]] = config.getint('refresh', option)
+        return cls(
+            min_interval=config.getint('refresh', 'min_interval', fallback=60),
+            max_interval=config.getint('refresh', 'max_interval', fallback=3600),
+            cadences=cadences,
+            quiet_hours=parse_quiet_hours(config.get('refresh', 'quiet_hours', fallback=None)))
+
+    def observe(self, panel_versions: Dict[str, str], now: datetime):
+        """Record the content version of each panel in a newly rendered frame"""
+        for name, version in panel_versions.items():
+            changes = self._changes.setdefault(name, deque(maxlen=HISTORY_LENGTH))
+            if self._versions.get(name) != version:
+                self._versions[name] = version
+                changes.append(now)
+
+    def _next_change(self, name: str, now: datetime) -> datetime:
+        """When a panel's content is next expected to change"""
+        changes = self._changes.get(name)
+        if not changes:
+            return now + timedelta(seconds=self.cadences.get(name, self.max_interval))
+
+        # Mean gap between recent changes, or the source's cadence until there is one
+        if len(changes) > 1:
+            interval = (changes[-1] - changes[0]).total_seconds() / (len(changes) - 1)
+        else:
+            interval = self.cadences.get(name, self.max_interval)
+        return changes[-1] + timedelta(seconds=interval)
+
+    def _quiet_until(self, moment: datetime) -> Optional[datetime]:
+        """End of the quiet hours window containing `moment`, if it is in one"""
+        if self.quiet_hours is None:
+            return None
+        start, end = self.quiet_hours
+        current = moment.timetz().replace(tzinfo=None)
+        if start <= end:
+            quiet = start <= current < end
+        else:
+            quiet = current >= start or current < end
+        if not quiet:
+            return None
+        until = moment.replace(hour=end.hour, minute=end.minute, second=0, microsecond=0)
+        return until if until > moment else until + timedelta(days=1)
+
+    def hint(self, now: datetime, reminder_times: Iterable[datetime] = ()) -> int:
+        """Seconds until the next poll is worth making"""
+        next_poll = min((self._next_change(name, now) for name in self._changes),
+                        default=now + timedelta(seconds=self.max_interval))
+        next_poll = min(max(next_poll, now + timedelta(seconds=self.min_interval)),
+                        now + timedelta(seconds=self.max_interval))
+
+        # Sleep through quiet hours, whether they have started or start before the next poll
+        quiet_until = self._quiet_until(now) or self._quiet_until(next_poll)
+        if quiet_until is not None:
+            next_poll = quiet_until
+
+        # But always wake for the next reminder that falls due
+        reminder_times = [t if t.tzinfo else t.replace(tzinfo=now.tzinfo) for t in reminder_times]
+        upcoming = [t for t in reminder_times if t > now]
+        if upcoming:
+            next_poll = min(next_poll, max(min(upcoming), now + timedelta(seconds=self.min_interval)))
+
+        seconds = int((next_poll - now).total_seconds())
+        logging.debug("Refresh hint is %ss", seconds)
+        return seconds
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Dict, Iterable, List
 
 @dataclass
 class Reminder:
@@ -8,4 +9,29 @@ class Reminder:
     time: datetime
     list: str
     location: str
-    completed: bool
\ No newline at end of file
+    completed: bool
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'message': self.message,
+            'time': self.time.isoformat() if self.time else None,
+            'list': self.list,
+            'location': self.location,
+            'completed': self.completed
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'Reminder':
+        data = dict(data)
+        if data['time'] and not isinstance(data['time'], datetime):
+            data['time'] = datetime.fromisoformat(data['time'])
+        return cls(**data)
+
+def sort_reminders(reminders: Iterable[Reminder]) -> List[Reminder]:
+    """Undated reminders first, then dated ones by time"""
+    reminders = list(reminders)
+    undated = [r for r in reminders if r.time is None or not isinstance(r.time, datetime)]
+    dated = sorted((r for r in reminders if r.time is not None and isinstance(r.time, datetime)),
+                   key=lambda r: r.time)
+    return undated + dated
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import redis.asyncio
+from reminder import Reminder, sort_reminders
+from repository import REMINDER_CHANNEL, Repository
+
+# Seconds to wait before resubscribing after losing the Redis connection
+RECONNECT_DELAY = 5.0
+
+class ReminderCache:
+    """
+    An in-process copy of the stored reminders, kept sorted for the
+    reminders panel. Writes through the repository announce changed ids on
+    a pub/sub channel, and Redis keyspace notifications, when the server
+    has them enabled, report keys changed by anything else. Expiry is
+    tracked locally from each reminder's TTL. Listeners are called
+    whenever the cached reminders change.
+    """
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self.client = redis.asyncio.StrictRedis(host=repository.host, port=repository.port,
+                                                decode_responses=True)
+        db = repository.client.connection_pool.connection_kwargs.get('db', 0)
+        self.keyspace_pattern = f'__keyspace@{db}__:reminder:*'
+
+        self._entries: Dict[str, Tuple[Reminder, Optional[float]]] = {}
+        self._sorted: List[Reminder] = []
+        self._listeners: List[Callable[[], None]] = []
+        self._expiry: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        # Only true while subscribed, so no change can be missed
+        self.live = False
+
+    @classmethod
+    def from_config(cls, config, repository: Repository) -> Optional['ReminderCache']:
+        """Create a cache unless it is disabled in the [redis] section"""
+        if not config.getboolean('redis', 'reminder_cache', fallback=True):
+            return None
+        return cls(repository)
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Call `listener` whenever the cached reminders change"""
+        self._listeners.append(listener)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reminders(self) -> Optional[List[Reminder]]:
+        """The cached reminders, sorted, or None if the cache is not live"""
+        return self._sorted if self.live else None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._listen())
+
+    async def stop(self):
+        self.live = False
+        if self._expiry is not None:
+            self._expiry.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.client.aclose()
+
+    async def _listen(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(REMINDER_CHANNEL)
+                await pubsub.psubscribe(self.keyspace_pattern)
+                # Anything could have changed while unsubscribed
+                await self._reload()
+                self.live = True
+                logging.info(f"Reminder cache loaded {len(self._entries)} reminders")
+                async for message in pubsub.listen():
+                    await self._handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Reminder cache lost its Redis subscription: {e}")
+            finally:
+                self.live = False
+                await pubsub.aclose()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _handle(self, message: dict):
+        if message['type'] == 'message':
+            if message['data'] == '*':
+                await self._reload()
+            else:
+                await self._update(message['data'])
+        elif message['type'] == 'pmessage':
+            # Keyspace channels end in the key name, reminder:<id>
+            reminder_id = message['channel'].split(':', 2)[2]
+            if message['data'] in ('del', 'expired', 'evicted'):
+                self._entries.pop(reminder_id, None)
+                self._changed()
+            elif message['data'] in ('set', 'expire'):
+                await self._update(reminder_id)
+
+    async def _reload(self):
+        self._entries = await asyncio.to_thread(self.repository.load_reminders)
+        self._changed()
+
+    async def _update(self, reminder_id: str):
+        loaded = await asyncio.to_thread(self.repository.load_reminders, [reminder_id])
+        if reminder_id in loaded:
+            self._entries[reminder_id] = loaded[reminder_id]
+        else:
+            self._entries.pop(reminder_id, None)
+        self._changed()
+
+    def _changed(self):
+        """Drop expired reminders, re-sort and tell listeners if anything is different"""
+        now = time.time()
+        self._entries = {reminder_id: (reminder, expires_at)
+                         for reminder_id, (reminder, expires_at) in self._entries.items()
+                         if expires_at is None or expires_at > now}
+        reminders = sort_reminders(reminder for reminder, _ in self._entries.values())
+        changed = reminders != self._sorted
+        self._sorted = reminders
+
+        # Wake up to drop the next reminder to expire, even without a notification for it
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        expiries = [expires_at for _, expires_at in self._entries.values() if expires_at is not None]
+        if expiries:
+            self._expiry = asyncio.get_running_loop().call_later(min(expiries) - now, self._changed)
+
+        if not changed:
+            return
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logging.error(f"Error notifying reminder cache listener: {e}")
@@ -1,68 +1,287 @@
 import redis
 import json
-from reminder import Reminder
+import hashlib
+import time
 from datetime import datetime
+from reminder import Reminder
+from typing import Dict, List, Optional, Tuple
 import logging
+import metrics
 
 # Default TTL for reminders (8 hours in seconds)
 DEFAULT_REMINDER_TTL = 60 * 60 * 8
 
+# Hash of reminder id to content hash, for every stored reminder
+REMINDER_INDEX = 'reminders:index'
+# Sorted set of reminder ids scored by due time; reminders without one sort last
+REMINDER_TIMES = 'reminders:by_time'
+# Set once reminders saved before the indexes existed have been indexed
+INDEX_MIGRATED = 'reminders:indexed'
+# Pub/sub channel announcing the id of each changed reminder, or '*' when
+# many may have changed at once
+REMINDER_CHANNEL = 'reminders:changes'
+
+# Removes index entries whose reminders have expired, checking each key
+# atomically so a reminder saved in the meantime keeps its entry
+PRUNE_INDEX_SCRIPT = """
+for _, reminder_id in ipairs(ARGV) do
+    if redis.call('exists', 'reminder:' .. reminder_id) == 0 then
+        redis.call('hdel', KEYS[1], reminder_id)
+        redis.call('zrem', KEYS[2], reminder_id)
+    end
+end
+"""
+
+# Reminders fetched per round trip while filling a page
+QUERY_BATCH = 100
+
+def _time_score(reminder_json: dict) -> float:
+    """Sort score of a reminder: its due time as a unix timestamp"""
+    if not reminder_json.get('time'):
+        return float('inf')
+    return datetime.fromisoformat(reminder_json['time']).timestamp()
+
+def _score_arg(score: float) -> str:
+    return '+inf' if score == float('inf') else repr(score)
+
+def _is_completed(value) -> bool:
+    # Shortcuts sends "Yes"/"No", other clients send booleans
+    if isinstance(value, str):
+        return value.lower() in ('yes', 'true', '1')
+    return bool(value)
+
 class Repository:
 
     def __init__(self, config):
         self.host = config.get('redis', 'host', fallback='redis')
         self.port = config.getint('redis', 'port', fallback=6379)
         self.client = redis.StrictRedis(host=self.host, port=self.port, decode_responses=True)
-        self.reminder_ttl = config.get('redis', 'reminder_ttl', fallback=DEFAULT_REMINDER_TTL)
+        self.reminder_ttl = config.getint('redis', 'reminder_ttl', fallback=DEFAULT_REMINDER_TTL)
+        self._index_checked = False
+        self._prune_index = self.client.register_script(PRUNE_INDEX_SCRIPT)
         logging.info(f"Connected to Redis at {self.host}:{self.port}")
 
+    @staticmethod
+    def _serialize(reminder: Reminder) -> str:
+        return json.dumps(reminder.to_json())
+
+    @staticmethod
+    def _content_hash(reminder_data: str) -> str:
+        return hashlib.blake2b(reminder_data.encode(), digest_size=16).hexdigest()
+
+    def _ensure_index(self):
+        """Index reminders saved before the indexes existed"""
+        if self._index_checked:
+            return
+        # A marker rather than the index keys themselves, which a save can
+        # create before older reminders have been indexed
+        if not self.client.exists(INDEX_MIGRATED):
+            keys = list(self.client.scan_iter('reminder:*'))
+            stored = {}
+            if keys:
+                values = self.client.mget(keys)
+                stored = {key[len('reminder:'):]: value for key, value in zip(keys, values) if value}
+            pipe = self.client.pipeline()
+            if stored:
+                pipe.hset(REMINDER_INDEX, mapping={reminder_id: self._content_hash(value)
+                                                   for reminder_id, value in stored.items()})
+                pipe.zadd(REMINDER_TIMES, {reminder_id: _time_score(json.loads(value))
+                                           for reminder_id, value in stored.items()})
+            pipe.set(INDEX_MIGRATED, 1)
+            pipe.execute()
+            logging.info(f"Indexed {len(stored)} existing reminders")
+        self._index_checked = True
+
+    @metrics.track_source('redis')
     def save_reminder(self, reminder: Reminder):
         """Serialize and save a Reminder object in Redis."""
+        self._ensure_index()
         reminder_key = f"reminder:{reminder.id}"
-        reminder_data = json.dumps({
-            'id': reminder.id,
-            'message': reminder.message,
-            'time': reminder.time.isoformat() if reminder.time else None,
-            'list': reminder.list,
-            'location': reminder.location,
-            'completed': reminder.completed
-        })
-        logging.info(f"Saving reminder with key: {reminder_key} and data: {reminder_data}")
-        self.client.set(reminder_key, reminder_data, ex=self.reminder_ttl)
+        reminder_data = self._serialize(reminder)
+        logging.debug("Saving reminder %s", reminder_key)
+        pipe = self.client.pipeline()
+        pipe.set(reminder_key, reminder_data, ex=self.reminder_ttl)
+        pipe.hset(REMINDER_INDEX, reminder.id, self._content_hash(reminder_data))
+        pipe.zadd(REMINDER_TIMES, {reminder.id: _time_score(reminder.to_json())})
+        pipe.publish(REMINDER_CHANNEL, reminder.id)
+        pipe.execute()
+
+    @metrics.track_source('redis')
+    def sync_reminders(self, reminders: List[Reminder]) -> Dict[str, int]:
+        """
+        Make the stored reminders match the given set in one pipeline: write
+        only new or changed reminders, refresh the TTL of unchanged ones and
+        delete any that are no longer in the set.
+        """
+        self._ensure_index()
+        payloads = {reminder.id: self._serialize(reminder) for reminder in reminders}
+        hashes = {reminder_id: self._content_hash(data) for reminder_id, data in payloads.items()}
+        stored = self.client.hgetall(REMINDER_INDEX)
+
+        # Index entries can outlive their reminders, which expire, so only
+        # reminders whose keys still exist count as stored
+        indexed = list(stored)
+        pipe = self.client.pipeline(transaction=False)
+        for reminder_id in indexed:
+            pipe.exists(f"reminder:{reminder_id}")
+        existing = {reminder_id for reminder_id, exists in zip(indexed, pipe.execute()) if exists}
+        unchanged = {reminder_id for reminder_id, digest in hashes.items()
+                     if reminder_id in existing and stored[reminder_id] == digest}
+
+        counts = {'created': 0, 'updated': 0, 'unchanged': len(unchanged), 'deleted': 0}
+        pipe = self.client.pipeline()
+        for reminder_id, reminder_data in payloads.items():
+            reminder_key = f"reminder:{reminder_id}"
+            if reminder_id in unchanged:
+                pipe.expire(reminder_key, self.reminder_ttl)
+                continue
+            counts['updated' if reminder_id in existing else 'created'] += 1
+            pipe.set(reminder_key, reminder_data, ex=self.reminder_ttl)
+            pipe.hset(REMINDER_INDEX, reminder_id, hashes[reminder_id])
+            pipe.zadd(REMINDER_TIMES, {reminder_id: _time_score(json.loads(reminder_data))})
 
+        removed = [reminder_id for reminder_id in stored if reminder_id not in payloads]
+        for reminder_id in removed:
+            pipe.delete(f"reminder:{reminder_id}")
+        if removed:
+            pipe.hdel(REMINDER_INDEX, *removed)
+            pipe.zrem(REMINDER_TIMES, *removed)
+            counts['deleted'] = sum(1 for reminder_id in removed if reminder_id in existing)
+        # Unchanged reminders have new TTLs too, so have listeners reload everything
+        pipe.publish(REMINDER_CHANNEL, '*')
+        pipe.execute()
+
+        logging.info(f"Synced reminders: {counts}")
+        return counts
+
+    @metrics.track_source('redis')
     def get_reminder(self, reminder_id: str) -> Reminder:
         """Fetch and deserialize a Reminder object from Redis."""
         reminder_key = f"reminder:{reminder_id}"
-        logging.info(f"Fetching reminder with key: {reminder_key}")
+        logging.debug("Fetching reminder %s", reminder_key)
         reminder_data = self.client.get(reminder_key)
         if reminder_data:
             reminder_dict = json.loads(reminder_data)
-            if reminder_dict['time'] and not isinstance(reminder_dict['time'], datetime):
-                reminder_dict['time'] = datetime.fromisoformat(reminder_dict['time'])
-            logging.info(f"Reminder found: {reminder_dict}")
-            return Reminder(**reminder_dict)
+            logging.debug("Reminder %s found", reminder_key)
+            return Reminder.from_json(reminder_dict)
         logging.warning(f"Reminder with key {reminder_key} not found")
         return None
 
+    @metrics.track_source('redis')
+    def load_reminders(self, reminder_ids: Optional[List[str]] = None) -> Dict[str, Tuple[Reminder, Optional[float]]]:
+        """
+        Fetch reminders with the unix time each one expires at, for all
+        reminders or just the given ids. Ids that no longer exist are left out.
+        """
+        self._ensure_index()
+        if reminder_ids is None:
+            reminder_ids = self.client.hkeys(REMINDER_INDEX)
+        pipe = self.client.pipeline(transaction=False)
+        for reminder_id in reminder_ids:
+            pipe.get(f"reminder:{reminder_id}")
+            pipe.pttl(f"reminder:{reminder_id}")
+        results = pipe.execute()
+
+        now = time.time()
+        reminders = {}
+        for reminder_id, reminder_data, ttl in zip(reminder_ids, results[::2], results[1::2]):
+            if reminder_data:
+                expires_at = now + ttl / 1000 if ttl > 0 else None
+                reminders[reminder_id] = (Reminder.from_json(json.loads(reminder_data)), expires_at)
+        return reminders
+
+    @metrics.track_source('redis')
     def get_all_reminders(self) -> list[Reminder]:
         """Fetch all reminders from Redis and return them as a list of Reminder objects."""
-        logging.info("Fetching all reminders")
-        keys = self.client.keys('reminder:*')
+        logging.debug("Fetching all reminders")
+        self._ensure_index()
+        reminder_ids = self.client.hkeys(REMINDER_INDEX)
         reminders = []
-        for key in keys:
-            reminder_data = self.client.get(key)
-            if reminder_data:
-                reminder_dict = json.loads(reminder_data)
-                if reminder_dict['time'] and not isinstance(reminder_dict['time'], datetime):
-                    reminder_dict['time'] = datetime.fromisoformat(reminder_dict['time'])
-                reminders.append(Reminder(**reminder_dict))
-        logging.info(f"Total reminders fetched: {len(reminders)}")
+        expired = []
+        if reminder_ids:
+            values = self.client.mget([f"reminder:{reminder_id}" for reminder_id in reminder_ids])
+            for reminder_id, reminder_data in zip(reminder_ids, values):
+                if reminder_data:
+                    reminders.append(Reminder.from_json(json.loads(reminder_data)))
+                else:
+                    expired.append(reminder_id)
+        if expired:
+            # Drop index entries for reminders whose TTL has run out
+            self._prune_index(keys=[REMINDER_INDEX, REMINDER_TIMES], args=expired)
+        logging.debug("Total reminders fetched: %d", len(reminders))
         return reminders
 
+    @metrics.track_source('redis')
+    def query_reminders(self, list_name: Optional[str] = None, completed: Optional[bool] = None,
+                        start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """
+        Find reminders ordered by due time, as their stored JSON strings.
+        The time window is read from the time index; list and completed
+        filters are applied to each batch fetched from it. Returns one page
+        of at most `limit` reminders and the cursor for the next page, or
+        None once there are no more.
+        """
+        self._ensure_index()
+        min_score = _score_arg(start.timestamp()) if start else '-inf'
+        max_score = _score_arg(end.timestamp()) if end else '+inf'
+
+        # The cursor is the score and id of the last reminder already returned;
+        # ids with equal scores are ordered by id, so skip up to and including it
+        after = None
+        if cursor:
+            score, _, reminder_id = cursor.partition(':')
+            after = (float(score), reminder_id)
+            if after[0] > float(max_score):
+                return [], None
+            min_score = max(min_score, _score_arg(after[0]), key=float)
+
+        results = []
+        expired = []
+        offset = 0
+        last = None
+        while limit is None or len(results) < limit:
+            fetched = self.client.zrangebyscore(REMINDER_TIMES, min_score, max_score,
+                                                start=offset, num=QUERY_BATCH, withscores=True)
+            offset += len(fetched)
+            batch = [(reminder_id, score) for reminder_id, score in fetched
+                     if after is None or (score, reminder_id) > after]
+            values = self.client.mget([f"reminder:{reminder_id}" for reminder_id, _ in batch]) if batch else []
+            for (reminder_id, score), reminder_data in zip(batch, values):
+                if limit is not None and len(results) >= limit:
+                    break
+                last = (score, reminder_id)
+                if not reminder_data:
+                    expired.append(reminder_id)
+                    continue
+                if list_name is not None or completed is not None:
+                    reminder_json = json.loads(reminder_data)
+                    if list_name is not None and reminder_json['list'] != list_name:
+                        continue
+                    if completed is not None and _is_completed(reminder_json['completed']) != completed:
+                        continue
+                results.append(reminder_data)
+            if len(fetched) < QUERY_BATCH:
+                break
+
+        if expired:
+            self._prune_index(keys=[REMINDER_INDEX, REMINDER_TIMES], args=expired)
+
+        next_cursor = None
+        if limit is not None and len(results) >= limit and last is not None:
+            next_cursor = f"{last[0]!r}:{last[1]}"
+        logging.debug("Query matched %d reminders", len(results))
+        return results, next_cursor
+
+    @metrics.track_source('redis')
     def delete_all_reminders(self):
         """Delete all reminders from Redis."""
         logging.info("Deleting all reminders")
-        keys = self.client.keys('reminder:*')
+        keys = list(self.client.scan_iter('reminder:*'))
+        pipe = self.client.pipeline()
         for key in keys:
-            self.client.delete(key)
+            pipe.delete(key)
+        pipe.delete(REMINDER_INDEX, REMINDER_TIMES)
+        pipe.publish(REMINDER_CHANNEL, '*')
+        pipe.execute()
         logging.info(f"Deleted {len(keys)} reminders")
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import redis.asyncio
+from PIL import Image
+from artifacts import frame_hash
+
+FRAME_KEY = 'frame:latest'
+LEASE_KEY = 'frame:lease'
+
+# Keep the last frame well past its freshness, so a worker always has
+# something to serve while another renders
+FRAME_RETENTION = 24 * 60 * 60
+
+# Deletes the lease only if this worker still holds it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class SharedFrameCache:
+    """
+    The latest rendered frame, shared in Redis by every worker. A frame is
+    fresh for `max_age` seconds; after that the first worker to take the
+    render lease renders the next one, and every other worker serves the
+    frame already in Redis until it lands. Only a worker holding the lease
+    ever renders.
+    """
+
+    def __init__(self, host: str, port: int, max_age: float = 15.0, lease: float = 20.0,
+                 poll_interval: float = 0.1):
+        # Frames are binary, so this client doesn't decode responses
+        self.client = redis.asyncio.StrictRedis(host=host, port=port)
+        self.max_age = max_age
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.token = uuid.uuid4().hex.encode()
+        self._release = self.client.register_script(RELEASE_SCRIPT)
+        # Frames served from Redis, and frames this worker had to render
+        self.hits = 0
+        self.misses = 0
+        # Last frame decoded from Redis, so an unchanged frame is not fetched again
+        self._local: Optional[Tuple[Tuple[bytes, bytes], Image.Image]] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional['SharedFrameCache']:
+        """Create a cache if shared frames are enabled in the [render] section"""
+        if not config.getboolean('render', 'shared_frames', fallback=False):
+            return None
+        return cls(
+            host=config.get('redis', 'host', fallback='redis'),
+            port=config.getint('redis', 'port', fallback=6379),
+            max_age=config.getfloat('render', 'shared_max_age', fallback=15.0),
+            lease=config.getfloat('render', 'shared_lease', fallback=20.0))
+
+    async def get(self, render: Callable[[], Awaitable[Image.Image]]) -> Image.Image:
+        """Return the shared frame, rendering it only if it is stale and this worker wins the lease"""
+        try:
+            while True:
+                frame, rendered_at = await self._load()
+                if frame is not None and time.time() - rendered_at < self.max_age:
+                    self.hits += 1
+                    return frame
+
+                if await self.client.set(LEASE_KEY, self.token, nx=True, px=int(self.lease * 1000)):
+                    break
+
+                if frame is not None:
+                    logging.debug("Serving the previous shared frame while another worker renders")
+                    self.hits += 1
+                    return frame
+                # Nothing to serve yet; wait for the lease holder's frame, or for its lease to run out
+                await asyncio.sleep(self.poll_interval)
+        except redis.RedisError as e:
+            logging.error(f"Shared frame cache unavailable, rendering locally: {e}")
+            return await render()
+
+        # This worker holds the lease; store the frame before letting another take it
+        self.misses += 1
+        try:
+            image = await render()
+            await self._store(image)
+        finally:
+            await self._release_lease()
+        return image
+
+    async def _load(self) -> Tuple[Optional[Image.Image], float]:
+        digest, version, rendered_at = await self.client.hmget(FRAME_KEY, ['frame_hash', 'version', 'rendered_at'])
+        if digest is None:
+            return None, 0.0
+        if self._local is not None and self._local[0] == (digest, version):
+            return self._local[1], float(rendered_at)
+
+        fields = await self.client.hgetall(FRAME_KEY)
+        if not fields:
+            return None, 0.0
+        image = Image.frombytes(fields[b'mode'].decode(),
+                                (int(fields[b'width']), int(fields[b'height'])),
+                                fields[b'data'])
+        image.info['frame_hash'] = fields[b'frame_hash'].decode()
+        image.info['version'] = fields[b'version'].decode()
+        image.info['panel_versions'] = json.loads(fields[b'panel_versions'])
+        self._local = ((fields[b'frame_hash'], fields[b'version']), image)
+        return image, float(fields[b'rendered_at'])
+
+    async def _store(self, image: Image.Image):
+        fields: Dict[str, object] = {
+            'data': image.tobytes(),
+            'mode': image.mode,
+            'width': image.width,
+            'height': image.height,
+            'frame_hash': frame_hash(image),
+            'version': image.info.get('version') or frame_hash(image),
+            'panel_versions': json.dumps(image.info.get('panel_versions', {})),
+            'rendered_at': repr(time.time()),
+        }
+        pipe = self.client.pipeline()
+        pipe.hset(FRAME_KEY, mapping=fields)
+        pipe.expire(FRAME_KEY, FRAME_RETENTION)
+        try:
+            await pipe.execute()
+        except redis.RedisError as e:
+            logging.error(f"Could not store the shared frame: {e}")
+            return
+        self._local = ((fields['frame_hash'].encode(), fields['version'].encode()), image)
+        logging.info(f"Stored shared frame {fields['frame_hash']}")
+
+    async def _release_lease(self):
+        try:
+            await self._release(keys=[LEASE_KEY], args=[self.token])
+        except redis.RedisError as e:
+            # The lease runs out on its own
+            logging.error(f"Could not release the render lease: {e}")
+
+    async def invalidate(self):
+        """Make the next request render a new frame, whichever worker serves it"""
+        try:
+            await self.client.hset(FRAME_KEY, 'rendered_at', 0)
+        except redis.RedisError as e:
+            logging.error(f"Could not invalidate the shared frame: {e}")
+
+    async def close(self):
+        await self.client.aclose()
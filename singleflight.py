@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import tracing
+
+@dataclass
+class FlightStats:
+    requests: int = 0
+    executions: int = 0
+    coalesced: int = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+    Callers arriving while a call is in flight, or within `grace` seconds of
+    it finishing, share its result instead of starting their own.
+    """
+
+    def __init__(self, grace: float = 0.0):
+        self.grace = grace
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, float]] = {}
+        self._stats: Dict[Hashable, FlightStats] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join a call for the same key that is already running"""
+        stats = self._stats.setdefault(key, FlightStats())
+        stats.requests += 1
+
+        call = self._calls.get(key)
+        if call is not None:
+            task, finished_at = call
+            if not task.done() or time.monotonic() - finished_at <= self.grace:
+                stats.coalesced += 1
+                logging.debug("Coalesced request for %s", key)
+                return await asyncio.shield(task)
+
+        stats.executions += 1
+        # Run as a separate task so a cancelled caller doesn't cancel everyone
+        # else, and outside the first caller's trace since it is shared
+        task = tracing.detached(fn())
+        self._calls[key] = (task, 0.0)
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key, (None,))[0] is not task:
+            return
+        failed = task.cancelled() or task.exception() is not None
+        if failed or self.grace <= 0:
+            # Never share failures beyond the callers that were already waiting
+            del self._calls[key]
+        else:
+            self._calls[key] = (task, time.monotonic())
+
+    def forget(self, key: Hashable):
+        """Stop sharing a finished call's result, so the next call for key runs fresh"""
+        call = self._calls.get(key)
+        if call is not None and call[0].done():
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Request, execution and coalesced counts for each key"""
+        return {str(key): asdict(stats) for key, stats in self._stats.items()}
@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import redis
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+class SnapshotStore(ABC):
+    """Persists the last good data fetched for each panel"""
+
+    @abstractmethod
+    def save(self, name: str, snapshot: Any, fetched_at: datetime):
+        """Store a panel's last good snapshot and when it was fetched"""
+        pass
+
+    @abstractmethod
+    def load_all(self) -> Dict[str, Tuple[Any, datetime]]:
+        """Every stored snapshot and its fetch time, by panel name"""
+        pass
+
+    @staticmethod
+    def encode(snapshot: Any, fetched_at: datetime) -> str:
+        return json.dumps({'fetched_at': fetched_at.isoformat(), 'data': snapshot},
+                          separators=(',', ':'))
+
+    @staticmethod
+    def decode(payload: str) -> Tuple[Any, datetime]:
+        record = json.loads(payload)
+        return record['data'], datetime.fromisoformat(record['fetched_at'])
+
+class FileSnapshotStore(SnapshotStore):
+    """Stores one compact JSON file per panel in a directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def save(self, name: str, snapshot: Any, fetched_at: datetime):
+        target = os.path.join(self.path, f'{name}.json')
+        temp = f'{target}.tmp'
+        with open(temp, 'w') as f:
+            f.write(self.encode(snapshot, fetched_at))
+        # Replace atomically so a crash never leaves a half-written snapshot
+        os.replace(temp, target)
+
+    def load_all(self) -> Dict[str, Tuple[Any, datetime]]:
+        snapshots = {}
+        for filename in os.listdir(self.path):
+            if not filename.endswith('.json'):
+                continue
+            name = filename[:-len('.json')]
+            try:
+                with open(os.path.join(self.path, filename)) as f:
+                    snapshots[name] = self.decode(f.read())
+            except Exception as e:
+                logging.error(f"Could not load {name} snapshot: {e}")
+        return snapshots
+
+class RedisSnapshotStore(SnapshotStore):
+    """Stores snapshots in Redis under snapshot:<name> keys"""
+
+    def __init__(self, config):
+        host = config.get('redis', 'host', fallback='redis')
+        port = config.getint('redis', 'port', fallback=6379)
+        self.client = redis.StrictRedis(host=host, port=port, decode_responses=True)
+
+    def save(self, name: str, snapshot: Any, fetched_at: datetime):
+        self.client.set(f'snapshot:{name}', self.encode(snapshot, fetched_at))
+
+    def load_all(self) -> Dict[str, Tuple[Any, datetime]]:
+        snapshots = {}
+        for key in self.client.scan_iter('snapshot:*'):
+            name = key[len('snapshot:'):]
+            try:
+                payload = self.client.get(key)
+                if payload:
+                    snapshots[name] = self.decode(payload)
+            except Exception as e:
+                logging.error(f"Could not load {name} snapshot: {e}")
+        return snapshots
+
+def get_snapshot_store(config) -> Optional[SnapshotStore]:
+    """Create the snapshot store selected by [snapshots] backend, if any"""
+    backend = config.get('snapshots', 'backend', fallback='none')
+    if backend == 'file':
+        return FileSnapshotStore(config.get('snapshots', 'path', fallback='snapshots'))
+    if backend == 'redis':
+        return RedisSnapshotStore(config)
+    if backend != 'none':
+        logging.error(f"Unknown snapshot backend {backend}, snapshots disabled")
+    return None
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from typing import List
+from flights import Flight, Flights
+from reminder import Reminder
+from weather import Weather
+
+# Canned data sources with representative content, for profiling and
+# benchmarking renders without waiting on the network
+
+STUB_STATES = {
+    'sensor.ix_xdrive50_remaining_battery_percent': '64',
+    'sensor.ix_xdrive50_charging_target': '80',
+    'binary_sensor.ix_xdrive50_charging_status_2': 'on',
+    'binary_sensor.ix_xdrive50_connection_status': 'on',
+    'sensor.ix_xdrive50_remaining_range_total': '312',
+    'sensor.cyberpower_battery_charge': '100',
+    'alarm_control_panel.blink_indoor': 'disarmed',
+    'alarm_control_panel.blink_outdoor': 'armed_away',
+    'sensor.picton_temperature': '21.5',
+    'sensor.picton_humidity': '41',
+    'sensor.living_room_temperature': '22.1',
+    'sensor.living_room_humidity': '39',
+}
+
+STUB_WEATHER = {
+    'weather': [{'id': 803, 'main': 'Clouds', 'description': 'broken clouds'}],
+    'main': {'temp': 12.4, 'temp_min': 9.8, 'temp_max': 14.1, 'humidity': 72},
+    'wind': {'speed': 4.6},
+}
+
+STUB_AIRCRAFT = [
+    {'hex': 'c0ffee', 'flight': 'ACA123  ', 't': 'B38M', 'alt_baro': 11000, 'gs': 310.2,
+     'lat': 43.71, 'lon': -79.52, 'r_dst': 4.2, 'track': 245.0},
+    {'hex': 'c0ff01', 'flight': 'WJA456  ', 't': 'B737', 'alt_baro': 24000, 'gs': 402.8,
+     'lat': 43.82, 'lon': -79.21, 'r_dst': 11.7, 'track': 80.5},
+    {'hex': 'c0ff02', 'flight': 'POE789  ', 't': 'DH8D', 'alt_baro': 3500, 'gs': 188.0,
+     'lat': 43.63, 'lon': -79.40, 'r_dst': 18.3, 'track': 120.0},
+]
+
+STUB_ROUTES = {
+    'ACA123': 'Toronto → Vancouver',
+    'WJA456': 'Calgary → Toronto',
+    'POE789': 'Toronto → Ottawa',
+}
+
+class StubHomeAssistant:
+    async def get_value(self, entity_id: str) -> dict:
+        return {'entity_id': entity_id, 'state': STUB_STATES.get(entity_id, 'unknown')}
+
+class StubWeather(Weather):
+    def __init__(self):
+        pass
+
+    async def get_weather(self):
+        return STUB_WEATHER
+
+class StubFlights(Flights):
+    def __init__(self):
+        pass
+
+    async def get_flights(self):
+        return {'aircraft': [dict(aircraft) for aircraft in STUB_AIRCRAFT]}
+
+    async def enrich_flights_with_routes(self, flights: List[Flight]) -> List[Flight]:
+        for flight in flights:
+            flight.route = STUB_ROUTES.get((flight.flight or '').strip())
+        return flights
+
+class StubRepository:
+    def get_all_reminders(self) -> List[Reminder]:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return [
+            Reminder('stub-1', 'Take out the recycling', None, 'Home', '', False),
+            Reminder('stub-2', 'Dentist appointment', today + timedelta(days=1, hours=9, minutes=30),
+                     'Personal', 'Main St Dental', False),
+            Reminder('stub-3', 'Renew car registration', today + timedelta(days=3), 'Personal', '', False),
+            Reminder('stub-4', 'Call the plumber', today + timedelta(hours=16), 'Home', '', False),
+        ]
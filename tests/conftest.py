@@ -0,0 +1,30 @@
+import configparser
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def redis_config(redis_server, monkeypatch):
+    """Config whose Redis clients all connect to an in-memory fakeredis server"""
+    import fakeredis
+    import redis
+
+    monkeypatch.setattr(redis, 'StrictRedis',
+                        lambda **kwargs: fakeredis.FakeStrictRedis(server=redis_server, **kwargs))
+    config = configparser.ConfigParser()
+    config.read_dict({'redis': {'host': 'localhost', 'port': '6379'}})
+    return config
+
+@pytest.fixture
+def repository(redis_config):
+    """A Repository backed by an in-memory fakeredis server"""
+    from repository import Repository
+    return Repository(redis_config)
@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+
+import pytest
+from PIL import Image
+from starlette.requests import Request
+
+import app
+from artifacts import ArtifactCache
+from drawing import ImageEncoder, PanelFormat
+
+def frame(shade: int = 1) -> Image.Image:
+    image = Image.new('1', (16, 4), shade)
+    image.putpixel((0, 0), 1 - shade)
+    return image
+
+@pytest.mark.parametrize('header, expected', [
+    ('', False),
+    ('gzip', True),
+    ('deflate, gzip;q=0.5', True),
+    ('GZIP; Q=1.0', True),
+    ('x-gzip', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.000', False),
+    ('gzip;q=0, *', False),
+    ('*;q=0, gzip', True),
+    ('identity', False),
+    ('gzip;q=bogus', False),
+])
+def test_accepts_gzip(header, expected):
+    assert app.accepts_gzip(header) is expected
+
+def test_each_format_is_encoded_once():
+    async def scenario():
+        cache = ArtifactCache()
+        image = frame()
+        results = await asyncio.gather(*(cache.get(image, 'packed') for _ in range(4)))
+        png = await cache.get(image, 'png')
+        return results, png, cache.misses, cache.hits
+
+    results, png, misses, hits = asyncio.run(scenario())
+    assert results == [bytes(ImageEncoder.to_packed_bytes(frame()))] * 4
+    assert png.startswith(b'\x89PNG')
+    assert (misses, hits) == (2, 3)
+
+def test_gzip_variant_wraps_the_base_format():
+    async def scenario():
+        cache = ArtifactCache()
+        image = frame()
+        return await cache.get(image, 'packed.gz'), cache.cached(image, 'packed')
+
+    compressed, packed = asyncio.run(scenario())
+    assert gzip.decompress(compressed) == packed
+    assert ArtifactCache.media_type('packed.gz') == 'application/octet-stream'
+
+def test_device_formats_use_their_panel_format():
+    async def scenario():
+        panel_format = PanelFormat(bpp=2, rotate=90)
+        cache = ArtifactCache(panel_formats={'kitchen': panel_format})
+        image = frame()
+        return await cache.get(image, 'packed:kitchen'), ImageEncoder.encode(image, panel_format)
+
+    encoded, expected = asyncio.run(scenario())
+    assert encoded == expected
+    with pytest.raises(ValueError):
+        ArtifactCache().encode(frame(), 'packed:hallway')
+
+def test_least_recently_used_frames_are_evicted():
+    async def scenario():
+        cache = ArtifactCache(max_frames=2)
+        first, second, third = frame(0), frame(1), Image.new('1', (16, 4), 0)
+        await cache.get(first, 'packed')
+        await cache.get(second, 'packed')
+        await cache.get(first, 'packed')
+        await cache.get(third, 'packed')
+        return cache, first, second, third
+
+    cache, first, second, third = asyncio.run(scenario())
+    assert len(cache) == 2
+    assert cache.cached(second, 'packed') is None
+    assert cache.cached(first, 'packed') is not None
+    assert cache.size() == 2 * 8
+
+def test_put_stores_output_encoded_elsewhere():
+    async def scenario():
+        cache = ArtifactCache()
+        image = frame()
+        cache.put(image, 'packed', b'streamed')
+        return await cache.get(image, 'packed'), cache.misses
+
+    assert asyncio.run(scenario()) == (b'streamed', 0)
+
+@pytest.mark.parametrize('header, encoding', [('gzip', 'gzip'), ('gzip;q=0', None), ('', None)])
+def test_frame_response_is_only_gzipped_when_accepted(monkeypatch, header, encoding):
+    monkeypatch.setattr(app, 'artifacts', ArtifactCache(), raising=False)
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/statusboard_bytes',
+                       'headers': [(b'accept-encoding', header.encode())]})
+
+    response = asyncio.run(app.frame_response(request, frame(), 'packed'))
+    assert response.headers.get('content-encoding') == encoding
+    assert response.headers['vary'] == 'Accept-Encoding'
+    body = gzip.decompress(response.body) if encoding else response.body
+    assert body == bytes(ImageEncoder.to_packed_bytes(frame()))
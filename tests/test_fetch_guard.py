@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from drawing.base import Panel, SourceError
+from drawing.fetch_guard import FetchGuard, FetchTimeoutError
+from drawing.sensors_panel import SensorsPanel
+
+class CountingPanel(Panel):
+    """A panel whose fetches take `delay` seconds, failing while `fail` is set"""
+
+    name = 'counter'
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.fail = False
+        # Shared with the copies the guard fetches into
+        self.fetches = []
+        self.value = None
+
+    async def fetch_data(self):
+        self.fetches.append(datetime.now())
+        fetch = len(self.fetches)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('upstream down')
+        self.value = fetch
+
+    def snapshot(self):
+        return self.value
+
+    def restore(self, snapshot):
+        self.value = snapshot
+
+    def render(self):
+        pass
+
+def test_fresh_data_is_used_within_budget():
+    async def scenario():
+        panel = CountingPanel()
+        errors = await FetchGuard(budget=1, deadline=2).fetch_all([panel])
+        return errors, panel.value, panel.stale_since
+
+    assert asyncio.run(scenario()) == ([None], 1, None)
+
+def test_slow_source_falls_back_to_last_good_data():
+    async def scenario():
+        guard = FetchGuard(budget=0.05, deadline=1)
+        panel = CountingPanel()
+        await guard.fetch_all([panel])
+
+        panel.delay = 0.2
+        errors = await guard.fetch_all([panel])
+        rendered = (errors, panel.value, panel.stale_since is not None)
+
+        # The late refresh lands in the guard, not in the panel being rendered
+        await asyncio.sleep(0.3)
+        return rendered, panel.value, guard.last_good('counter')
+
+    rendered, value, last_good = asyncio.run(scenario())
+    assert rendered == ([None], 1, True)
+    assert value == 1
+    assert last_good == 2
+
+def test_failing_source_falls_back_to_last_good_data():
+    async def scenario():
+        guard = FetchGuard(budget=1, deadline=2)
+        panel = CountingPanel()
+        await guard.fetch_all([panel])
+
+        panel.fail = True
+        errors = await guard.fetch_all([panel])
+        return errors, panel.value, isinstance(panel.stale_since, datetime)
+
+    assert asyncio.run(scenario()) == ([None], 1, True)
+
+def test_source_without_last_good_data_reports_its_error():
+    async def scenario():
+        failing, slow = CountingPanel(), CountingPanel(delay=0.5)
+        failing.fail = True
+        slow.name = 'slow'
+        return await FetchGuard(budget=0.01, deadline=0.1).fetch_all([failing, slow])
+
+    failed, timed_out = asyncio.run(scenario())
+    assert isinstance(failed, RuntimeError)
+    # Without anything to fall back to, only the overall deadline applies
+    assert isinstance(timed_out, FetchTimeoutError)
+
+def test_refresh_still_running_is_joined_by_the_next_render():
+    async def scenario():
+        guard = FetchGuard(budget=0.01, deadline=1)
+        panel = CountingPanel()
+        await guard.fetch_all([panel])
+
+        panel.delay = 0.1
+        await guard.fetch_all([panel])
+        await guard.fetch_all([panel])
+        return len(panel.fetches)
+
+    assert asyncio.run(scenario()) == 2
+
+class FakeHomeAssistant:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    async def get_value(self, sensor):
+        if sensor in self.failing:
+            return {'error': 'unavailable'}
+        return {'state': f'{sensor} ok'}
+
+def test_sensors_keep_last_good_state_when_some_fail():
+    panel = SensorsPanel()
+    panel.ha = FakeHomeAssistant()
+    asyncio.run(panel.fetch_data())
+
+    panel.ha = FakeHomeAssistant(failing={'sensor.picton_temperature', 'sensor.cyberpower_battery_charge'})
+    panel.sensor_data.pop('ups_battery')
+    asyncio.run(panel.fetch_data())
+
+    assert panel.sensor_data['main_temp'] == {'state': 'sensor.picton_temperature ok'}
+    assert panel.sensor_data['ups_battery'] == {'error': 'unavailable'}
+    assert panel.sensor_data['car_range'] == {'state': 'sensor.ix_xdrive50_remaining_range_total ok'}
+
+def test_sensors_fetch_fails_only_when_every_sensor_fails():
+    class DownHomeAssistant:
+        async def get_value(self, sensor):
+            raise ConnectionError('no route to host')
+
+    panel = SensorsPanel()
+    panel.ha = DownHomeAssistant()
+    with pytest.raises(SourceError):
+        asyncio.run(panel.fetch_data())
@@ -0,0 +1,75 @@
+import pytest
+
+from frame_history import FrameHistory
+
+def frame(n: int) -> bytes:
+    return bytes([n]) * 16
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'frames.ring')
+
+def test_ring_keeps_the_latest_frames_once_full(path):
+    history = FrameHistory(path, slots=3, frame_size=16)
+    for n in range(5):
+        history.append(frame(n), timestamp=1000 + n)
+
+    assert len(history) == 3
+    assert [r.seq for r in history.records()] == [2, 3, 4]
+    assert [bytes(f) for _, f in history.replay()] == [frame(2), frame(3), frame(4)]
+    assert history.get(1) is None
+    assert history.get(5) is None
+    assert history.get(3).timestamp == 1003
+    assert history.latest().seq == 4
+
+def test_identical_frames_are_skipped(path):
+    history = FrameHistory(path, slots=3, frame_size=16)
+    assert history.append(frame(1), timestamp=1000) is not None
+    assert history.append(frame(1), timestamp=1060) is None
+    assert history.append(frame(2), timestamp=1120).seq == 1
+    # Only the latest frame is compared; the board changing back is a new frame
+    assert history.append(frame(1), timestamp=1180).seq == 2
+
+def test_frame_current_at_a_time(path):
+    history = FrameHistory(path, slots=4, frame_size=16)
+    for n in range(3):
+        history.append(frame(n), timestamp=1000 + 60 * n)
+
+    assert history.at(999) is None
+    assert history.at(1000).seq == 0
+    assert history.at(1119).seq == 1
+    assert history.at(5000).seq == 2
+    assert [r.seq for r, _ in history.replay(since=1060)] == [1, 2]
+
+def test_reopening_keeps_stored_frames(path):
+    history = FrameHistory(path, slots=3, frame_size=16)
+    for n in range(4):
+        history.append(frame(n), timestamp=1000 + n)
+    history.flush()
+
+    reopened = FrameHistory.open_existing(path)
+    assert (reopened.slots, reopened.frame_size) == (3, 16)
+    assert [r.seq for r in reopened.records()] == [1, 2, 3]
+    assert bytes(reopened.frame(reopened.latest())) == frame(3)
+    assert reopened.append(frame(4)).seq == 4
+
+def test_changed_layout_starts_a_new_history(path):
+    history = FrameHistory(path, slots=3, frame_size=16)
+    history.append(frame(1))
+    history.flush()
+
+    assert len(FrameHistory(path, slots=5, frame_size=16)) == 0
+
+def test_frames_larger_than_a_slot_are_rejected(path):
+    history = FrameHistory(path, slots=3, frame_size=16)
+    with pytest.raises(ValueError):
+        history.append(bytes(17))
+    # Shorter frames keep their own length
+    history.append(b'short')
+    assert bytes(history.frame(history.latest())) == b'short'
+
+def test_open_existing_rejects_other_files(path):
+    with open(path, 'wb') as f:
+        f.write(bytes(64))
+    with pytest.raises(ValueError):
+        FrameHistory.open_existing(path)
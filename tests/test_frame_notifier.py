@@ -0,0 +1,102 @@
+import asyncio
+from configparser import ConfigParser
+
+from PIL import Image
+from starlette.requests import Request
+
+from frame_notifier import FrameNotifier
+
+def frame(version: str) -> Image.Image:
+    image = Image.new('1', (8, 8))
+    image.info['version'] = version
+    return image
+
+def test_stream_counts_as_one_subscriber_until_closed():
+    async def scenario():
+        renders = 0
+
+        async def render():
+            nonlocal renders
+            renders += 1
+            image = frame(str(renders))
+            await notifier.publish(image)
+            return image
+
+        notifier = FrameNotifier(render, interval=0.05)
+        events = notifier.subscribe(keepalive=0.01)
+        await events.__anext__()
+        # Between events, as while the client is sent one, the stream still counts
+        counted = notifier._subscribers
+        await asyncio.sleep(0.2)
+        refreshing = not notifier._task.done()
+        await events.aclose()
+        return counted, refreshing, notifier._subscribers
+
+    assert asyncio.run(scenario()) == (1, True, 0)
+
+def test_restarted_refresh_loop_keeps_to_the_interval():
+    async def scenario():
+        renders = 0
+
+        async def render():
+            nonlocal renders
+            renders += 1
+            image = frame('same')
+            await notifier.publish(image)
+            return image
+
+        notifier = FrameNotifier(render, interval=10)
+        for _ in range(5):
+            await notifier.wait_for_change('same', 0.01)
+            # Let the refresh loop see there are no waiters and stop
+            notifier._task.cancel()
+            await asyncio.sleep(0)
+        return renders
+
+    assert asyncio.run(scenario()) == 1
+
+def publishing_notifier(version: str, interval: float = 10) -> FrameNotifier:
+    """A notifier whose renders keep publishing the same frame version"""
+    async def render():
+        image = frame(version)
+        await notifier.publish(image)
+        return image
+
+    notifier = FrameNotifier(render, interval=interval)
+    return notifier
+
+def test_long_poll_times_out_without_a_new_frame():
+    async def scenario():
+        notifier = publishing_notifier('v1')
+        started = asyncio.get_running_loop().time()
+        changed = await notifier.wait_for_change('v1', 0.05)
+        return changed, notifier.version, asyncio.get_running_loop().time() - started
+
+    changed, version, waited = asyncio.run(scenario())
+    assert (changed, version) == (False, 'v1')
+    assert 0.05 <= waited < 1
+
+def test_long_poll_returns_as_soon_as_the_frame_changes():
+    async def scenario():
+        notifier = publishing_notifier('v1')
+        waiter = asyncio.create_task(notifier.wait_for_change('v1', 5))
+        await asyncio.sleep(0.05)
+        await notifier.publish(frame('v2'))
+        return await asyncio.wait_for(waiter, 1), await notifier.wait_for_change('v1', 5)
+
+    assert asyncio.run(scenario()) == (True, True)
+
+def test_wait_endpoint_answers_304_with_the_current_version(monkeypatch):
+    import app
+
+    config = ConfigParser()
+    config.read_dict({'push': {'long_poll_timeout': '0.05'}})
+    monkeypatch.setattr(app, 'config', config, raising=False)
+    monkeypatch.setattr(app, 'notifier', publishing_notifier('v1'), raising=False)
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/statusboard_bytes/wait', 'headers': []})
+
+    # The requested timeout is capped by the configured one
+    response = asyncio.run(app.statusboard_bytes_wait(request, since='v1', timeout=30))
+    assert response.status_code == 304
+    assert response.headers['X-Frame-Version'] == 'v1'
+    assert response.body == b''
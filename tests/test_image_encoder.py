@@ -0,0 +1,63 @@
+import pytest
+from PIL import Image
+
+from drawing import ImageEncoder, PanelFormat
+
+def gray(*rows) -> Image.Image:
+    """An 'L' image from rows of 0-255 gray values"""
+    image = Image.new('L', (len(rows[0]), len(rows)))
+    image.putdata([value for row in rows for value in row])
+    return image
+
+@pytest.mark.parametrize('panel_format, pixels, expected', [
+    (PanelFormat(bpp=1), [255, 255, 0, 0, 0, 0, 0, 255], b'\xc1'),
+    (PanelFormat(bpp=1, bit_order='lsb'), [255, 255, 0, 0, 0, 0, 0, 255], b'\x83'),
+    # 0, 85, 170 and 255 map to the four levels 0-3
+    (PanelFormat(bpp=2), [0, 85, 170, 255], b'\x1b'),
+    (PanelFormat(bpp=2, bit_order='lsb'), [0, 85, 170, 255], b'\xe4'),
+    (PanelFormat(bpp=4), [17, 170], b'\x1a'),
+    (PanelFormat(bpp=4, bit_order='lsb'), [17, 170], b'\xa1'),
+])
+def test_pixels_are_packed_in_the_panel_bit_order(panel_format, pixels, expected):
+    assert ImageEncoder.encode(gray(pixels), panel_format) == expected
+
+def test_gray_is_quantized_to_the_nearest_level():
+    assert ImageEncoder.encode(gray([40, 100, 130, 230]), PanelFormat(bpp=2)) == bytes([0b00011011])
+
+@pytest.mark.parametrize('bpp, width, row_bytes', [(1, 9, 2), (2, 5, 2), (4, 3, 2)])
+def test_rows_are_padded_to_whole_bytes(bpp, width, row_bytes):
+    image = gray([255] * width, [0] * width)
+    encoded = ImageEncoder.encode(image, PanelFormat(bpp=bpp))
+    assert len(encoded) == 2 * row_bytes
+    # Padding doesn't carry pixels over into the next row
+    assert encoded[row_bytes:] == bytes(row_bytes)
+
+@pytest.mark.parametrize('panel_format, expected', [
+    (PanelFormat(rotate=0), b'\x80'),
+    (PanelFormat(rotate=90), b'\x80\x00'),
+    (PanelFormat(rotate=180), b'\x40'),
+    (PanelFormat(rotate=270), b'\x00\x80'),
+    (PanelFormat(mirror='horizontal'), b'\x40'),
+    (PanelFormat(mirror='vertical'), b'\x80'),
+    (PanelFormat(rotate=90, mirror='vertical'), b'\x00\x80'),
+])
+def test_frames_are_rotated_clockwise_then_mirrored(panel_format, expected):
+    # A single white pixel on the left of a 2x1 frame
+    assert ImageEncoder.encode(gray([255, 0]), panel_format) == expected
+
+def test_one_bit_msb_matches_the_default_packing():
+    image = Image.new('1', (16, 3), 0)
+    image.putpixel((3, 1), 1)
+    image.putpixel((15, 2), 1)
+    packed = ImageEncoder.to_packed_bytes(image)
+
+    assert packed == b'\x00\x00\x10\x00\x00\x01'
+    assert ImageEncoder.encode(image, PanelFormat()) == packed
+    assert b''.join(ImageEncoder.iter_packed_rows(image, rows_per_band=2)) == packed
+    assert len(packed) == ImageEncoder.packed_size(16, 3)
+    assert ImageEncoder.from_packed_bytes(packed, 16, 3).tobytes() == image.tobytes()
+
+@pytest.mark.parametrize('options', [{'bpp': 3}, {'rotate': 45}, {'mirror': 'diagonal'}, {'bit_order': 'middle'}])
+def test_unsupported_panel_formats_are_rejected(options):
+    with pytest.raises(ValueError):
+        PanelFormat(**options)
@@ -0,0 +1,82 @@
+import pytest
+
+from metrics import CallbackMetric, Counter, Gauge, Histogram, Timer
+
+def test_counter_exposition():
+    counter = Counter('statusboard_test_total', 'Things counted', ['source'])
+    counter.inc(source='weather')
+    counter.inc(2, source='weather')
+    counter.inc(0.5, source='flights')
+
+    assert counter.expose().splitlines() == [
+        '# HELP statusboard_test_total Things counted',
+        '# TYPE statusboard_test_total counter',
+        'statusboard_test_total{source="flights"} 0.5',
+        'statusboard_test_total{source="weather"} 3',
+    ]
+
+def test_metric_without_samples_still_has_help_and_type():
+    assert Gauge('statusboard_idle', 'Nothing yet').expose().splitlines() == [
+        '# HELP statusboard_idle Nothing yet',
+        '# TYPE statusboard_idle gauge',
+    ]
+
+def test_label_values_are_escaped():
+    gauge = Gauge('statusboard_label', 'Escaping', ['name'])
+    gauge.set(1, name='say "hi"\\\nbye')
+    assert gauge.expose().splitlines()[-1] == 'statusboard_label{name="say \\"hi\\"\\\\\\nbye"} 1'
+
+def test_labels_must_match_the_metric():
+    counter = Counter('statusboard_labels_total', 'Labels', ['panel'])
+    with pytest.raises(ValueError):
+        counter.inc(source='weather')
+    with pytest.raises(ValueError):
+        counter.inc()
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('statusboard_test_seconds', 'Latency', ['source'], buckets=(5.0, 1.0))
+    for value in (0.5, 1.0, 3.0, 10.0):
+        histogram.observe(value, source='redis')
+
+    assert histogram.expose().splitlines() == [
+        '# HELP statusboard_test_seconds Latency',
+        '# TYPE statusboard_test_seconds histogram',
+        'statusboard_test_seconds_bucket{source="redis",le="1.0"} 2',
+        'statusboard_test_seconds_bucket{source="redis",le="5.0"} 3',
+        'statusboard_test_seconds_bucket{source="redis",le="+Inf"} 4',
+        'statusboard_test_seconds_sum{source="redis"} 14.5',
+        'statusboard_test_seconds_count{source="redis"} 4',
+    ]
+
+def test_histogram_without_labels():
+    histogram = Histogram('statusboard_frame_seconds', 'Frames', buckets=(0.1,))
+    histogram.observe(0.25)
+
+    assert histogram.expose().splitlines()[2:] == [
+        'statusboard_frame_seconds_bucket{le="0.1"} 0',
+        'statusboard_frame_seconds_bucket{le="+Inf"} 1',
+        'statusboard_frame_seconds_sum 0.25',
+        'statusboard_frame_seconds_count 1',
+    ]
+
+def test_callback_metrics_are_read_on_every_exposition():
+    entries = {'artifacts': 2}
+    metric = CallbackMetric('statusboard_cache_entries', 'Entries', 'gauge', ['cache'])
+    metric.add_callback(lambda: {(name,): count for name, count in entries.items()})
+
+    assert metric.expose().splitlines()[-1] == 'statusboard_cache_entries{cache="artifacts"} 2'
+    entries['artifacts'] = 3
+    assert metric.expose().splitlines()[-1] == 'statusboard_cache_entries{cache="artifacts"} 3'
+
+def test_timer_observes_and_counts_errors():
+    histogram = Histogram('statusboard_timed_seconds', 'Timed', ['panel'])
+    errors = Counter('statusboard_timed_errors_total', 'Errors', ['panel'])
+
+    with Timer(histogram, errors, panel='weather'):
+        pass
+    with pytest.raises(RuntimeError):
+        with Timer(histogram, errors, panel='weather'):
+            raise RuntimeError('upstream down')
+
+    assert histogram.expose().splitlines()[-1] == 'statusboard_timed_seconds_count{panel="weather"} 2'
+    assert errors.expose().splitlines()[-1] == 'statusboard_timed_errors_total{panel="weather"} 1'
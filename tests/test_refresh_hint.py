@@ -0,0 +1,72 @@
+import configparser
+from datetime import datetime, time, timedelta, timezone
+
+from refresh_hint import RefreshAdvisor, parse_quiet_hours
+
+ZONE = timezone(timedelta(hours=1))
+NOON = datetime(2026, 1, 10, 12, 0, tzinfo=ZONE)
+
+def at(hour: int, minute: int = 0, second: int = 0) -> datetime:
+    return NOON.replace(hour=hour, minute=minute, second=second)
+
+def test_without_history_the_device_sleeps_the_longest_interval():
+    assert RefreshAdvisor(max_interval=1800).hint(NOON) == 1800
+
+def test_a_panel_is_expected_to_change_at_its_source_cadence():
+    advisor = RefreshAdvisor()
+    advisor.observe({'weather': 'sunny', 'reminders': 'none'}, NOON)
+    assert advisor.hint(NOON) == 600
+
+def test_recent_changes_set_the_expected_interval():
+    advisor = RefreshAdvisor()
+    for n in range(4):
+        advisor.observe({'weather': f'v{n}'}, NOON + timedelta(seconds=200 * n))
+    # An unchanged version is not a change
+    advisor.observe({'weather': 'v3'}, NOON + timedelta(seconds=700))
+
+    assert advisor.hint(NOON + timedelta(seconds=700)) == 100
+
+def test_hint_stays_within_the_configured_bounds():
+    advisor = RefreshAdvisor(min_interval=90, max_interval=1200, cadences={'reminders': 7200})
+    advisor.observe({'flights': 'a'}, NOON)
+    assert advisor.hint(NOON + timedelta(minutes=30)) == 90
+
+    advisor = RefreshAdvisor(min_interval=90, max_interval=1200, cadences={'reminders': 7200})
+    advisor.observe({'reminders': 'a'}, NOON)
+    assert advisor.hint(NOON) == 1200
+
+def test_device_sleeps_through_quiet_hours():
+    advisor = RefreshAdvisor(quiet_hours=(time(23, 0), time(6, 30)))
+    advisor.observe({'flights': 'a'}, at(23, 30))
+    assert advisor.hint(at(23, 30)) == 7 * 3600
+
+def test_poll_landing_in_quiet_hours_waits_for_them_to_end():
+    advisor = RefreshAdvisor(quiet_hours=(time(23, 0), time(6, 30)))
+    advisor.observe({'flights': 'a'}, at(22, 59, 30))
+    assert advisor.hint(at(22, 59, 30)) == 7 * 3600 + 30 * 60 + 30
+
+    advisor = RefreshAdvisor(quiet_hours=(time(23, 0), time(6, 30)))
+    advisor.observe({'flights': 'a'}, at(21))
+    assert advisor.hint(at(21)) == 60
+
+def test_device_wakes_for_a_reminder_that_falls_due():
+    advisor = RefreshAdvisor(quiet_hours=(time(23, 0), time(6, 30)))
+    due = at(23, 30) + timedelta(hours=2)
+    assert advisor.hint(at(23, 30), [at(20), due]) == 2 * 3600
+
+    # Naive reminder times are in the local zone, and too soon still waits the minimum
+    assert advisor.hint(NOON, [datetime(2026, 1, 10, 12, 0, 10)]) == 60
+
+def test_from_config():
+    config = configparser.ConfigParser()
+    config.read_dict({'refresh': {
+        'min_interval': '120', 'max_interval': '900',
+        'weather_interval': '1800', 'quiet_hours': '23:00 - 06:30'}})
+    advisor = RefreshAdvisor.from_config(config)
+
+    assert (advisor.min_interval, advisor.max_interval) == (120, 900)
+    assert advisor.cadences['weather'] == 1800
+    assert advisor.cadences['flights'] == 60
+    assert 'min' not in advisor.cadences
+    assert advisor.quiet_hours == (time(23, 0), time(6, 30))
+    assert parse_quiet_hours('') is None
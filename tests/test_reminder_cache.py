@@ -0,0 +1,57 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from reminder import Reminder
+from reminder_cache import ReminderCache
+
+def reminder_json(reminder_id: str, message: str) -> str:
+    return json.dumps(Reminder(reminder_id, message, None, 'Inbox', None, False).to_json())
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting for the reminder cache')
+        await asyncio.sleep(0.01)
+
+def messages(cache: ReminderCache):
+    return [reminder.message for reminder in cache.reminders() or []]
+
+def test_cache_follows_changes_made_outside_the_app(repository, redis_server):
+    import fakeredis
+
+    async def scenario():
+        # What the sample config tells operators to enable
+        repository.client.config_set('notify-keyspace-events', 'Kg$x')
+        cache = ReminderCache(repository)
+        cache.client = fakeredis.aioredis.FakeRedis(server=redis_server, decode_responses=True)
+        changes = []
+        cache.add_listener(lambda: changes.append(messages(cache)))
+        outside = fakeredis.FakeStrictRedis(server=redis_server, decode_responses=True)
+
+        await cache.start()
+        try:
+            await wait_for(lambda: cache.live)
+
+            outside.set('reminder:milk', reminder_json('milk', 'Buy milk'))
+            await wait_for(lambda: messages(cache) == ['Buy milk'])
+
+            outside.set('reminder:milk', reminder_json('milk', 'Buy oat milk'))
+            await wait_for(lambda: messages(cache) == ['Buy oat milk'])
+
+            outside.delete('reminder:milk')
+            await wait_for(lambda: messages(cache) == [])
+
+            outside.set('reminder:bins', reminder_json('bins', 'Put the bins out'), px=200)
+            await wait_for(lambda: messages(cache) == ['Put the bins out'])
+            # Dropped on expiry even if the server never announces it
+            await wait_for(lambda: messages(cache) == [])
+        finally:
+            await cache.stop()
+        return changes
+
+    changes = asyncio.run(scenario())
+    assert changes[-5:] == [['Buy milk'], ['Buy oat milk'], [], ['Put the bins out'], []]
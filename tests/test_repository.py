@@ -0,0 +1,86 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from reminder import Reminder
+
+def reminder(reminder_id: str, message: str = 'Water the plants', time: datetime = None,
+             list_name: str = 'Home', completed=False) -> Reminder:
+    return Reminder(reminder_id, message, time, list_name, None, completed)
+
+def test_sync_writes_only_what_changed(repository):
+    first = repository.sync_reminders([reminder('a'), reminder('b'), reminder('c')])
+    assert first == {'created': 3, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+
+    second = repository.sync_reminders([reminder('a'), reminder('b', 'Feed the cat')])
+    assert second == {'created': 0, 'updated': 1, 'unchanged': 1, 'deleted': 1}
+    assert sorted(r.id for r in repository.get_all_reminders()) == ['a', 'b']
+    assert repository.get_reminder('b').message == 'Feed the cat'
+
+def test_sync_treats_expired_reminders_as_new(repository):
+    repository.sync_reminders([reminder('a'), reminder('b')])
+    # Expired keys leave their index entries behind until they are pruned
+    repository.client.delete('reminder:a', 'reminder:b')
+
+    counts = repository.sync_reminders([reminder('a'), reminder('b', 'Changed while expired')])
+    assert counts == {'created': 2, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    assert repository.client.ttl('reminder:a') > 0
+
+AT = datetime(2026, 5, 4, 9, 0, tzinfo=timezone.utc)
+
+@pytest.fixture
+def reminders(repository):
+    repository.sync_reminders([
+        reminder('e', list_name='Home'),
+        reminder('d', time=AT + timedelta(hours=2), completed=True),
+        reminder('c', time=AT + timedelta(hours=1)),
+        reminder('b', time=AT + timedelta(hours=1), list_name='Work', completed=True),
+        reminder('a', time=AT),
+    ])
+    return repository
+
+def ids(results) -> list:
+    return [json.loads(result)['id'] for result in results]
+
+def query_all(repository, **filters) -> list:
+    """Every page of a query, following its cursors"""
+    pages, cursor = [], None
+    while True:
+        results, cursor = repository.query_reminders(cursor=cursor, **filters)
+        pages.append(ids(results))
+        if cursor is None:
+            return pages
+
+def test_query_orders_by_due_time_then_id_with_undated_last(reminders):
+    results, cursor = reminders.query_reminders()
+    assert ids(results) == ['a', 'b', 'c', 'd', 'e']
+    assert cursor is None
+
+def test_query_filters(reminders):
+    assert ids(reminders.query_reminders(list_name='Home')[0]) == ['a', 'c', 'd', 'e']
+    assert ids(reminders.query_reminders(completed=False)[0]) == ['a', 'c', 'e']
+    assert ids(reminders.query_reminders(list_name='Home', completed=True)[0]) == ['d']
+    assert ids(reminders.query_reminders(list_name='Garden')[0]) == []
+
+def test_query_time_window(reminders):
+    hour = timedelta(hours=1)
+    assert ids(reminders.query_reminders(start=AT + hour, end=AT + hour)[0]) == ['b', 'c']
+    assert ids(reminders.query_reminders(end=AT + hour)[0]) == ['a', 'b', 'c']
+    # Undated reminders are after every start time
+    assert ids(reminders.query_reminders(start=AT + 2 * hour)[0]) == ['d', 'e']
+
+def test_query_pages_through_equal_due_times_without_gaps(reminders, monkeypatch):
+    import repository as repository_module
+    # Several index fetches per page
+    monkeypatch.setattr(repository_module, 'QUERY_BATCH', 2)
+
+    assert query_all(reminders, limit=1) == [['a'], ['b'], ['c'], ['d'], ['e'], []]
+    assert query_all(reminders, limit=2, list_name='Home') == [['a', 'c'], ['d', 'e'], []]
+    assert query_all(reminders, limit=2, completed=False, end=AT + timedelta(hours=1)) == [['a', 'c'], []]
+
+def test_query_skips_and_prunes_expired_reminders(reminders):
+    reminders.client.delete('reminder:c')
+
+    assert ids(reminders.query_reminders()[0]) == ['a', 'b', 'd', 'e']
+    assert reminders.client.zscore('reminders:by_time', 'c') is None
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 'frame'
+
+        results = await asyncio.gather(*(flight.do('frame', fetch) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ['frame'] * 5
+    assert calls == 1
+    assert stats == {'frame': {'requests': 5, 'executions': 1, 'coalesced': 4}}
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(flight.do('a', lambda: fetch(1)), flight.do('b', lambda: fetch(2)))
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    async def scenario():
+        flight = SingleFlight(grace=60)
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls == 1:
+                raise RuntimeError('upstream down')
+            return 'recovered'
+
+        failures = await asyncio.gather(*(flight.do('frame', fetch) for _ in range(3)),
+                                        return_exceptions=True)
+        # Even within the grace period, the next call runs again rather than sharing the failure
+        retried = await flight.do('frame', fetch)
+        return failures, retried, calls
+
+    failures, retried, calls = asyncio.run(scenario())
+    assert [str(e) for e in failures] == ['upstream down'] * 3
+    assert all(isinstance(e, RuntimeError) for e in failures)
+    assert retried == 'recovered'
+    assert calls == 2
+
+def test_results_are_shared_within_the_grace_period():
+    async def scenario():
+        flight = SingleFlight(grace=60)
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        first = await flight.do('frame', fetch)
+        second = await flight.do('frame', fetch)
+        flight.forget('frame')
+        third = await flight.do('frame', fetch)
+        return first, second, third
+
+    assert asyncio.run(scenario()) == (1, 1, 2)
+
+def test_results_are_not_shared_without_grace():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        return await flight.do('frame', fetch), await flight.do('frame', fetch)
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'frame'
+
+        first = asyncio.create_task(flight.do('frame', fetch))
+        second = asyncio.create_task(flight.do('frame', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 'frame'
@@ -0,0 +1,44 @@
+import configparser
+from datetime import datetime, timedelta, timezone
+
+from snapshots import FileSnapshotStore, RedisSnapshotStore, get_snapshot_store
+
+FETCHED_AT = datetime(2026, 3, 14, 7, 30, tzinfo=timezone(timedelta(hours=-5)))
+WEATHER = {'temperature': 4.5, 'conditions': 'Light snow', 'forecast': [{'high': 6, 'low': -2}]}
+
+def test_file_store_round_trip(tmp_path):
+    store = FileSnapshotStore(str(tmp_path / 'snapshots'))
+    store.save('weather', WEATHER, FETCHED_AT)
+    store.save('sensors', {}, FETCHED_AT)
+
+    # A new store, as after a restart
+    loaded = FileSnapshotStore(str(tmp_path / 'snapshots')).load_all()
+    assert loaded == {'weather': (WEATHER, FETCHED_AT), 'sensors': ({}, FETCHED_AT)}
+    assert loaded['weather'][1].utcoffset() == timedelta(hours=-5)
+
+def test_file_store_overwrites_and_skips_unreadable_snapshots(tmp_path):
+    store = FileSnapshotStore(str(tmp_path))
+    store.save('weather', {'temperature': 1}, FETCHED_AT)
+    store.save('weather', WEATHER, FETCHED_AT + timedelta(minutes=10))
+    (tmp_path / 'flights.json').write_text('{"fetched_at": ')
+    (tmp_path / 'notes.txt').write_text('not a snapshot')
+
+    assert store.load_all() == {'weather': (WEATHER, FETCHED_AT + timedelta(minutes=10))}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['flights.json', 'notes.txt', 'weather.json']
+
+def test_redis_store_round_trip(redis_config):
+    store = RedisSnapshotStore(redis_config)
+    store.save('weather', WEATHER, FETCHED_AT)
+    store.client.set('snapshot:flights', 'not json')
+
+    assert RedisSnapshotStore(redis_config).load_all() == {'weather': (WEATHER, FETCHED_AT)}
+
+def test_backend_is_chosen_by_config(tmp_path):
+    config = configparser.ConfigParser()
+    assert get_snapshot_store(config) is None
+
+    config.read_dict({'snapshots': {'backend': 'file', 'path': str(tmp_path)}})
+    assert isinstance(get_snapshot_store(config), FileSnapshotStore)
+
+    config.set('snapshots', 'backend', 'memcached')
+    assert get_snapshot_store(config) is None
@@ -0,0 +1,52 @@
+import asyncio
+
+import tracing
+from frame_notifier import FrameNotifier
+from PIL import Image
+
+def test_long_lived_subscriber_trace_stays_bounded():
+    async def scenario():
+        renders = 0
+
+        async def render():
+            nonlocal renders
+            renders += 1
+            with tracing.span('render'):
+                image = Image.new('1', (8, 8))
+                image.info['version'] = str(renders)
+                await notifier.publish(image)
+            return image
+
+        notifier = FrameNotifier(render, interval=0.01)
+        trace = tracing.Trace('GET /events')
+        root = tracing.Span(trace.name, trace, None, {})
+        trace.add(root)
+        token = tracing._current.set(root)
+        try:
+            # An open /events stream: its trace never finishes while it runs
+            events = notifier.subscribe(keepalive=0.05)
+            for _ in range(20):
+                await events.__anext__()
+            await events.aclose()
+        finally:
+            tracing._current.reset(token)
+        return renders, trace
+
+    renders, trace = asyncio.run(scenario())
+    assert renders >= 20
+    assert [span.name for span in trace.spans] == ['GET /events']
+
+def test_spans_per_trace_are_capped():
+    trace = tracing.Trace('GET /')
+    root = tracing.Span(trace.name, trace, None, {})
+    trace.add(root)
+    token = tracing._current.set(root)
+    try:
+        for _ in range(tracing.MAX_SPANS + 10):
+            with tracing.span('step'):
+                pass
+    finally:
+        tracing._current.reset(token)
+    assert len(trace.spans) == tracing.MAX_SPANS
+    assert trace.dropped == 11
+    assert trace.to_json()['dropped_spans'] == 11
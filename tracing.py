@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Coroutine, Deque, Dict, List, Optional
+
+# Spans kept per trace; any beyond this are only counted
+MAX_SPANS = 500
+
+class Span:
+    """One timed step of a trace"""
+
+    __slots__ = ('name', 'trace', 'span_id', 'parent_id', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, name: str, trace: 'Trace', parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = next(trace._ids)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        data = {
+            'id': self.span_id,
+            'parent': self.parent_id,
+            'name': self.name,
+            'offset_ms': round((self.start - self.trace.start) * 1000, 3),
+            'duration_ms': round((end - self.start) * 1000, 3),
+        }
+        if self.attributes:
+            data['attributes'] = self.attributes
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+class Trace:
+    """The spans recorded while handling one request"""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._ids = itertools.count()
+
+    def add(self, span: Span):
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def to_json(self) -> Dict[str, Any]:
+        """The trace as a waterfall: spans ordered by start, offsets relative to the trace"""
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round((self.duration or 0) * 1000, 3),
+            'spans': [span.to_json() for span in sorted(self.spans, key=lambda span: span.start)],
+            'dropped_spans': self.dropped,
+        }
+
+_current: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+class _SpanContext:
+    __slots__ = ('name', 'attributes', '_span', '_token')
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Optional[Span]:
+        parent = _current.get()
+        if parent is None:
+            self._span = None
+            return None
+        self._span = Span(self.name, parent.trace, parent.span_id, self.attributes)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is None:
+            return False
+        self._span.end = time.perf_counter()
+        if exc_type is not None:
+            self._span.error = f'{exc_type.__name__}: {exc}'
+        _current.reset(self._token)
+        # Work that outlives its request, like a background refresh, is left out
+        if self._span.trace.duration is None:
+            self._span.trace.add(self._span)
+        return False
+
+def span(name: str, **attributes) -> _SpanContext:
+    """
+    Time a block as a span of the current trace. Outside a trace this does
+    nothing, so spans can wrap code that also runs in the background.
+    """
+    return _SpanContext(name, attributes)
+
+def detached(coro: Coroutine) -> asyncio.Task:
+    """
+    Run a coroutine as a task outside the current trace, for shared or
+    background work that can outlive the request that started it.
+    """
+    return asyncio.get_running_loop().create_task(coro, context=contextvars.Context())
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace.trace_id if current is not None else None
+
+class Tracer:
+    """Traces requests and keeps the last `capacity` that took at least `slow_threshold` seconds"""
+
+    def __init__(self, slow_threshold: float = 0.5, capacity: int = 20):
+        self.slow_threshold = slow_threshold
+        self._slow: Deque[Trace] = deque(maxlen=capacity)
+
+    @classmethod
+    def from_config(cls, config) -> 'Tracer':
+        """Create a tracer from the [tracing] section of the config"""
+        return cls(
+            slow_threshold=config.getfloat('tracing', 'slow_ms', fallback=500) / 1000,
+            capacity=config.getint('tracing', 'traces', fallback=20))
+
+    def slow_traces(self) -> List[Dict[str, Any]]:
+        """Recorded slow traces, newest first"""
+        return [trace.to_json() for trace in reversed(self._slow)]
+
+    def finish(self, trace: Trace):
+        trace.duration = time.perf_counter() - trace.start
+        if trace.duration >= self.slow_threshold:
+            self._slow.append(trace)
+            logging.info(f"Slow trace {trace.trace_id} for {trace.name} took {trace.duration * 1000:.0f}ms")
+
+class TracingMiddleware:
+    """Trace every HTTP request, and return its trace ID in an X-Trace-Id header"""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        root = Span(trace.name, trace, None, {})
+        trace.add(root)
+        token = _current.set(root)
+
+        async def send_with_trace_id(message):
+            if message['type'] == 'http.response.start':
+                root.attributes['status'] = message['status']
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'x-trace-id', trace.trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except Exception as e:
+            root.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            root.end = time.perf_counter()
+            _current.reset(token)
+            self.tracer.finish(trace)
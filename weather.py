@@ -1,5 +1,6 @@
 import aiohttp
 import logging
+import metrics
 
 class Weather:
     def __init__(self, config):
@@ -13,10 +14,11 @@ class Weather:
     async def get_weather(self):
         """Asynchronously fetch weather data."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.weather_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            with metrics.track_source('openweather'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(self.weather_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                        response.raise_for_status()
+                        return await response.json()
         except Exception as e:
             logging.error(f'Error fetching weather data: {e}')
             return {"error": str(e)}